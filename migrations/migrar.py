@@ -0,0 +1,71 @@
+"""
+Aplica as migracoes de schema pendentes (as mesmas que o app aplica ao iniciar)
+
+Uso:
+    python migrations/migrar.py            # aplica as pendentes
+    python migrations/migrar.py --status   # lista versoes aplicadas/pendentes
+    python migrations/migrar.py --indices  # confere se as consultas principais usam indice
+    python migrations/migrar.py --metricas # recalcula campanha_metricas e campanha_metricas_diarias
+
+Usa DATABASE_URL do ambiente (PostgreSQL) ou o SQLite local em data/.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from utils import data_manager
+
+
+def mostrar_status():
+    for migracao in data_manager.get_status_migracoes():
+        situacao = migracao['aplicada_em'] or 'PENDENTE'
+        print(f"{migracao['versao']:>3}  {situacao:<26}  {migracao['descricao']}")
+
+
+def mostrar_indices() -> bool:
+    ok = True
+    for item in data_manager.verificar_planos_indices():
+        ok = ok and item['usa_indice']
+        print(f"{'OK   ' if item['usa_indice'] else 'SCAN '} {item['query']}")
+        if not item['usa_indice']:
+            print(f"      {item['plano']}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migracoes de schema do AIR Relatorios")
+    parser.add_argument('--status', action='store_true', help="apenas lista as migracoes")
+    parser.add_argument('--indices', action='store_true', help="confere os planos das consultas indexadas")
+    parser.add_argument('--metricas', action='store_true', help="recalcula as metricas materializadas das campanhas (totais e diarias)")
+    args = parser.parse_args()
+
+    print(f"Banco: {'PostgreSQL' if data_manager.USING_POSTGRES else data_manager.DB_PATH}")
+
+    if args.status:
+        mostrar_status()
+        return 0
+
+    if args.indices:
+        return 0 if mostrar_indices() else 1
+
+    if args.metricas:
+        if not data_manager.aplicar_migracoes():
+            return 1
+        # campanha_metricas e somada a partir das linhas diarias
+        linhas = data_manager.reconstruir_metricas_diarias()
+        print(f"Metricas diarias recalculadas: {linhas} linhas")
+        total = data_manager.reconstruir_metricas_campanhas()
+        print(f"Metricas recalculadas: {total} campanhas")
+        return 0
+
+    ok = data_manager.aplicar_migracoes()
+    mostrar_status()
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -361,11 +361,17 @@ def render_tab_graficos_aon(campanha, filtro_data_ini, filtro_data_fim):
     cores = funcoes_auxiliares.get_cores_graficos()
     
     # Filtros
+    influenciadores_base = data_manager.get_influenciadores_das_campanhas([campanha])
+    nomes_influs = {
+        inf['influenciador_id']: influenciadores_base[inf['influenciador_id']].get('nome', '')
+        for inf in campanha['influenciadores'] if inf.get('influenciador_id') in influenciadores_base
+    }
+    
     col1, col2 = st.columns(2)
     
     with col1:
-        if campanha['influenciadores']:
-            influs_opcoes = ["Todos"] + [inf['nome'] for inf in campanha['influenciadores']]
+        if nomes_influs:
+            influs_opcoes = ["Todos"] + list(nomes_influs.values())
             filtro_influ = st.selectbox("Influenciador", influs_opcoes)
         else:
             filtro_influ = "Todos"
@@ -379,44 +385,34 @@ def render_tab_graficos_aon(campanha, filtro_data_ini, filtro_data_fim):
     st.markdown("---")
     
     # Coletar dados temporais
-    if not campanha['influenciadores'] or not any(inf['posts'] for inf in campanha['influenciadores']):
+    if not campanha['influenciadores'] or not any(inf.get('posts') for inf in campanha['influenciadores']):
         st.info("📊 Adicione posts com datas para visualizar evolução temporal")
         return
     
-    dados_tempo = []
+    # Somas diarias por influenciador e formato (tabela de metricas diarias)
+    influenciadores = None
+    if filtro_influ != "Todos":
+        influenciadores = [inf_id for inf_id, nome in nomes_influs.items() if nome == filtro_influ]
     
-    for inf in campanha['influenciadores']:
-        if filtro_influ != "Todos" and inf['nome'] != filtro_influ:
-            continue
-        
-        for post in inf['posts']:
-            try:
-                data_post = datetime.strptime(post['data_publicacao'], '%d/%m/%Y')
-                
-                # Filtrar por período
-                if filtro_data_ini <= data_post.date() <= filtro_data_fim:
-                    metrica_map = {
-                        'Views': post['metricas']['views'],
-                        'Alcance': post['metricas'].get('alcance', 0),
-                        'Interações': post['metricas']['interacoes'],
-                        'Impressões': post['metricas'].get('impressoes', 0)
-                    }
-                    
-                    dados_tempo.append({
-                        'Data': data_post,
-                        'Valor': metrica_map[metrica_temporal],
-                        'Influenciador': inf['nome'],
-                        'Formato': post['formato']
-                    })
-            except:
-                pass
+    dados_tempo = data_manager.get_serie_temporal(
+        [campanha['id']], filtro_data_ini, filtro_data_fim, 'dia',
+        influenciadores=influenciadores, detalhar=('influenciador', 'formato')
+    )
     
     if not dados_tempo:
         st.warning("⚠️ Nenhum post no período selecionado")
         return
     
+    metrica_map = {
+        'Views': 'views',
+        'Alcance': 'alcance',
+        'Interações': 'interacoes',
+        'Impressões': 'impressoes'
+    }
     df_tempo = pd.DataFrame(dados_tempo)
-    df_tempo = df_tempo.sort_values('Data')
+    df_tempo = df_tempo.rename(columns={'nome': 'Influenciador', 'formato': 'Formato'})
+    df_tempo['Data'] = pd.to_datetime(df_tempo['periodo'], format='%Y-%m-%d')
+    df_tempo['Valor'] = df_tempo[metrica_map[metrica_temporal]]
     
     # Gráfico combinado barra + linha
     st.markdown(f"### 📈 Evolução de {metrica_temporal} ao Longo do Tempo")
@@ -508,15 +504,18 @@ def render_tab_graficos_aon(campanha, filtro_data_ini, filtro_data_fim):
     st.markdown("---")
     st.subheader("📊 Estatísticas do Período")
     
+    total_posts = int(df_tempo['posts'].sum())
+    total_valor = df_tempo['Valor'].sum()
+    
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total de Posts", len(df_tempo))
+        st.metric("Total de Posts", total_posts)
     with col2:
-        st.metric(f"Total {metrica_temporal}", funcoes_auxiliares.formatar_numero(df_tempo['Valor'].sum()))
+        st.metric(f"Total {metrica_temporal}", funcoes_auxiliares.formatar_numero(total_valor))
     with col3:
-        st.metric(f"Média por Post", funcoes_auxiliares.formatar_numero(int(df_tempo['Valor'].mean())))
+        st.metric(f"Média por Post", funcoes_auxiliares.formatar_numero(int(total_valor / total_posts) if total_posts else 0))
     with col4:
-        st.metric(f"Máximo", funcoes_auxiliares.formatar_numero(df_tempo['Valor'].max()))
+        st.metric(f"Máximo Diário", funcoes_auxiliares.formatar_numero(df_tempo_agg['Valor'].max()))
 
 
 def render_tab_top_conteudo(campanha):
@@ -564,7 +563,7 @@ def render_tab_top_conteudo(campanha):
             
             todos_posts.append({
                 'influenciador': inf['nome'],
-                'foto_inf': inf.get('foto', ''),
+                'foto_inf': data_manager.imagem_para_exibir(inf.get('foto', '')),
                 'classificacao': inf['classificacao'],
                 'formato': post['formato'],
                 'plataforma': post['plataforma'],
@@ -612,7 +611,7 @@ def render_tab_top_conteudo(campanha):
                 # Foto do post ou influenciador
                 if post['imagens']:
                     try:
-                        img_bytes = base64.b64decode(post['imagens'][0])
+                        img_bytes = data_manager.bytes_imagem(post['imagens'][0])
                         st.image(img_bytes, width=80)
                     except:
                         if post['foto_inf']:
@@ -815,7 +814,7 @@ def render_tab_influenciadores(campanha):
             
             with col1:
                 if inf.get('foto'):
-                    st.image(inf['foto'], width=80)
+                    st.image(data_manager.imagem_para_exibir(inf['foto']), width=80)
             
             with col2:
                 st.write(f"**{inf['usuario']}**")
@@ -859,7 +858,7 @@ def render_tab_influenciadores(campanha):
                     with col4:
                         if post['imagens']:
                             try:
-                                img_bytes = base64.b64decode(post['imagens'][0])
+                                img_bytes = data_manager.bytes_imagem(post['imagens'][0], 'p')
                                 st.image(img_bytes, width=50)
                             except:
                                 pass
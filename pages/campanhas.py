@@ -158,7 +158,7 @@ def render():
         opcoes_cli = ["Todos"] + [c['nome'] for c in clientes]
         filtro_cli = st.selectbox("Filtrar por Cliente", opcoes_cli)
     
-    campanhas = data_manager.get_campanhas()
+    campanhas = data_manager.get_campanhas_resumo()
     
     if filtro_cli != "Todos":
         cliente_obj = next((c for c in clientes if c['nome'] == filtro_cli), None)
@@ -167,8 +167,9 @@ def render():
     
     # Lista
     if campanhas:
+        metricas_por_campanha = data_manager.get_metricas_campanhas([c['id'] for c in campanhas])
         for camp in campanhas:
-            metricas = data_manager.calcular_metricas_campanha(camp)
+            metricas = metricas_por_campanha.get(camp['id'], {})
             aon = "[AON]" if camp.get('is_aon') else ""
             
             col1, col2, col3, col4, col5, col6, col7 = st.columns([2.5, 0.8, 0.8, 1, 1.2, 1.2, 0.8])
@@ -177,11 +178,11 @@ def render():
                 st.write(f"**{camp['nome']}** {aon}")
                 st.caption(f"{camp.get('cliente_nome', '')} | {funcoes_auxiliares.formatar_data_br(camp['data_inicio'])}")
             with col2:
-                st.metric("Influs", metricas['total_influenciadores'])
+                st.metric("Influs", metricas.get('total_influenciadores', 0))
             with col3:
-                st.metric("Posts", metricas['total_posts'])
+                st.metric("Posts", metricas.get('total_posts', 0))
             with col4:
-                st.metric("Views", funcoes_auxiliares.formatar_numero(metricas['total_views']))
+                st.metric("Views", funcoes_auxiliares.formatar_numero(metricas.get('total_views', 0)))
             with col5:
                 if st.button("Central da Campanha", key=f"ctrl_{camp['id']}"):
                     st.session_state.campanha_atual_id = camp['id']
@@ -9,7 +9,8 @@ import base64
 from utils import data_manager, funcoes_auxiliares, api_client
 from utils.ui_components import (
     open_modal, close_modal, is_modal_open, 
-    render_modal_trigger, render_empty_state, render_badge
+    render_modal_trigger, render_empty_state, render_badge,
+    cursor_paginacao, render_paginacao
 )
 
 def render():
@@ -203,7 +204,7 @@ def render_influenciadores_posts(campanha):
             with col1:
                 if inf.get('foto'):
                     try:
-                        st.image(inf['foto'], width=80)
+                        st.image(data_manager.imagem_para_exibir(inf['foto']), width=80)
                     except:
                         st.markdown("### ")
                 else:
@@ -329,8 +330,8 @@ def render_influenciadores_posts(campanha):
                         with col5:
                             if post.get('imagens') and len(post['imagens']) > 0:
                                 try:
-                                    img = post['imagens'][0]
-                                    if img.startswith('http'):
+                                    img = data_manager.imagem_para_exibir(post['imagens'][0], 'p')
+                                    if img.startswith(('http', 'data:')):
                                         st.image(img, width=50)
                                 except:
                                     pass
@@ -970,80 +971,71 @@ def render_modal_add_influenciador(campanha):
     modo = st.radio("Modo:", ["Selecionar da base", "Cadastrar novo"], horizontal=True)
     
     if modo == "Selecionar da base":
-        # Influenciadores ja na campanha
-        inf_na_campanha = [inf['id'] for inf in data_manager.get_influenciadores_campanha(campanha['id'])]
-        
-        # Buscar da base
-        todos_inf = data_manager.get_influenciadores()
-        disponiveis = [inf for inf in todos_inf if inf['id'] not in inf_na_campanha]
-        
-        if disponiveis:
-            # Filtros
-            st.markdown("**Filtrar influenciadores:**")
-            col_f1, col_f2, col_f3 = st.columns(3)
-            
-            with col_f1:
-                # Classificacoes disponiveis
-                classif_disponiveis = sorted(list(set([inf.get('classificacao', 'N/A') for inf in disponiveis])))
-                filtro_classif = st.multiselect(
-                    "Classificacao:",
-                    classif_disponiveis,
-                    placeholder="Todas"
-                )
-            
-            with col_f2:
-                # Redes disponiveis
-                redes_disponiveis = sorted(list(set([inf.get('network', 'instagram') for inf in disponiveis])))
-                filtro_rede = st.selectbox("Rede:", ["Todas"] + redes_disponiveis)
-            
-            with col_f3:
-                filtro_busca = st.text_input("Buscar:", placeholder="Nome ou usuario...")
-            
-            # Aplicar filtros
-            disponiveis_filtrados = disponiveis.copy()
-            
-            if filtro_classif:
-                disponiveis_filtrados = [inf for inf in disponiveis_filtrados if inf.get('classificacao') in filtro_classif]
-            
-            if filtro_rede != "Todas":
-                disponiveis_filtrados = [inf for inf in disponiveis_filtrados if inf.get('network') == filtro_rede]
+        # Influenciadores ja na campanha (conjunto de ids, excluidos na busca)
+        inf_na_campanha = {inf.get('influenciador_id') for inf in campanha.get('influenciadores', [])}
+        
+        # Filtros
+        st.markdown("**Filtrar influenciadores:**")
+        col_f1, col_f2, col_f3 = st.columns(3)
+        
+        with col_f1:
+            filtro_classif = st.multiselect(
+                "Classificacao:",
+                data_manager.get_classificacoes_influenciadores(),
+                placeholder="Todas"
+            )
+        
+        with col_f2:
+            filtro_rede = st.selectbox("Rede:", ["Todas"] + data_manager.get_redes_influenciadores())
+        
+        with col_f3:
+            filtro_busca = st.text_input("Buscar:", placeholder="Nome ou usuario...")
+        
+        # Busca indexada no banco: so os melhores resultados voltam
+        LIMITE_BUSCA = 50
+        disponiveis_filtrados = data_manager.buscar_influenciadores(
+            filtro_busca,
+            excluir=inf_na_campanha,
+            network=filtro_rede if filtro_rede != "Todas" else None,
+            classificacoes=filtro_classif,
+            limite=LIMITE_BUSCA
+        )
+        
+        if len(disponiveis_filtrados) == LIMITE_BUSCA:
+            st.caption(f"Mostrando os {LIMITE_BUSCA} melhores resultados - refine a busca para ver outros")
+        else:
+            st.caption(f"{len(disponiveis_filtrados)} influenciadores disponiveis")
+        
+        if disponiveis_filtrados:
+            # Criar opcoes para multiselect
+            opcoes = {f"{inf['nome']} (@{inf['usuario']}) - {inf.get('classificacao', 'N/A')} - {funcoes_auxiliares.formatar_numero(inf.get('seguidores', 0))} seg": inf['id'] for inf in disponiveis_filtrados}
             
-            if filtro_busca:
-                busca = filtro_busca.lower()
-                disponiveis_filtrados = [inf for inf in disponiveis_filtrados if busca in inf['nome'].lower() or busca in inf['usuario'].lower()]
+            selecionados = st.multiselect(
+                "Selecione os influenciadores:",
+                list(opcoes.keys()),
+                placeholder="Escolha um ou mais influenciadores..."
+            )
             
-            st.caption(f"{len(disponiveis_filtrados)} de {len(disponiveis)} influenciadores disponiveis")
+            col1, col2 = st.columns(2)
             
-            if disponiveis_filtrados:
-                # Criar opcoes para multiselect
-                opcoes = {f"{inf['nome']} (@{inf['usuario']}) - {inf.get('classificacao', 'N/A')} - {funcoes_auxiliares.formatar_numero(inf.get('seguidores', 0))} seg": inf['id'] for inf in disponiveis_filtrados}
-                
-                selecionados = st.multiselect(
-                    "Selecione os influenciadores:",
-                    list(opcoes.keys()),
-                    placeholder="Escolha um ou mais influenciadores..."
-                )
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    if selecionados:
-                        if st.button(f"Adicionar {len(selecionados)} influenciador(es)", type="primary", use_container_width=True):
-                            for sel in selecionados:
-                                inf_id = opcoes[sel]
-                                data_manager.adicionar_influenciador_campanha(campanha['id'], inf_id)
-                            st.session_state.show_add_inf_to_campaign = False
-                            st.success(f"{len(selecionados)} influenciador(es) adicionado(s)!")
-                            st.rerun()
-                
-                with col2:
-                    if st.button("Cancelar", use_container_width=True):
+            with col1:
+                if selecionados:
+                    if st.button(f"Adicionar {len(selecionados)} influenciador(es)", type="primary", use_container_width=True):
+                        for sel in selecionados:
+                            inf_id = opcoes[sel]
+                            data_manager.adicionar_influenciador_campanha(campanha['id'], inf_id)
                         st.session_state.show_add_inf_to_campaign = False
+                        st.success(f"{len(selecionados)} influenciador(es) adicionado(s)!")
                         st.rerun()
-            else:
-                st.info("Nenhum influenciador encontrado com os filtros selecionados.")
-                if st.button("Limpar Filtros"):
+            
+            with col2:
+                if st.button("Cancelar", use_container_width=True):
+                    st.session_state.show_add_inf_to_campaign = False
                     st.rerun()
+        elif filtro_busca or filtro_classif or filtro_rede != "Todas":
+            st.info("Nenhum influenciador encontrado com os filtros selecionados.")
+            if st.button("Limpar Filtros"):
+                st.rerun()
         else:
             st.info("Todos os influenciadores ja estao na campanha ou nao ha influenciadores cadastrados.")
             if st.button("Fechar"):
@@ -1079,7 +1071,7 @@ def render_modal_add_influenciador(campanha):
             st.caption("Se este influenciador tem contas em outras redes, vincule para somar métricas")
             
             # Buscar influenciadores existentes para vincular
-            todos_inf_vinculo = data_manager.get_influenciadores()
+            todos_inf_vinculo = data_manager.get_influenciadores_resumo()
             opcoes_vinculo = ["Nenhum"] + [f"{inf['nome']} (@{inf['usuario']}) - {inf.get('network', 'instagram')}" for inf in todos_inf_vinculo]
             vinculo_map = {opcoes_vinculo[0]: None}
             for i, inf in enumerate(todos_inf_vinculo):
@@ -1546,8 +1538,9 @@ def render_dados_personalizados(campanha):
     if 'dados_custom_temp' not in st.session_state:
         st.session_state.dados_custom_temp = {}
     
+    infs_base = data_manager.get_influenciadores_das_campanhas([campanha])
     for idx, inf_camp in enumerate(influenciadores):
-        inf = data_manager.get_influenciador(inf_camp.get('influenciador_id'))
+        inf = infs_base.get(inf_camp.get('influenciador_id'))
         if not inf:
             continue
         
@@ -1611,7 +1604,7 @@ def render_dados_personalizados(campanha):
     
     preview_data = []
     for inf_camp in influenciadores:
-        inf = data_manager.get_influenciador(inf_camp.get('influenciador_id'))
+        inf = infs_base.get(inf_camp.get('influenciador_id'))
         if inf:
             preview_data.append({
                 'Nome': inf.get('nome', ''),
@@ -2042,15 +2035,12 @@ def preparar_dados_para_ia(campanha: dict, filtro_periodo: dict = None) -> dict:
     dados_influenciadores = []
     dados_posts = []
     
-    # Parse das datas do filtro
+    # Datas do filtro em ISO, comparadas com a data_iso gravada em cada post
     filtro_inicio = None
     filtro_fim = None
     if filtro_periodo:
-        try:
-            filtro_inicio = datetime.strptime(filtro_periodo.get('data_inicio', ''), '%d/%m/%Y')
-            filtro_fim = datetime.strptime(filtro_periodo.get('data_fim', ''), '%d/%m/%Y')
-        except:
-            pass
+        filtro_inicio = data_manager.normalizar_data_post(filtro_periodo.get('data_inicio', ''))
+        filtro_fim = data_manager.normalizar_data_post(filtro_periodo.get('data_fim', ''))
     
     for inf in influenciadores:
         posts = inf.get('posts', [])
@@ -2061,19 +2051,9 @@ def preparar_dados_para_ia(campanha: dict, filtro_periodo: dict = None) -> dict:
         for post in posts:
             # Aplicar filtro de periodo se definido
             if filtro_inicio and filtro_fim:
-                data_post_str = post.get('data_publicacao', '')
-                try:
-                    if '/' in data_post_str:
-                        data_post = datetime.strptime(data_post_str, '%d/%m/%Y')
-                    elif '-' in data_post_str:
-                        data_post = datetime.strptime(data_post_str[:10], '%Y-%m-%d')
-                    else:
-                        data_post = None
-                    
-                    if data_post and (data_post < filtro_inicio or data_post > filtro_fim):
-                        continue  # Pular post fora do periodo
-                except:
-                    pass  # Se nao conseguir parsear, inclui o post
+                data_post = post.get('data_iso') or data_manager.normalizar_data_post(post.get('data_publicacao', ''))
+                if data_post and not (filtro_inicio <= data_post <= filtro_fim):
+                    continue  # Pular post fora do periodo (sem data valida, inclui)
             
             total_posts += 1
             impressoes = post.get('impressoes', 0) or 0
@@ -2219,21 +2199,14 @@ def render_comentarios(campanha):
         st.info("Nenhum post encontrado na campanha.")
         return
     
-    # Comentarios salvos no banco (por post)
-    comentarios_salvos = data_manager.get_comentarios_campanha(campanha_id)
-    
-    # Agrupar comentarios salvos por post_url
-    coments_por_post = {}
-    for c in comentarios_salvos:
-        post_url = c.get('post_url', '')
-        if post_url not in coments_por_post:
-            coments_por_post[post_url] = []
-        coments_por_post[post_url].append(c)
+    # Contagens dos comentarios salvos (agregadas no banco, por post/categoria/sentimento)
+    stats = data_manager.get_estatisticas_comentarios(campanha_id)
+    coments_por_post = stats['por_post']
     
     # Resumo geral
-    total_coments = len(comentarios_salvos)
-    total_classificados = len([c for c in comentarios_salvos if c.get('categoria') and c.get('categoria') not in ('Nao Classificado', 'Pendente')])
-    total_pendentes = len([c for c in comentarios_salvos if c.get('categoria') in ('Pendente', 'Nao Classificado', '', None)])
+    total_coments = stats['total_comentarios']
+    total_pendentes = stats['pendentes']
+    total_classificados = total_coments - total_pendentes
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -2251,7 +2224,7 @@ def render_comentarios(campanha):
     for i, post in enumerate(posts_campanha):
         link = post['link']
         nome = post['influenciador']
-        qtd_salvos = len(coments_por_post.get(link, []))
+        qtd_salvos = coments_por_post.get(link, {}).get('total', 0)
         
         # Link curto para exibicao
         link_curto = link[:55] + '...' if len(link) > 55 else link
@@ -2270,8 +2243,7 @@ def render_comentarios(campanha):
         
         with col_status:
             if qtd_salvos > 0:
-                coments_post = coments_por_post.get(link, [])
-                pendentes_post = len([c for c in coments_post if c.get('categoria') in ('Pendente', 'Nao Classificado', '', None)])
+                pendentes_post = coments_por_post[link]['pendentes']
                 if pendentes_post > 0:
                     st.markdown(f"<span style='font-size:11px;color:#ea580c;font-weight:500;'>{qtd_salvos} ({pendentes_post} pendentes)</span>", unsafe_allow_html=True)
                 else:
@@ -2319,28 +2291,35 @@ def render_comentarios(campanha):
                 st.rerun()
         
         with col_download:
-            # Preparar CSV para download
-            df_download = pd.DataFrame([
-                {
-                    'Usuario': c.get('usuario', ''),
-                    'Texto': c.get('texto', ''),
-                    'Categoria': c.get('categoria', '-'),
-                    'Sentimento': c.get('sentimento', '-'),
-                    'Likes': c.get('likes', 0),
-                    'Data': c.get('data', ''),
-                    'Influenciador': c.get('influenciador', ''),
-                    'Post URL': c.get('post_url', '')
-                }
-                for c in comentarios_salvos
-            ])
-            csv_coments = df_download.to_csv(index=False).encode('utf-8-sig')
-            st.download_button(
-                "Baixar CSV",
-                data=csv_coments,
-                file_name=f"comentarios_{campanha['nome']}.csv",
-                mime="text/csv",
-                use_container_width=True
-            )
+            # Textos dos comentarios so sao carregados quando o CSV e pedido
+            if not st.session_state.get(f'csv_coments_{campanha_id}'):
+                if st.button("Gerar CSV", key="btn_gerar_csv_coments", use_container_width=True):
+                    st.session_state[f'csv_coments_{campanha_id}'] = True
+                    st.rerun()
+            else:
+                comentarios_salvos = data_manager.get_comentarios_campanha(campanha_id)
+                df_download = pd.DataFrame([
+                    {
+                        'Usuario': c.get('usuario', ''),
+                        'Texto': c.get('texto', ''),
+                        'Categoria': c.get('categoria', '-'),
+                        'Sentimento': c.get('sentimento', '-'),
+                        'Likes': c.get('likes', 0),
+                        'Data': c.get('data', ''),
+                        'Influenciador': c.get('influenciador', ''),
+                        'Post URL': c.get('post_url', '')
+                    }
+                    for c in comentarios_salvos
+                ])
+                csv_coments = df_download.to_csv(index=False).encode('utf-8-sig')
+                if st.download_button(
+                    "Baixar CSV",
+                    data=csv_coments,
+                    file_name=f"comentarios_{campanha['nome']}.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                ):
+                    st.session_state[f'csv_coments_{campanha_id}'] = False
         
         with col_excluir:
             if st.button("Excluir todos", key="btn_excluir_coments", use_container_width=True):
@@ -2352,11 +2331,9 @@ def render_comentarios(campanha):
         
         # Modo editar comentarios
         if st.session_state.get('modo_editar_coments'):
-            _render_editar_comentarios(campanha_id, categorias, comentarios_salvos, influenciadores)
+            _render_editar_comentarios(campanha_id, categorias, influenciadores)
         else:
             # Estatisticas por categoria
-            stats = data_manager.get_estatisticas_comentarios(campanha_id)
-            
             if stats.get('por_categoria'):
                 for cat, dados in stats['por_categoria'].items():
                     col1, col2 = st.columns([3, 1])
@@ -2366,10 +2343,7 @@ def render_comentarios(campanha):
                         st.caption(f"{cat}: {dados['quantidade']} ({dados['percentual']}%)")
             
             # Estatisticas por sentimento
-            stats_sent = {}
-            for c in comentarios_salvos:
-                sent = c.get('sentimento', 'Nao classificado') or 'Nao classificado'
-                stats_sent[sent] = stats_sent.get(sent, 0) + 1
+            stats_sent = stats['sentimentos']
             
             if stats_sent:
                 st.markdown("**Por Sentimento:**")
@@ -2381,8 +2355,8 @@ def render_comentarios(campanha):
                         st.markdown(f"<span style='color:{cor};font-weight:500;'>{sent}: {qtd}</span>", unsafe_allow_html=True)
 
 
-def _render_editar_comentarios(campanha_id, categorias, comentarios_salvos, influenciadores):
-    """Interface de edicao de comentarios com paginacao e filtros"""
+def _render_editar_comentarios(campanha_id, categorias, influenciadores):
+    """Interface de edicao de comentarios com paginacao e filtros (aplicados no banco)"""
     import pandas as pd
     
     st.markdown("---")
@@ -2398,8 +2372,13 @@ def _render_editar_comentarios(campanha_id, categorias, comentarios_salvos, infl
     
     with col_f1:
         # Filtro por influenciador
-        nomes_influs = ['Todos'] + sorted(set(c.get('influenciador', '') for c in comentarios_salvos if c.get('influenciador')))
-        filtro_influ = st.selectbox("Influenciador:", nomes_influs, key="filtro_influ_coments")
+        nomes_influs = {inf['id']: inf.get('nome', '') for inf in influenciadores}
+        ids_influs = [None] + sorted(nomes_influs, key=lambda inf_id: nomes_influs[inf_id].lower())
+        filtro_influ = st.selectbox(
+            "Influenciador:", ids_influs,
+            format_func=lambda inf_id: 'Todos' if inf_id is None else nomes_influs[inf_id],
+            key="filtro_influ_coments"
+        )
     
     with col_f2:
         # Filtro por usuario
@@ -2410,7 +2389,7 @@ def _render_editar_comentarios(campanha_id, categorias, comentarios_salvos, infl
         filtro_texto = st.text_input("Palavra-chave:", placeholder="Pesquisar no texto", key="filtro_texto_coments")
     
     # Filtro por sentimento e categoria
-    col_f4, col_f5 = st.columns(2)
+    col_f4, col_f5, col_f6 = st.columns([2, 2, 1])
     
     with col_f4:
         sentimentos = ['Todos', 'Positivo', 'Neutro', 'Negativo', 'Nao classificado']
@@ -2420,59 +2399,34 @@ def _render_editar_comentarios(campanha_id, categorias, comentarios_salvos, infl
         cats_disponiveis = ['Todas'] + [c.get('nome', '') for c in categorias] + ['Pendente', 'Nao Classificado']
         filtro_categoria = st.selectbox("Categoria:", cats_disponiveis, key="filtro_cat_coments")
     
-    # Aplicar filtros
-    comentarios_filtrados = comentarios_salvos.copy()
-    
-    if filtro_influ != 'Todos':
-        comentarios_filtrados = [c for c in comentarios_filtrados if c.get('influenciador') == filtro_influ]
-    
-    if filtro_usuario:
-        filtro_usuario_lower = filtro_usuario.lower().replace('@', '')
-        comentarios_filtrados = [c for c in comentarios_filtrados if filtro_usuario_lower in c.get('usuario', '').lower()]
+    with col_f6:
+        por_pagina = st.selectbox("Por pagina:", [50, 100, 200, 500], index=1, key="por_pagina_coments")
     
+    # Filtros aplicados no banco, pagina por pagina
+    filtros = {
+        'influenciador_id': filtro_influ,
+        'usuario': filtro_usuario,
+        'texto': filtro_texto,
+        'sentimento': filtro_sentimento if filtro_sentimento != 'Todos' else None,
+        'categoria': filtro_categoria if filtro_categoria != 'Todas' else None,
+    }
+    chave_paginacao = f'coments_{campanha_id}'
+    cursor = cursor_paginacao(chave_paginacao, (filtros, por_pagina))
     if filtro_texto:
-        filtro_texto_lower = filtro_texto.lower()
-        comentarios_filtrados = [c for c in comentarios_filtrados if filtro_texto_lower in c.get('texto', '').lower()]
-    
-    if filtro_sentimento != 'Todos':
-        if filtro_sentimento == 'Nao classificado':
-            comentarios_filtrados = [c for c in comentarios_filtrados if not c.get('sentimento') or c.get('sentimento') == 'Nao classificado']
-        else:
-            comentarios_filtrados = [c for c in comentarios_filtrados if c.get('sentimento') == filtro_sentimento]
-    
-    if filtro_categoria != 'Todas':
-        comentarios_filtrados = [c for c in comentarios_filtrados if filtro_categoria in (c.get('categoria', '') or '')]
+        # Busca pelo indice de texto completo, ordenada por relevancia
+        pagina = data_manager.buscar_comentarios(campanha_id, filtro_texto, filtros, por_pagina, cursor)
+    else:
+        pagina = data_manager.get_comentarios_pagina(campanha_id, filtros, por_pagina, cursor)
+    comentarios_pagina = pagina['itens']
     
-    total_filtrados = len(comentarios_filtrados)
+    total_filtrados = pagina['total']
     st.caption(f"Mostrando {total_filtrados} comentarios")
     
     if total_filtrados == 0:
         st.info("Nenhum comentario encontrado com os filtros selecionados.")
         return
     
-    # Paginacao
-    POR_PAGINA = 100
-    total_paginas = max(1, (total_filtrados + POR_PAGINA - 1) // POR_PAGINA)
-    
-    pagina_atual = st.session_state.get('pagina_coments', 1)
-    if pagina_atual > total_paginas:
-        pagina_atual = 1
-    
-    col_pag1, col_pag2, col_pag3 = st.columns([1, 2, 1])
-    with col_pag2:
-        pagina_atual = st.number_input(
-            f"Pagina (1 a {total_paginas}):",
-            min_value=1,
-            max_value=total_paginas,
-            value=pagina_atual,
-            key="input_pagina_coments"
-        )
-        st.session_state['pagina_coments'] = pagina_atual
-    
-    # Comentarios da pagina atual
-    inicio = (pagina_atual - 1) * POR_PAGINA
-    fim = inicio + POR_PAGINA
-    comentarios_pagina = comentarios_filtrados[inicio:fim]
+    render_paginacao(chave_paginacao, pagina['cursor'], total_filtrados, por_pagina)
     
     # Opcoes para selects
     categorias_opcoes = [''] + [c.get('nome', '') for c in categorias] + ['Nao Classificado']
@@ -2553,7 +2507,8 @@ def _render_editar_comentarios(campanha_id, categorias, comentarios_salvos, infl
                         coment.get('usuario', ''),
                         coment.get('texto', ''),
                         nova_cat,
-                        novo_sent
+                        novo_sent,
+                        comentario_id=coment.get('id')
                     )
                 
                 st.success(f"{len(alteracoes)} comentarios atualizados!")
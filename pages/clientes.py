@@ -66,9 +66,14 @@ def render():
     clientes = data_manager.get_clientes()
     
     if clientes:
+        metricas_clientes = data_manager.calcular_metricas_todos_clientes()
+        campanhas_por_cliente = {}
+        for camp in data_manager.get_campanhas_resumo():
+            campanhas_por_cliente.setdefault(camp['cliente_id'], []).append(camp)
+        
         for cli in clientes:
-            metricas = data_manager.calcular_metricas_por_cliente(cli['id'])
-            campanhas_cliente = data_manager.get_campanhas_por_cliente(cli['id'])
+            metricas = metricas_clientes[cli['id']]
+            campanhas_cliente = campanhas_por_cliente.get(cli['id'], [])
             
             with st.expander(f"**{cli['nome']}** - {metricas['total_campanhas']} campanhas", expanded=False):
                 col1, col2, col3, col4 = st.columns(4)
@@ -275,22 +275,20 @@ def render_sistema():
     st.markdown("---")
     st.subheader("Estatisticas do Sistema")
     
+    # Contagens feitas no banco (sem carregar campanhas e posts)
+    estatisticas = data_manager.get_estatisticas_dashboard()
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Clientes", len(data_manager.get_clientes()))
-        st.metric("Campanhas", len(data_manager.get_campanhas()))
+        st.metric("Clientes", estatisticas['total_clientes'])
+        st.metric("Campanhas", estatisticas['total_campanhas'])
     
     with col2:
-        st.metric("Influenciadores", len(data_manager.get_influenciadores()))
-        total_posts = 0
-        for c in data_manager.get_campanhas():
-            for inf in c.get('influenciadores', []):
-                total_posts += len(inf.get('posts', []))
-        st.metric("Posts", total_posts)
+        st.metric("Influenciadores", estatisticas['total_influenciadores'])
+        st.metric("Posts", estatisticas['total_posts'])
     
     with col3:
-        aon = len([c for c in data_manager.get_campanhas() if c.get('is_aon')])
+        aon = len([c for c in data_manager.get_campanhas_resumo() if c.get('is_aon')])
         st.metric("Campanhas AON", aon)
     
     st.markdown("---")
@@ -302,8 +300,23 @@ def render_sistema():
         if st.button("Exportar Backup (JSON)", use_container_width=True):
             backup = {
                 'clientes': data_manager.get_clientes(),
-                'influenciadores': data_manager.get_influenciadores(),
-                'campanhas': data_manager.get_campanhas(),
+                # Fotos vao embutidas no backup (no banco ficam so as referencias)
+                'influenciadores': [
+                    {**inf, 'foto': data_manager.imagem_para_exibir(inf.get('foto'), 'o')}
+                    for inf in data_manager.get_influenciadores()
+                ],
+                # Posts vao com as imagens embutidas (restaurados por criar_campanha)
+                'campanhas': [
+                    {**camp, 'influenciadores': [
+                        {**inf, 'posts': [
+                            {**post, 'imagens': [data_manager.imagem_para_exibir(img, 'o') for img in post['imagens']]}
+                            if post.get('imagens') else post
+                            for post in inf.get('posts', [])
+                        ]}
+                        for inf in camp.get('influenciadores', [])
+                    ]}
+                    for camp in data_manager.get_campanhas_exportacao()
+                ],
                 'faixas_classificacao': data_manager.get_faixas_classificacao(),
                 'export_date': datetime.now().isoformat(),
                 'version': '5.1'
@@ -355,13 +368,7 @@ def render_sistema():
         col1, col2 = st.columns(2)
         with col1:
             if st.button("Sim, limpar tudo", type="primary"):
-                conn = data_manager.get_connection()
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM campanhas")
-                cursor.execute("DELETE FROM influenciadores")
-                cursor.execute("DELETE FROM clientes")
-                conn.commit()
-                conn.close()
+                data_manager.limpar_dados()
                 
                 st.session_state.confirmar_limpeza = False
                 st.success("Dados limpos!")
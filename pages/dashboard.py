@@ -10,31 +10,30 @@ def render():
     st.markdown('<p class="subtitle">Visao geral do sistema</p>', unsafe_allow_html=True)
     
     # Big Numbers
+    estatisticas = data_manager.get_estatisticas_dashboard()
     col1, col2, col3, col4, col5 = st.columns(5)
     
     with col1:
-        campanhas_ativas = len([c for c in data_manager.get_campanhas() if c['status'] == 'ativa'])
-        st.metric("Campanhas Ativas", campanhas_ativas)
+        st.metric("Campanhas Ativas", estatisticas['campanhas_ativas'])
     with col2:
-        st.metric("Clientes", len(data_manager.get_clientes()))
+        st.metric("Clientes", estatisticas['total_clientes'])
     with col3:
-        st.metric("Influenciadores", len(data_manager.get_influenciadores()))
+        st.metric("Influenciadores", estatisticas['total_influenciadores'])
     with col4:
-        total_posts = sum([sum([len(inf['posts']) for inf in c['influenciadores']]) for c in data_manager.get_campanhas()])
-        st.metric("Posts", total_posts)
+        st.metric("Posts", estatisticas['total_posts'])
     with col5:
-        total_views = sum([sum([sum([p.get('views', 0) for p in inf['posts']]) for inf in c['influenciadores']]) for c in data_manager.get_campanhas()])
-        st.metric("Views Totais", funcoes_auxiliares.formatar_numero(total_views))
+        st.metric("Views Totais", funcoes_auxiliares.formatar_numero(estatisticas['total_views']))
     
     st.markdown("---")
     
     # Ultimas campanhas
     st.subheader("Ultimas Campanhas")
     
-    campanhas = data_manager.get_campanhas()
+    campanhas = data_manager.get_campanhas_resumo()[-5:]
     if campanhas:
-        for camp in campanhas[-5:]:
-            metricas = data_manager.calcular_metricas_campanha(camp)
+        metricas_por_campanha = data_manager.get_metricas_campanhas([c['id'] for c in campanhas])
+        for camp in campanhas:
+            metricas = metricas_por_campanha.get(camp['id'], {})
             aon = "[AON]" if camp.get('is_aon') else ""
             
             col1, col2, col3, col4, col5 = st.columns([3, 1, 1, 1, 1])
@@ -43,11 +42,11 @@ def render():
                 st.write(f"**{camp['nome']}** {aon}")
                 st.caption(camp.get('cliente_nome', ''))
             with col2:
-                st.metric("Posts", metricas['total_posts'])
+                st.metric("Posts", metricas.get('total_posts', 0))
             with col3:
-                st.metric("Views", funcoes_auxiliares.formatar_numero(metricas['total_views']))
+                st.metric("Views", funcoes_auxiliares.formatar_numero(metricas.get('total_views', 0)))
             with col4:
-                st.metric("Taxa Eng.", f"{metricas['engajamento_efetivo']}%")
+                st.metric("Taxa Eng.", f"{metricas.get('engajamento_efetivo', 0)}%")
             with col5:
                 if st.button("Abrir", key=f"dash_{camp['id']}"):
                     st.session_state.campanha_atual_id = camp['id']
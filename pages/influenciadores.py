@@ -5,6 +5,7 @@ Base de influenciadores com API
 
 import streamlit as st
 from utils import data_manager, api_client, funcoes_auxiliares
+from utils.ui_components import cursor_paginacao, render_paginacao
 
 def render():
     st.markdown('<p class="main-header">Influenciadores</p>', unsafe_allow_html=True)
@@ -18,7 +19,7 @@ def render():
             with st.spinner("Atualizando via API..."):
                 atualizados = 0
                 erros = 0
-                for inf in data_manager.get_influenciadores():
+                for inf in data_manager.get_influenciadores_resumo():
                     if inf.get('profile_id'):
                         try:
                             resultado = api_client.atualizar_influenciador_api(inf['profile_id'])
@@ -56,29 +57,31 @@ def render():
     st.markdown("---")
     
     # Filtros
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
     with col1:
-        filtro_rede = st.selectbox("Rede", ["Todas", "instagram", "tiktok", "youtube"])
+        filtro_rede = st.selectbox("Rede", ["Todas"] + data_manager.get_redes_influenciadores())
     with col2:
         filtro_class = st.selectbox("Classificacao", ["Todas", "Nano", "Micro", "Mid", "Macro", "Mega"])
     with col3:
         filtro_busca = st.text_input("Buscar", placeholder="Nome ou usuario...")
+    with col4:
+        por_pagina = st.selectbox("Por pagina", [25, 50, 100, 200], index=1)
     
     st.markdown("---")
     
-    # Lista de influenciadores
-    influenciadores = data_manager.get_influenciadores()
-    
-    # Aplicar filtros
-    if filtro_rede != "Todas":
-        influenciadores = [i for i in influenciadores if i.get('network') == filtro_rede]
-    if filtro_class != "Todas":
-        influenciadores = [i for i in influenciadores if i.get('classificacao') == filtro_class]
-    if filtro_busca:
-        filtro_busca = filtro_busca.lower()
-        influenciadores = [i for i in influenciadores if filtro_busca in i['nome'].lower() or filtro_busca in i['usuario'].lower()]
+    # Lista de influenciadores (filtrada e paginada no banco)
+    filtros = {
+        'network': filtro_rede if filtro_rede != "Todas" else None,
+        'classificacao': filtro_class if filtro_class != "Todas" else None,
+        'busca': filtro_busca.strip(),
+    }
+    cursor = cursor_paginacao('influenciadores', (filtros, por_pagina))
+    pagina = data_manager.get_influenciadores_pagina(filtros, por_pagina, cursor)
+    influenciadores = pagina['itens']
     
     if influenciadores:
+        st.caption(f"{pagina['total']} influenciadores")
+        
         # Cabecalho
         col1, col2, col3, col4, col5, col6, col7, col8 = st.columns([0.6, 2, 1, 1, 1, 1, 1, 0.8])
         with col1:
@@ -104,7 +107,7 @@ def render():
             col1, col2, col3, col4, col5, col6, col7, col8 = st.columns([0.6, 2, 1, 1, 1, 1, 1, 0.8])
             
             with col1:
-                funcoes_auxiliares.exibir_foto_influenciador(inf.get('foto'), inf.get('nome', ''), 40)
+                funcoes_auxiliares.exibir_foto_influenciador(data_manager.imagem_para_exibir(inf.get('foto'), 'p'), inf.get('nome', ''), 40)
             
             with col2:
                 st.write(f"**{inf['nome']}**")
@@ -132,6 +135,8 @@ def render():
                     st.rerun()
             
             st.markdown("---")
+        
+        render_paginacao('influenciadores', pagina['cursor'], pagina['total'], por_pagina)
     else:
         st.info("Nenhum influenciador encontrado")
 
@@ -218,7 +223,7 @@ def render_modal_adicionar():
                         st.caption(f"{funcoes_auxiliares.formatar_numero(dados.get('seguidores', 0))} seguidores | AIR Score: {dados.get('air_score', 0):.2f}")
                     with col3:
                         # Verificar se ja existe
-                        existente = next((i for i in data_manager.get_influenciadores() 
+                        existente = next((i for i in data_manager.get_influenciadores_resumo() 
                                          if i.get('profile_id') == dados.get('profile_id')), None)
                         if existente:
                             st.caption("Ja existe")
@@ -229,7 +234,7 @@ def render_modal_adicionar():
                 if st.button("Adicionar Todos a Base", type="primary", use_container_width=True):
                     adicionados = 0
                     for dados in st.session_state.api_preview_list:
-                        existente = next((i for i in data_manager.get_influenciadores() 
+                        existente = next((i for i in data_manager.get_influenciadores_resumo() 
                                          if i.get('profile_id') == dados.get('profile_id')), None)
                         if not existente:
                             data_manager.criar_influenciador(dados)
@@ -310,7 +315,7 @@ def render_modal_editar():
         if inf.get('network') == 'instagram':
             st.markdown("**Vincular conta TikTok:**")
             # Buscar influs TikTok disponiveis
-            todos_inf = data_manager.get_influenciadores()
+            todos_inf = data_manager.get_influenciadores_resumo()
             tiktok_disponiveis = [i for i in todos_inf if i.get('network') == 'tiktok' and i.get('id') != inf_id]
             
             if tiktok_disponiveis:
@@ -348,7 +353,7 @@ def render_modal_editar():
         
         elif inf.get('network') == 'tiktok':
             st.markdown("**Vincular conta Instagram:**")
-            todos_inf = data_manager.get_influenciadores()
+            todos_inf = data_manager.get_influenciadores_resumo()
             insta_disponiveis = [i for i in todos_inf if i.get('network') == 'instagram' and i.get('id') != inf_id]
             
             if insta_disponiveis:
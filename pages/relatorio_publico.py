@@ -8,6 +8,7 @@ from utils import data_manager, funcoes_auxiliares
 
 # Importar funcoes do relatorio principal
 from pages.relatorios import (
+    ContextoRelatorio,
     render_pag1_big_numbers,
     render_pag3_visao_aon,
     render_pag4_kpis_influenciador,
@@ -86,8 +87,8 @@ def render_publico(token: str):
     # Lista de campanhas (para compatibilidade com funcoes do relatorio)
     campanhas_list = [campanha]
     
-    # Calcular metricas
-    metricas = data_manager.calcular_metricas_multiplas_campanhas(campanhas_list)
+    # Campanha achatada uma unica vez para todas as abas
+    ctx = ContextoRelatorio(campanhas_list)
     cores = funcoes_auxiliares.get_cores_graficos()
     
     # Verificar se tem AON
@@ -119,7 +120,7 @@ def render_publico(token: str):
     # TAB 1: BIG NUMBERS
     with tabs[tab_idx]:
         try:
-            render_pag1_big_numbers(campanhas_list, metricas, cores)
+            render_pag1_big_numbers(ctx, cores)
         except Exception as e:
             st.error(f"Erro ao carregar: {e}")
     tab_idx += 1
@@ -128,7 +129,7 @@ def render_publico(token: str):
     if has_aon:
         with tabs[tab_idx]:
             try:
-                render_pag3_visao_aon(campanhas_list, metricas, cores, cliente)
+                render_pag3_visao_aon(ctx, cores, cliente)
             except Exception as e:
                 st.error(f"Erro ao carregar: {e}")
         tab_idx += 1
@@ -136,7 +137,7 @@ def render_publico(token: str):
     # TAB 3: KPIs por Influenciador
     with tabs[tab_idx]:
         try:
-            render_pag4_kpis_influenciador(campanhas_list, cores)
+            render_pag4_kpis_influenciador(ctx, cores)
         except Exception as e:
             st.error(f"Erro ao carregar: {e}")
     tab_idx += 1
@@ -144,7 +145,7 @@ def render_publico(token: str):
     # TAB 4: Top Performance
     with tabs[tab_idx]:
         try:
-            render_pag5_top_performance(campanhas_list, cores)
+            render_pag5_top_performance(ctx, cores)
         except Exception as e:
             st.error(f"Erro ao carregar: {e}")
     tab_idx += 1
@@ -152,7 +153,7 @@ def render_publico(token: str):
     # TAB 5: Lista Influenciadores
     with tabs[tab_idx]:
         try:
-            render_pag6_lista_influenciadores(campanhas_list, cores)
+            render_pag6_lista_influenciadores(ctx, cores)
         except Exception as e:
             st.error(f"Erro ao carregar: {e}")
     tab_idx += 1
@@ -160,7 +161,7 @@ def render_publico(token: str):
     # TAB 6: Comentarios
     with tabs[tab_idx]:
         try:
-            render_comentarios(campanhas_list, cores)
+            render_comentarios(ctx, cores)
         except Exception as e:
             st.error(f"Erro ao carregar: {e}")
     tab_idx += 1
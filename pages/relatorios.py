@@ -14,8 +14,8 @@ import base64
 import requests
 import json
 import time
-import copy
 from utils import data_manager, funcoes_auxiliares
+from utils.metricas import MotorMetricas
 
 
 def calcular_impressoes_post(post: Dict) -> int:
@@ -29,114 +29,150 @@ def calcular_impressoes_post(post: Dict) -> int:
     return views + impressoes
 
 
-def filtrar_campanhas_por_periodo(campanhas_list: List[Dict], data_inicio: str, data_fim: str) -> List[Dict]:
+def _link_post(post: Dict) -> str:
+    return post.get('link', '') or post.get('link_post', '') or post.get('permalink', '') or post.get('url', '') or ''
+
+
+class ContextoRelatorio:
+    """
+    Dados do relatorio montados uma vez por execucao da pagina.
+
+    As campanhas sao achatadas uma unica vez pelo MotorMetricas; cada agrupamento
+    e calculado na primeira pagina que o pede e reaproveitado pelas demais.
     """
-    Filtra posts das campanhas por periodo
+
+    def __init__(self, campanhas_list: List[Dict], motor: MotorMetricas = None, periodo: tuple = None):
+        """
+        Args:
+            campanhas_list: Campanhas do relatorio
+            motor: Motor ja montado (e filtrado) sobre essas campanhas; senao e criado aqui
+            periodo: (inicio, fim) do filtro de data aplicado ao motor, se houver
+        """
+        self.campanhas = campanhas_list
+        self.motor = motor if motor is not None else MotorMetricas(campanhas_list)
+        self.periodo = periodo
+        self.influenciadores_base = self.motor.influenciadores_base
+        self.metricas = self.motor.totais()
+        self._cache = {}
+
+    def _memo(self, chave, calcular):
+        if chave not in self._cache:
+            self._cache[chave] = calcular()
+        return self._cache[chave]
+
+    def posts_cadastrados(self) -> pd.DataFrame:
+        """Posts de influenciadores cadastrados, com o link do post em 'link'"""
+        def calcular():
+            posts = self.motor.posts[self.motor.posts['cadastrado']]
+            return posts.assign(link=[_link_post(post) for post in posts['post']])
+        return self._memo('posts_cadastrados', calcular)
+
+    def formatos(self) -> List[str]:
+        """Formatos presentes nos posts das campanhas"""
+        return self._memo('formatos', lambda: sorted(self.motor.posts['formato'].unique().tolist()))
+
+    def participantes(self) -> List[Dict]:
+        """Influenciador cadastrado de cada participacao (repete se esta em mais de uma campanha)"""
+        def calcular():
+            participacoes = self.motor.participacoes[self.motor.participacoes['cadastrado']]
+            return [self.influenciadores_base[i] for i in participacoes['influenciador_id']]
+        return self._memo('participantes', calcular)
+
+    def influenciadores(self, formatos: List[str] = None) -> List[Dict]:
+        """KPIs por influenciador (ver MotorMetricas.por_influenciador)"""
+        chave = ('influenciadores', tuple(sorted(formatos)) if formatos else None)
+        return self._memo(chave, lambda: self.motor.por_influenciador(formatos))
+
+    def por_formato(self) -> List[Dict]:
+        return self._memo('por_formato', self.motor.por_formato)
+
+    def por_classificacao(self) -> List[Dict]:
+        return self._memo('por_classificacao', self.motor.por_classificacao)
+
+    def serie_temporal(self, data_ini, data_fim, agrupamento: str = 'mes') -> List[Dict]:
+        """Serie por periodo (data_manager.get_serie_temporal) limitada ao filtro
+        de data e aos influenciadores do relatorio"""
+        if self.periodo:
+            data_ini = max(data_ini, self.periodo[0])
+            data_fim = min(data_fim, self.periodo[1])
+        participacoes = self.motor.participacoes[self.motor.participacoes['cadastrado']]
+        return data_manager.get_serie_temporal(
+            [c['id'] for c in self.campanhas], data_ini, data_fim, agrupamento,
+            influenciadores=participacoes['influenciador_id'].unique().tolist()
+        )
+
+    def links_por_influenciador(self) -> Dict[int, List[Dict]]:
+        """influenciador_id -> posts com link (link, formato, interacoes), na ordem das campanhas"""
+        def calcular():
+            posts = self.motor.posts
+            links = {}
+            for inf_id, post, formato, interacoes in zip(posts['influenciador_id'], posts['post'],
+                                                          posts['formato'], posts['interacoes']):
+                if not inf_id:
+                    continue
+                lista = links.setdefault(inf_id, [])
+                link = _link_post(post)
+                if link:
+                    lista.append({'link': link, 'formato': formato, 'interacoes': interacoes})
+            return links
+        return self._memo('links_por_influenciador', calcular)
+
+    def formato_por_link(self) -> Dict[str, str]:
+        """link do post -> formato (para os comentarios, que guardam so a URL do post)"""
+        def calcular():
+            posts = self.motor.posts
+            formatos = {}
+            for post, formato in zip(posts['post'], posts['formato']):
+                link = _link_post(post)
+                if link:
+                    formatos[link] = formato
+            return formatos
+        return self._memo('formato_por_link', calcular)
+
+
+def filtrar_motor_por_periodo(motor: MotorMetricas, data_inicio: str, data_fim: str) -> MotorMetricas:
+    """
+    Mantem so os posts do periodo (as participacoes e custos continuam)
     
     Args:
-        campanhas_list: Lista de campanhas
+        motor: Motor com as campanhas do relatorio
         data_inicio: Data inicio no formato dd/mm/yyyy
         data_fim: Data fim no formato dd/mm/yyyy
     
     Returns:
-        Lista de campanhas com posts filtrados
+        Motor sobre os posts filtrados (posts sem data valida sao mantidos)
     """
     try:
         dt_inicio = datetime.strptime(data_inicio, '%d/%m/%Y')
         dt_fim = datetime.strptime(data_fim, '%d/%m/%Y')
     except:
-        return campanhas_list
-    
-    campanhas_filtradas = []
-    
-    for camp in campanhas_list:
-        # Fazer copia profunda para nao modificar original
-        camp_filtrada = copy.deepcopy(camp)
-        
-        influenciadores_filtrados = []
-        for inf_camp in camp_filtrada.get('influenciadores', []):
-            posts_filtrados = []
-            
-            for post in inf_camp.get('posts', []):
-                data_post_str = post.get('data_publicacao', '')
-                
-                try:
-                    if '/' in data_post_str:
-                        data_post = datetime.strptime(data_post_str, '%d/%m/%Y')
-                    elif '-' in data_post_str:
-                        data_post = datetime.strptime(data_post_str[:10], '%Y-%m-%d')
-                    else:
-                        # Se nao conseguir parsear, incluir o post
-                        posts_filtrados.append(post)
-                        continue
-                    
-                    if dt_inicio <= data_post <= dt_fim:
-                        posts_filtrados.append(post)
-                except:
-                    # Se der erro no parse, incluir o post
-                    posts_filtrados.append(post)
-            
-            inf_camp['posts'] = posts_filtrados
-            influenciadores_filtrados.append(inf_camp)
-        
-        camp_filtrada['influenciadores'] = influenciadores_filtrados
-        campanhas_filtradas.append(camp_filtrada)
+        return motor
     
-    return campanhas_filtradas
+    datas = motor.posts['data']
+    return motor.filtrar(datas.isna() | datas.between(dt_inicio, dt_fim))
 
 
-def filtrar_campanhas_por_colunas_dinamicas(campanhas_list: List[Dict], filtros: Dict[int, str]) -> List[Dict]:
+def filtrar_motor_por_colunas_dinamicas(motor: MotorMetricas, filtros: Dict[int, str]) -> MotorMetricas:
     """
-    Filtra influenciadores das campanhas por colunas dinamicas
+    Mantem so os influenciadores com os valores escolhidos nas colunas dinamicas
     
     Args:
-        campanhas_list: Lista de campanhas
+        motor: Motor com as campanhas do relatorio
         filtros: Dict mapeando coluna_id -> valor selecionado (ou 'Todos')
     
     Returns:
-        Lista de campanhas com influenciadores filtrados
+        Motor sem as participacoes (e posts) dos demais influenciadores
     """
     # Verificar se ha filtros ativos
     filtros_ativos = {k: v for k, v in filtros.items() if v and v != 'Todos'}
     
     if not filtros_ativos:
-        return campanhas_list
-    
-    campanhas_filtradas = []
+        return motor
     
-    for camp in campanhas_list:
-        camp_filtrada = copy.deepcopy(camp)
-        
-        influenciadores_filtrados = []
-        for inf_camp in camp_filtrada.get('influenciadores', []):
-            inf_id = inf_camp.get('influenciador_id')
-            
-            # Buscar valores das colunas do influenciador
-            valores_inf = data_manager.get_valores_colunas_influenciador(inf_id)
-            
-            # Verificar se passa em todos os filtros ativos
-            passa_filtro = True
-            for col_id, valor_filtro in filtros_ativos.items():
-                valor_inf = valores_inf.get(col_id, '')
-                if valor_inf != valor_filtro:
-                    passa_filtro = False
-                    break
-            
-            if passa_filtro:
-                influenciadores_filtrados.append(inf_camp)
-        
-        camp_filtrada['influenciadores'] = influenciadores_filtrados
-        campanhas_filtradas.append(camp_filtrada)
-    
-    return campanhas_filtradas
+    ids = data_manager.get_ids_influenciadores_por_valores_colunas(filtros_ativos)
+    return motor.filtrar(influenciadores=ids)
 
 
-# ========================================
-# INSIGHTS POR IA - COM PERSISTENCIA
-# ========================================
-
-WEBHOOK_IA_URL = "https://n8n.air.com.vc/webhook/e19fe530-62b6-44af-b6d1-3aeed59cfe0b"
-
 def buscar_insights_ia(pagina: str, dados: dict, campanha_id: int) -> List[dict]:
     """
     Busca insights da IA via webhook
@@ -404,19 +440,29 @@ def render_card_insight(insight: dict):
     """, unsafe_allow_html=True)
 
 
-def preparar_dados_pagina(pagina: str, campanhas_list: list, metricas: dict = None) -> dict:
+def preparar_dados_pagina(pagina: str, ctx: ContextoRelatorio, metricas: dict = None) -> dict:
     """
     Prepara os dados de uma página para enviar à IA
     """
-    dados = {
+    base = ctx._memo('dados_ia', lambda: _montar_dados_ia(ctx))
+    return {
         "pagina": pagina,
-        "campanhas": [],
+        "campanhas": base["campanhas"],
         "metricas_gerais": metricas or {},
+        "influenciadores": base["influenciadores"],
+        "posts": base["posts"]
+    }
+
+
+def _montar_dados_ia(ctx: ContextoRelatorio) -> dict:
+    """Campanhas, influenciadores e posts enviados à IA (comum a todas as páginas)"""
+    dados = {
+        "campanhas": [],
         "influenciadores": [],
         "posts": []
     }
     
-    for camp in campanhas_list:
+    for camp in ctx.campanhas:
         dados["campanhas"].append({
             "id": camp.get('id'),
             "nome": camp.get('nome'),
@@ -428,40 +474,42 @@ def preparar_dados_pagina(pagina: str, campanhas_list: list, metricas: dict = No
             "estimativa_impressoes": camp.get('estimativa_impressoes', 0),
             "investimento_total": camp.get('investimento_total', 0)
         })
-        
-        for inf_camp in camp.get('influenciadores', []):
-            inf = data_manager.get_influenciador(inf_camp.get('influenciador_id'))
-            if inf:
-                inf_dados = {
-                    "nome": inf.get('nome'),
-                    "usuario": inf.get('usuario'),
-                    "classificacao": inf.get('classificacao'),
-                    "seguidores": inf.get('seguidores', 0),
-                    "air_score": inf.get('air_score', 0),
-                    "custo": inf_camp.get('custo', 0),
-                    "posts": []
-                }
-                
-                for post in inf_camp.get('posts', []):
-                    post_dados = {
-                        "formato": post.get('formato'),
-                        "plataforma": post.get('plataforma'),
-                        "data": post.get('data_publicacao'),
-                        "impressoes": post.get('views', 0) + post.get('impressoes', 0),
-                        "alcance": post.get('alcance', 0),
-                        "interacoes": post.get('interacoes', 0),
-                        "curtidas": post.get('curtidas', 0),
-                        "comentarios": post.get('comentarios', 0) if isinstance(post.get('comentarios'), int) else len(post.get('comentarios', [])),
-                        "compartilhamentos": post.get('compartilhamentos', 0),
-                        "saves": post.get('saves', 0)
-                    }
-                    inf_dados["posts"].append(post_dados)
-                    dados["posts"].append(post_dados)
-                
-                dados["influenciadores"].append(inf_dados)
+    
+    posts = ctx.posts_cadastrados()
+    df_posts = pd.DataFrame({
+        "formato": posts['formato'],
+        "plataforma": [post.get('plataforma') for post in posts['post']],
+        "data": posts['data_publicacao'],
+        "impressoes": posts['impressoes_total'],
+        "alcance": posts['alcance'],
+        "interacoes": posts['interacoes'],
+        "curtidas": posts['curtidas'],
+        "comentarios": posts['comentarios'],
+        "compartilhamentos": posts['compartilhamentos'],
+        "saves": posts['saves']
+    })
+    posts_por_participacao = {}
+    for chave, post_dados in zip(zip(posts['campanha_id'], posts['influenciador_id']), df_posts.to_dict('records')):
+        posts_por_participacao.setdefault(chave, []).append(post_dados)
+    
+    participacoes = ctx.motor.participacoes[ctx.motor.participacoes['cadastrado']]
+    for camp_id, inf_id, custo in zip(participacoes['campanha_id'], participacoes['influenciador_id'], participacoes['custo']):
+        inf = ctx.influenciadores_base[inf_id]
+        posts_inf = posts_por_participacao.get((camp_id, inf_id), [])
+        dados["influenciadores"].append({
+            "nome": inf.get('nome'),
+            "usuario": inf.get('usuario'),
+            "classificacao": inf.get('classificacao'),
+            "seguidores": inf.get('seguidores', 0),
+            "air_score": inf.get('air_score', 0),
+            "custo": custo,
+            "posts": posts_inf
+        })
+        dados["posts"].extend(posts_inf)
     
     return dados
 
+
 def render():
     """Renderiza relatorio"""
     
@@ -601,22 +649,26 @@ def render_relatorio(campanhas_list, cliente=None):
     # Guardar filtros no session_state para uso nas funcoes
     st.session_state['filtros_colunas_dinamicas'] = filtros_colunas
     
+    # Campanhas achatadas uma unica vez; os filtros so selecionam linhas do motor
+    motor = MotorMetricas(campanhas_list)
+    
     # Aplicar filtro de data se ativado
-    campanhas_filtradas = campanhas_list
+    periodo = None
     if st.session_state.get('aplicar_filtro_data', False):
+        periodo = (filtro_data_ini, filtro_data_fim)
         data_ini_str = filtro_data_ini.strftime('%d/%m/%Y')
         data_fim_str = filtro_data_fim.strftime('%d/%m/%Y')
-        campanhas_filtradas = filtrar_campanhas_por_periodo(campanhas_list, data_ini_str, data_fim_str)
+        motor = filtrar_motor_por_periodo(motor, data_ini_str, data_fim_str)
     
     # Aplicar filtro de colunas dinamicas se houver
     if filtros_colunas:
-        campanhas_filtradas = filtrar_campanhas_por_colunas_dinamicas(campanhas_filtradas, filtros_colunas)
+        motor = filtrar_motor_por_colunas_dinamicas(motor, filtros_colunas)
     
     # Verificar se tem AON
-    has_aon = any(c.get('is_aon') for c in campanhas_filtradas)
+    has_aon = any(c.get('is_aon') for c in campanhas_list)
     
-    # Calcular metricas (com campanhas filtradas)
-    metricas = data_manager.calcular_metricas_multiplas_campanhas(campanhas_filtradas)
+    # As paginas leem deste contexto
+    ctx = ContextoRelatorio(campanhas_list, motor, periodo)
     cores = funcoes_auxiliares.get_cores_graficos()
     
     # Verificar se campanha tem categorias e se deve mostrar aba
@@ -629,11 +681,7 @@ def render_relatorio(campanhas_list, cliente=None):
         mostrar_aba_categoria = campanha.get('mostrar_aba_categoria', True)
         
         # Verificar se tem influenciadores com categoria
-        for inf_camp in campanha.get('influenciadores', []):
-            inf = data_manager.get_influenciador(inf_camp.get('influenciador_id'))
-            if inf and inf.get('categoria', '').strip():
-                has_categorias = True
-                break
+        has_categorias = any((inf.get('categoria') or '').strip() for inf in ctx.participantes())
     
     # So mostra aba se tiver categorias E configuracao permitir
     show_categoria_tab = has_categorias and mostrar_aba_categoria
@@ -662,40 +710,40 @@ def render_relatorio(campanhas_list, cliente=None):
     
     # TAB 1: BIG NUMBERS
     with tabs[tab_idx]:
-        render_pag1_big_numbers(campanhas_filtradas, metricas, cores)
+        render_pag1_big_numbers(ctx, cores)
     tab_idx += 1
     
     # TAB 2: VISAO AON (se aplicavel)
     if has_aon:
         with tabs[tab_idx]:
-            render_pag3_visao_aon(campanhas_filtradas, metricas, cores, cliente)
+            render_pag3_visao_aon(ctx, cores, cliente)
         tab_idx += 1
     
     # TAB 3: KPIs por Influenciador
     with tabs[tab_idx]:
-        render_pag4_kpis_influenciador(campanhas_filtradas, cores)
+        render_pag4_kpis_influenciador(ctx, cores)
     tab_idx += 1
     
     # TAB: KPIs por Categoria (condicional)
     if show_categoria_tab:
         with tabs[tab_idx]:
-            render_pag_kpis_categoria(campanhas_filtradas, cores)
+            render_pag_kpis_categoria(ctx, cores)
         tab_idx += 1
     
     # TAB: Top Performance
     with tabs[tab_idx]:
-        render_pag5_top_performance(campanhas_filtradas, cores)
+        render_pag5_top_performance(ctx, cores)
     tab_idx += 1
     
     # TAB: Lista Influenciadores
     with tabs[tab_idx]:
-        render_pag6_lista_influenciadores(campanhas_filtradas, cores)
+        render_pag6_lista_influenciadores(ctx, cores)
     tab_idx += 1
     
     # TAB: Comentarios
     with tabs[tab_idx]:
         try:
-            render_comentarios(campanhas_filtradas, cores)
+            render_comentarios(ctx, cores)
         except Exception as e:
             st.error(f"Erro em Comentarios: {str(e)}")
     tab_idx += 1
@@ -720,9 +768,12 @@ def render_relatorio(campanhas_list, cliente=None):
             st.error(f"Erro em Compartilhar: {str(e)}")
 
 
-def render_pag1_big_numbers(campanhas_list, metricas, cores):
+def render_pag1_big_numbers(ctx, cores):
     """Pagina 1 - Big Numbers conforme layout especificado"""
     
+    campanhas_list = ctx.campanhas
+    metricas = ctx.metricas
+    
     primary_color = st.session_state.get('primary_color', '#7c3aed')
     secondary_color = st.session_state.get('secondary_color', '#fb923c')
     
@@ -746,24 +797,15 @@ def render_pag1_big_numbers(campanhas_list, metricas, cores):
     engaj_efetivo = metricas['engajamento_efetivo']
     
     # Calcular AIR Score medio
-    todos_influs = []
-    todos_influs_camp = []  # Para manter relacao inf -> posts
-    for camp in campanhas_list:
-        for inf_camp in camp.get('influenciadores', []):
-            inf = data_manager.get_influenciador(inf_camp.get('influenciador_id'))
-            if inf:
-                todos_influs.append(inf)
-                todos_influs_camp.append({'inf': inf, 'posts': inf_camp.get('posts', [])})
+    todos_influs = ctx.participantes()
     
     air_score_medio = 0
     if todos_influs:
         air_score_medio = sum(i.get('air_score', 0) for i in todos_influs) / len(todos_influs)
     
-    # Coletar todos os posts para metricas
-    todos_posts = []
-    for camp in campanhas_list:
-        for inf_camp in camp.get('influenciadores', []):
-            todos_posts.extend(inf_camp.get('posts', []))
+    # Posts dos influenciadores cadastrados, com formato padronizado
+    posts_influs = ctx.posts_cadastrados()
+    formato_posts = posts_influs['formato'].str.capitalize()
     
     # ========== LINHA 1 - CARDS BONITOS ==========
     st.markdown("### Metricas Principais")
@@ -850,17 +892,12 @@ def render_pag1_big_numbers(campanhas_list, metricas, cores):
     st.markdown("### Graficos")
     
     # Coletar formatos unicos da campanha
-    formatos_campanha = set()
-    for post in todos_posts:
-        formato = post.get('formato', post.get('type', 'Outro'))
-        if formato:
-            formatos_campanha.add(formato.capitalize())
-    formatos_campanha = sorted(list(formatos_campanha)) if formatos_campanha else ['Reels', 'Feed', 'Stories']
+    formatos_campanha = sorted({f.capitalize() for f in ctx.formatos()}) or ['Reels', 'Feed', 'Stories']
     
     # Coletar classificacoes unicas
     classificacoes = set()
     for inf in todos_influs:
-        classificacoes.add(inf.get('classificacao', 'Desconhecido'))
+        classificacoes.add(inf.get('classificacao') or 'Desconhecido')
     classificacoes = sorted(list(classificacoes)) if classificacoes else ['Nano', 'Micro', 'Inter 1', 'Inter 2', 'Macro', 'Mega 1', 'Mega 2', 'Super Mega']
     
     col_grafico1, col_grafico2 = st.columns(2)
@@ -876,48 +913,22 @@ def render_pag1_big_numbers(campanhas_list, metricas, cores):
         )
         
         # Agregar dados por formato E por classificacao
-        dados_grafico = []
+        valores_kpi = {
+            "Impressoes": posts_influs['impressoes_total'],
+            "Alcance": posts_influs['alcance'],
+            "Interacoes": posts_influs['interacoes'],
+            "Interacoes Qualificadas": (posts_influs['interacoes'] - posts_influs['curtidas']).clip(lower=0),
+            "Likes": posts_influs['curtidas'],
+            "Comentarios": posts_influs['comentarios'],
+            "Saves": posts_influs['saves'],
+        }
         
-        for inf_data in todos_influs_camp:
-            inf = inf_data['inf']
-            classif = inf.get('classificacao', 'Desconhecido')
-            
-            for post in inf_data['posts']:
-                formato = post.get('formato', post.get('type', 'Outro')).capitalize()
-                
-                valor = 0
-                if kpi_barra == "Impressoes":
-                    # Sempre somar views + impressoes
-                    views = post.get('views', 0) or 0
-                    imp = post.get('impressoes', 0) or 0
-                    valor = views + imp
-                elif kpi_barra == "Alcance":
-                    valor = post.get('alcance', 0) or 0
-                elif kpi_barra == "Interacoes":
-                    valor = post.get('interacoes', 0) or 0
-                elif kpi_barra == "Interacoes Qualificadas":
-                    inter = post.get('interacoes', 0) or 0
-                    curt = post.get('curtidas', 0) or 0
-                    valor = max(0, inter - curt)
-                elif kpi_barra == "Likes":
-                    valor = post.get('curtidas', 0) or 0
-                elif kpi_barra == "Comentarios":
-                    comentarios = post.get('comentarios', 0)
-                    if isinstance(comentarios, list):
-                        valor = len(comentarios)
-                    else:
-                        valor = comentarios or 0
-                elif kpi_barra == "Saves":
-                    valor = post.get('saves', 0) or 0
-                
-                dados_grafico.append({
-                    'Formato': formato,
-                    'Classificacao': classif,
-                    'Valor': valor
-                })
-        
-        if dados_grafico:
-            df_barras = pd.DataFrame(dados_grafico)
+        if not posts_influs.empty:
+            df_barras = pd.DataFrame({
+                'Formato': formato_posts,
+                'Classificacao': posts_influs['classificacao'],
+                'Valor': valores_kpi.get(kpi_barra, 0)
+            })
             df_agg = df_barras.groupby(['Formato', 'Classificacao'])['Valor'].sum().reset_index()
             
             # Calcular % de contribuicao por formato
@@ -983,18 +994,13 @@ def render_pag1_big_numbers(campanhas_list, metricas, cores):
         # Agregar dados por classificacao
         dados_classif = {c: 0 for c in classificacoes}
         
-        for inf_data in todos_influs_camp:
-            inf = inf_data['inf']
-            classif = inf.get('classificacao', 'Desconhecido')
-            
-            for post in inf_data['posts']:
-                formato_post = post.get('formato', post.get('type', '')).capitalize()
-                
-                if filtro_formato_radar != "Todos" and formato_post != filtro_formato_radar:
-                    continue
-                
-                # Contar interacoes por classificacao
-                dados_classif[classif] += post.get('interacoes', 0) or 0
+        interacoes_radar = posts_influs['interacoes']
+        if filtro_formato_radar != "Todos":
+            interacoes_radar = interacoes_radar[formato_posts == filtro_formato_radar]
+        
+        # Contar interacoes por classificacao
+        for classif, valor in interacoes_radar.groupby(posts_influs['classificacao']).sum().items():
+            dados_classif[classif] = dados_classif.get(classif, 0) + valor
         
         if any(v > 0 for v in dados_classif.values()):
             categorias = list(dados_classif.keys())
@@ -1027,7 +1033,7 @@ def render_pag1_big_numbers(campanhas_list, metricas, cores):
     
     # Insights da campanha (apenas visualizacao)
     if len(campanhas_list) == 1:
-        dados_ia = preparar_dados_pagina("big_numbers", campanhas_list, metricas)
+        dados_ia = preparar_dados_pagina("big_numbers", ctx, metricas)
         dados_ia["metricas_gerais"] = {
             "total_influenciadores": metricas['total_influenciadores'],
             "total_seguidores": metricas['total_seguidores'],
@@ -1043,9 +1049,11 @@ def render_pag1_big_numbers(campanhas_list, metricas, cores):
         render_secao_insights("big_numbers", dados_ia, campanhas_list[0]['id'])
 
 
-def render_pag2_analise_geral(campanhas_list, metricas, cores):
+def render_pag2_analise_geral(ctx, cores):
     """Pagina 2 - Analise Geral"""
     
+    metricas = ctx.metricas
+    
     st.subheader("Analise de Performance")
     
     col1, col2 = st.columns(2)
@@ -1055,7 +1063,7 @@ def render_pag2_analise_geral(campanhas_list, metricas, cores):
         kpi1 = st.selectbox("KPI Barras:", ["Impressoes", "Alcance", "Interacoes", "Interacoes Qualificadas"], key="kpi1_pag2")
         kpi2 = st.selectbox("KPI Linha:", ["Taxa Eng. Efetivo", "Taxa Alcance", "Taxa de Interacoes Qualificadas", "Interacoes", "Impressoes"], key="kpi2_pag2")
         
-        dados = coletar_dados_formato(campanhas_list)
+        dados = ctx.por_formato()
         if dados:
             df = pd.DataFrame(dados)
             
@@ -1111,7 +1119,7 @@ def render_pag2_analise_geral(campanhas_list, metricas, cores):
         kpi3 = st.selectbox("KPI Barras:", ["Impressoes", "Alcance", "Interacoes", "Interacoes Qualificadas"], key="kpi3_pag2")
         kpi4 = st.selectbox("KPI Linha:", ["Qtd Influenciadores", "Taxa Eng. Media", "Taxa de Interacoes Qualificadas", "Posts"], key="kpi4_pag2")
         
-        dados_class = coletar_dados_classificacao_completo(campanhas_list)
+        dados_class = ctx.por_classificacao()
         if dados_class:
             df = pd.DataFrame(dados_class)
             
@@ -1184,52 +1192,50 @@ def render_pag2_analise_geral(campanhas_list, metricas, cores):
             st.info(f"Alcance Bom: {metricas['taxa_alcance']:.2f}%")
 
 
-def render_pag3_visao_aon(campanhas_list, metricas, cores, cliente=None):
+def render_pag3_visao_aon(ctx, cores, cliente=None):
     """Pagina 3 - Visao AON"""
     
+    campanhas_list = ctx.campanhas
+    
     st.subheader("Visao AON - Evolucao Temporal")
     
-    col1, col2, col3, col4 = st.columns(4)
+    col1, col2, col3, col4, col5 = st.columns(5)
     with col1:
         filtro_metrica = st.selectbox("Metrica:", ["Impressoes", "Alcance", "Interacoes"], key="aon_metrica")
     with col2:
         filtro_taxa = st.selectbox("Taxa:", ["Taxa Eng. Efetivo", "Taxa Alcance"], key="aon_taxa")
     with col3:
-        data_ini = st.date_input("De:", value=datetime.now() - timedelta(days=180), key="aon_di")
+        filtro_agrupamento = st.selectbox("Agrupar por:", ["Mes", "Semana", "Dia"], key="aon_agrupamento")
     with col4:
+        data_ini = st.date_input("De:", value=datetime.now() - timedelta(days=180), key="aon_di")
+    with col5:
         data_fim = st.date_input("Ate:", value=datetime.now(), key="aon_df")
     
     st.markdown("---")
     
-    dados_tempo = coletar_dados_temporais(campanhas_list, data_ini, data_fim)
+    # Series ja agregadas por periodo na tabela de metricas diarias
+    agrupamento = {'Mes': 'mes', 'Semana': 'semana', 'Dia': 'dia'}[filtro_agrupamento]
+    dados_tempo = ctx.serie_temporal(data_ini, data_fim, agrupamento)
     
     if not dados_tempo:
         st.warning("Nenhum post no periodo")
         return
     
-    df = pd.DataFrame(dados_tempo)
-    df['mes'] = pd.to_datetime(df['data']).dt.to_period('M').astype(str)
-    df['mes_nome'] = pd.to_datetime(df['data']).dt.strftime('%b/%Y')
+    df_tempo = pd.DataFrame(dados_tempo)
+    if agrupamento == 'mes':
+        df_tempo['rotulo'] = pd.to_datetime(df_tempo['periodo'], format='%Y-%m').dt.strftime('%b/%Y')
+    else:
+        df_tempo['rotulo'] = pd.to_datetime(df_tempo['periodo'], format='%Y-%m-%d').dt.strftime('%d/%m/%Y')
     
     metrica_map = {'Impressoes': 'impressoes', 'Alcance': 'alcance', 'Interacoes': 'interacoes'}
     campo = metrica_map.get(filtro_metrica, 'impressoes')
     
-    # Agrupar por MES (eixo X mensal)
-    df_tempo = df.groupby(['mes', 'mes_nome']).agg({
-        campo: 'sum', 
-        'views': 'sum', 
-        'alcance': 'sum', 
-        'interacoes': 'sum',
-        'impressoes': 'sum',
-        'seguidores': 'sum'
-    }).reset_index()
-    df_tempo = df_tempo.sort_values('mes')
     df_tempo['taxa_eng'] = (df_tempo['interacoes'] / df_tempo['views'] * 100).round(2).fillna(0)
     df_tempo['taxa_alcance'] = (df_tempo['alcance'] / df_tempo['seguidores'] * 100).round(2).fillna(0)
     
     fig = go.Figure()
     fig.add_trace(go.Bar(
-        x=df_tempo['mes_nome'], 
+        x=df_tempo['rotulo'], 
         y=df_tempo[campo], 
         name=filtro_metrica, 
         marker_color=cores[0],
@@ -1240,7 +1246,7 @@ def render_pag3_visao_aon(campanhas_list, metricas, cores, cliente=None):
     
     taxa_campo = 'taxa_eng' if filtro_taxa == "Taxa Eng. Efetivo" else 'taxa_alcance'
     fig.add_trace(go.Scatter(
-        x=df_tempo['mes_nome'], 
+        x=df_tempo['rotulo'], 
         y=df_tempo[taxa_campo], 
         name=filtro_taxa, 
         mode='lines+markers+text',
@@ -1251,9 +1257,10 @@ def render_pag3_visao_aon(campanhas_list, metricas, cores, cliente=None):
         marker=dict(size=10)
     ))
     
+    titulo_agrupamento = {'mes': 'Mensal', 'semana': 'Semanal', 'dia': 'Diaria'}[agrupamento]
     fig.update_layout(
-        title=f'Evolucao Mensal de {filtro_metrica}', 
-        xaxis=dict(title='Mes', tickangle=-45),
+        title=f'Evolucao {titulo_agrupamento} de {filtro_metrica}', 
+        xaxis=dict(title=filtro_agrupamento, tickangle=-45),
         yaxis=dict(title=filtro_metrica), 
         yaxis2=dict(title=filtro_taxa, overlaying='y', side='right'), 
         height=450, 
@@ -1263,31 +1270,25 @@ def render_pag3_visao_aon(campanhas_list, metricas, cores, cliente=None):
     st.plotly_chart(fig, use_container_width=True)
     
     st.markdown("---")
-    st.subheader("Resumo Mensal")
-    
-    # Criar resumo mensal
-    df_mensal = df.groupby('mes').agg({
-        'influenciador': 'nunique', 
-        'seguidores': lambda x: x.drop_duplicates().sum(), 
-        'views': 'sum', 
-        'alcance': 'sum', 
-        'interacoes': 'sum', 
-        'impressoes': 'sum'
-    }).reset_index()
-    df_mensal.columns = ['Mes', 'Qtd Influs', 'Seguidores', 'Views', 'Alcance', 'Interacoes', 'Impressoes']
-    df_mensal = df_mensal.sort_values('Mes')
+    st.subheader(f"Resumo {titulo_agrupamento}")
+    
+    # Criar resumo por periodo
+    df_mensal = df_tempo[[
+        'periodo', 'influenciadores', 'seguidores_influenciadores', 'views', 'alcance', 'interacoes', 'impressoes'
+    ]].copy()
+    df_mensal.columns = ['Periodo', 'Qtd Influs', 'Seguidores', 'Views', 'Alcance', 'Interacoes', 'Impressoes']
     
     # Adicionar taxa de engajamento
     df_mensal['Taxa Eng.'] = (df_mensal['Interacoes'] / df_mensal['Views'] * 100).round(2).fillna(0)
     
-    # TRANSPOR: Categorias na primeira coluna, meses nas outras colunas
+    # TRANSPOR: Categorias na primeira coluna, periodos nas outras colunas
     categorias = ['Qtd Influs', 'Seguidores', 'Views', 'Alcance', 'Interacoes', 'Impressoes', 'Taxa Eng.']
     
     # Criar DataFrame transposto
     df_transposto = pd.DataFrame({'Metrica': categorias})
     
     for _, row in df_mensal.iterrows():
-        mes_nome = row['Mes']
+        nome_periodo = row['Periodo']
         valores = []
         for cat in categorias:
             if cat == 'Taxa Eng.':
@@ -1296,7 +1297,7 @@ def render_pag3_visao_aon(campanhas_list, metricas, cores, cliente=None):
                 valores.append(funcoes_auxiliares.formatar_numero(row[cat]))
             else:
                 valores.append(str(int(row[cat])))
-        df_transposto[mes_nome] = valores
+        df_transposto[nome_periodo] = valores
     
     # Adicionar coluna de TOTAL
     totais = []
@@ -1314,18 +1315,20 @@ def render_pag3_visao_aon(campanhas_list, metricas, cores, cliente=None):
     
     # Insights por IA
     if len(campanhas_list) == 1:
-        dados_ia = preparar_dados_pagina("visao_aon", campanhas_list)
+        dados_ia = preparar_dados_pagina("visao_aon", ctx)
         dados_ia["resumo_mensal"] = df_mensal.to_dict('records') if not df_mensal.empty else []
         dados_ia["evolucao_temporal"] = df_tempo.to_dict('records') if not df_tempo.empty else []
         render_secao_insights("visao_aon", dados_ia, campanhas_list[0]['id'])
 
 
-def render_pag4_kpis_influenciador(campanhas_list, cores):
+def render_pag4_kpis_influenciador(ctx, cores):
     """Pagina 4 - KPIs por Influenciador (Top 15)"""
     
+    campanhas_list = ctx.campanhas
+    
     st.subheader("KPIs por Influenciador (Top 15)")
     
-    dados_inf = coletar_dados_influenciadores(campanhas_list)
+    dados_inf = ctx.influenciadores()
     
     if not dados_inf:
         st.info("Nenhum dado disponivel")
@@ -1575,18 +1578,18 @@ def render_pag4_kpis_influenciador(campanhas_list, cores):
     
     # Insights da campanha (apenas visualizacao)
     if len(campanhas_list) == 1:
-        dados_ia = preparar_dados_pagina("kpis_influenciador", campanhas_list)
+        dados_ia = preparar_dados_pagina("kpis_influenciador", ctx)
         dados_ia["top_15_influenciadores"] = dados_inf[:15] if len(dados_inf) > 15 else dados_inf
         render_secao_insights("kpis_influenciador", dados_ia, campanhas_list[0]['id'])
 
 
-def render_pag_kpis_categoria(campanhas_list, cores):
+def render_pag_kpis_categoria(ctx, cores):
     """Pagina KPIs por Categoria - agrupa influenciadores por categoria"""
     
     st.subheader("KPIs por Categoria")
     
     # Coletar dados dos influenciadores
-    dados_inf = coletar_dados_influenciadores(campanhas_list)
+    dados_inf = ctx.influenciadores()
     
     if not dados_inf:
         st.info("Nenhum dado disponivel")
@@ -1733,9 +1736,11 @@ def render_pag_kpis_categoria(campanhas_list, cores):
             st.markdown("---")
 
 
-def render_pag5_top_performance(campanhas_list, cores):
+def render_pag5_top_performance(ctx, cores):
     """Pagina 5 - Top Performance"""
     
+    campanhas_list = ctx.campanhas
+    
     st.subheader("Top Performance")
     
     # ========== SEÇÃO: TOP 3 CONTEÚDOS DESTACADOS ==========
@@ -1791,7 +1796,7 @@ def render_pag5_top_performance(campanhas_list, cores):
             st.markdown("---")
     
     # ========== GRÁFICO DE DISPERSÃO ==========
-    dados_influs = coletar_dados_influenciadores(campanhas_list)
+    dados_influs = ctx.influenciadores()
     
     if not dados_influs:
         st.info("Nenhum dado")
@@ -1828,30 +1833,15 @@ def render_pag5_top_performance(campanhas_list, cores):
     ordem_map = {"Investimento (Custo)": "custo", "Interacoes": "interacoes", "Taxa Eng. Efetivo": "taxa_eng", "Impressoes": "impressoes", "Alcance": "alcance"}
     df_filtrado = df_filtrado.sort_values(ordem_map.get(metrica_ordenar, 'interacoes'), ascending=False).head(qtd)
     
-    # Coletar links dos posts por influenciador
-    posts_por_influenciador = {}
-    for camp in campanhas_list:
-        for inf_camp in camp.get('influenciadores', []):
-            inf_id = inf_camp.get('influenciador_id')
-            if not inf_id:
-                continue
-            if inf_id not in posts_por_influenciador:
-                posts_por_influenciador[inf_id] = []
-            for post in inf_camp.get('posts', []):
-                link = post.get('link', '') or post.get('link_post', '') or post.get('permalink', '') or post.get('url', '') or ''
-                if link:
-                    posts_por_influenciador[inf_id].append({
-                        'link': link,
-                        'formato': post.get('formato', 'N/A'),
-                        'interacoes': post.get('interacoes', 0) or 0
-                    })
+    # Links dos posts por influenciador
+    posts_por_influenciador = ctx.links_por_influenciador()
     
     for _, row in df_filtrado.iterrows():
         col1, col2, col3, col4, col5, col6 = st.columns([0.5, 2.5, 1, 1, 1, 1])
         with col1:
             if row.get('foto'):
                 try:
-                    st.image(row['foto'], width=40)
+                    st.image(data_manager.imagem_para_exibir(row['foto'], 'p'), width=40)
                 except:
                     st.markdown("")
             else:
@@ -1878,25 +1868,20 @@ def render_pag5_top_performance(campanhas_list, cores):
     
     # Insights por IA
     if len(campanhas_list) == 1:
-        dados_ia = preparar_dados_pagina("top_performance", campanhas_list)
+        dados_ia = preparar_dados_pagina("top_performance", ctx)
         dados_ia["top_performance"] = df_filtrado.to_dict('records') if not df_filtrado.empty else []
         render_secao_insights("top_performance", dados_ia, campanhas_list[0]['id'])
 
 
-def render_pag6_lista_influenciadores(campanhas_list, cores):
+def render_pag6_lista_influenciadores(ctx, cores):
     """Pagina 6 - Lista completa"""
     
+    campanhas_list = ctx.campanhas
+    
     st.subheader("Lista de Influenciadores")
     
     # Coletar formatos disponiveis
-    formatos_disponiveis = set()
-    for camp in campanhas_list:
-        for inf_camp in camp.get('influenciadores', []):
-            for post in inf_camp.get('posts', []):
-                formato = post.get('formato', 'Outro')
-                if formato:
-                    formatos_disponiveis.add(formato)
-    formatos_disponiveis = sorted(list(formatos_disponiveis)) if formatos_disponiveis else ['Reels', 'Feed', 'Stories', 'Carrossel']
+    formatos_disponiveis = ctx.formatos() or ['Reels', 'Feed', 'Stories', 'Carrossel']
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -1907,7 +1892,7 @@ def render_pag6_lista_influenciadores(campanhas_list, cores):
         ordenar = st.selectbox("Ordenar:", ["Impressoes", "Alcance Total", "Interacoes", "Taxa Eng.", "Investimento"], key="ord_pag6")
     
     # Coletar dados com filtro de formato
-    dados = coletar_dados_influenciadores(campanhas_list, filtro_formato=filtro_formato if filtro_formato else None)
+    dados = ctx.influenciadores(filtro_formato if filtro_formato else None)
     
     if not dados:
         st.info("Nenhum influenciador")
@@ -1992,40 +1977,30 @@ def render_pag6_lista_influenciadores(campanhas_list, cores):
     st.subheader("Lista de Conteudos")
     
     # Coletar dados de todos os posts
-    dados_conteudo = []
-    for camp in campanhas_list:
-        for inf_camp in camp.get('influenciadores', []):
-            inf = data_manager.get_influenciador(inf_camp.get('influenciador_id'))
-            if not inf:
-                continue
-            
-            for post in inf_camp.get('posts', []):
-                link = post.get('link', '') or post.get('link_post', '') or post.get('permalink', '') or ''
-                dados_conteudo.append({
-                    'Influenciador': inf.get('nome', ''),
-                    'Usuario': inf.get('usuario', ''),
-                    'Rede': inf.get('network', 'instagram'),
-                    'Classificacao': inf.get('classificacao', ''),
-                    'Seguidores': inf.get('seguidores', 0),
-                    'Formato': post.get('formato', ''),
-                    'Data': post.get('data_publicacao', ''),
-                    'Link': link,
-                    'Views': post.get('views', 0) or 0,
-                    'Alcance': post.get('alcance', 0) or 0,
-                    'Interacoes': post.get('interacoes', 0) or 0,
-                    'Impressoes': post.get('impressoes', 0) or 0,
-                    'Curtidas': post.get('curtidas', 0) or 0,
-                    'Comentarios': post.get('comentarios_qtd', 0) or 0,
-                    'Compartilhamentos': post.get('compartilhamentos', 0) or 0,
-                    'Saves': post.get('saves', 0) or 0,
-                    'Cliques Link': post.get('clique_link', 0) or post.get('cliques_link', 0) or 0,
-                    'Cliques @': post.get('cliques_arroba', 0) or post.get('cliques_perfil', 0) or 0,
-                    'Conversoes': post.get('cupom_conversoes', 0) or post.get('conversoes', 0) or 0
-                })
-    
-    if dados_conteudo:
-        df_conteudo = pd.DataFrame(dados_conteudo)
-        
+    posts = ctx.posts_cadastrados()
+    df_conteudo = pd.DataFrame({
+        'Influenciador': posts['nome'].fillna(''),
+        'Usuario': posts['usuario'].fillna(''),
+        'Rede': posts['network'].fillna('instagram'),
+        'Classificacao': posts['classificacao'],
+        'Seguidores': posts['seguidores'].astype('int64'),
+        'Formato': posts['formato'],
+        'Data': posts['data_publicacao'],
+        'Link': posts['link'],
+        'Views': posts['views'],
+        'Alcance': posts['alcance'],
+        'Interacoes': posts['interacoes'],
+        'Impressoes': posts['impressoes'],
+        'Curtidas': posts['curtidas'],
+        'Comentarios': posts['comentarios'],
+        'Compartilhamentos': posts['compartilhamentos'],
+        'Saves': posts['saves'],
+        'Cliques Link': posts['cliques_link'],
+        'Cliques @': posts['cliques_arroba'],
+        'Conversoes': posts['conversoes']
+    })
+    
+    if not df_conteudo.empty:
         # Filtros para tabela de conteudo
         col_fc1, col_fc2 = st.columns(2)
         with col_fc1:
@@ -2065,268 +2040,18 @@ def render_pag6_lista_influenciadores(campanhas_list, cores):
 # FUNCOES AUXILIARES
 # ========================================
 
-def coletar_dados_por_tier(campanhas_list, kpi, filtro_formato):
-    dados = []
-    for camp in campanhas_list:
-        for camp_inf in camp.get('influenciadores', []):
-            inf = data_manager.get_influenciador(camp_inf.get('influenciador_id'))
-            if not inf:
-                continue
-            tier = camp_inf.get('snapshot_dados', {}).get('classificacao', inf.get('classificacao', 'Desconhecido'))
-            for post in camp_inf.get('posts', []):
-                if filtro_formato != "Todos" and post.get('formato') != filtro_formato:
-                    continue
-                valor = post.get(kpi, 0)
-                if kpi == 'seguidores':
-                    valor = inf.get('seguidores', 0)
-                if valor > 0:
-                    dados.append({'tier': tier, 'valor': valor})
-    return dados
-
-
-def coletar_dados_radar_formato(campanhas_list):
-    dados_formato = {}
-    for camp in campanhas_list:
-        for camp_inf in camp.get('influenciadores', []):
-            inf = data_manager.get_influenciador(camp_inf.get('influenciador_id'))
-            seguidores = inf.get('seguidores', 1) if inf else 1
-            for post in camp_inf.get('posts', []):
-                formato = post.get('formato', 'Outro')
-                if formato not in dados_formato:
-                    dados_formato[formato] = {'views': 0, 'alcance': 0, 'interacoes': 0, 'seguidores': 0}
-                dados_formato[formato]['views'] += post.get('views', 0)
-                dados_formato[formato]['alcance'] += post.get('alcance', 0)
-                dados_formato[formato]['interacoes'] += post.get('interacoes', 0)
-                dados_formato[formato]['seguidores'] += seguidores
-    resultado = []
-    for formato, vals in dados_formato.items():
-        taxa_eng = (vals['interacoes'] / vals['views'] * 100) if vals['views'] > 0 else 0
-        taxa_alcance = (vals['alcance'] / vals['seguidores'] * 100) if vals['seguidores'] > 0 else 0
-        resultado.append({'formato': formato, 'taxa_eng': round(taxa_eng, 2), 'taxa_alcance': round(taxa_alcance, 2)})
-    return resultado
-
-
-def coletar_dados_formato(campanhas_list):
-    """Coleta dados por formato. Stories do mesmo influ/data sao agregados."""
-    dados_raw = []
-    stories_por_influ_data = {}  # Chave: (influ_id, data) -> lista de posts
-    
-    for camp in campanhas_list:
-        for camp_inf in camp.get('influenciadores', []):
-            inf_id = camp_inf.get('influenciador_id')
-            for post in camp_inf.get('posts', []):
-                formato = post.get('formato', 'Outro')
-                impressoes_total = calcular_impressoes_post(post)
-                
-                if formato == 'Stories':
-                    # Agregar Stories do mesmo influenciador/data
-                    data_post = post.get('data_publicacao', '')
-                    chave = (inf_id, data_post)
-                    
-                    if chave not in stories_por_influ_data:
-                        stories_por_influ_data[chave] = {
-                            'views': 0,
-                            'alcance': 0,
-                            'alcance_max': 0,  # Para pegar o maior alcance
-                            'interacoes': 0,
-                            'impressoes': 0,
-                            'curtidas': 0
-                        }
-                    
-                    # Somar metricas
-                    stories_por_influ_data[chave]['views'] += post.get('views', 0) or 0
-                    stories_por_influ_data[chave]['interacoes'] += post.get('interacoes', 0) or 0
-                    stories_por_influ_data[chave]['impressoes'] += impressoes_total
-                    stories_por_influ_data[chave]['curtidas'] += post.get('curtidas', 0) or 0
-                    # Alcance = pegar o maior
-                    stories_por_influ_data[chave]['alcance_max'] = max(
-                        stories_por_influ_data[chave]['alcance_max'],
-                        post.get('alcance', 0) or 0
-                    )
-                else:
-                    # Outros formatos: adicionar normalmente
-                    dados_raw.append({
-                        'formato': formato, 
-                        'views': post.get('views', 0) or 0, 
-                        'alcance': post.get('alcance', 0) or 0, 
-                        'interacoes': post.get('interacoes', 0) or 0, 
-                        'impressoes': impressoes_total,
-                        'curtidas': post.get('curtidas', 0) or 0
-                    })
-    
-    # Adicionar Stories agregados
-    for chave, dados_story in stories_por_influ_data.items():
-        dados_raw.append({
-            'formato': 'Stories',
-            'views': dados_story['views'],
-            'alcance': dados_story['alcance_max'],  # Maior alcance
-            'interacoes': dados_story['interacoes'],
-            'impressoes': dados_story['impressoes'],
-            'curtidas': dados_story['curtidas']
-        })
-    
-    return dados_raw
-
-
-def coletar_dados_classificacao_completo(campanhas_list):
-    dados = []
-    for camp in campanhas_list:
-        for camp_inf in camp.get('influenciadores', []):
-            inf = data_manager.get_influenciador(camp_inf.get('influenciador_id'))
-            if not inf:
-                continue
-            classificacao = camp_inf.get('snapshot_dados', {}).get('classificacao', inf.get('classificacao', 'Desconhecido'))
-            for post in camp_inf.get('posts', []):
-                dados.append({
-                    'classificacao': classificacao, 
-                    'influenciador': inf['nome'], 
-                    'post_id': post.get('id', 0), 
-                    'views': post.get('views', 0) or 0, 
-                    'alcance': post.get('alcance', 0) or 0, 
-                    'interacoes': post.get('interacoes', 0) or 0, 
-                    'impressoes': calcular_impressoes_post(post),
-                    'curtidas': post.get('curtidas', 0) or 0
-                })
-    return dados
-
-
-def coletar_dados_temporais(campanhas_list, data_ini, data_fim):
-    dados = []
-    for camp in campanhas_list:
-        for camp_inf in camp.get('influenciadores', []):
-            inf = data_manager.get_influenciador(camp_inf.get('influenciador_id'))
-            if not inf:
-                continue
-            seguidores = inf.get('seguidores', 0)
-            for post in camp_inf.get('posts', []):
-                try:
-                    data_post = datetime.strptime(post.get('data_publicacao', ''), '%d/%m/%Y')
-                    if data_ini <= data_post.date() <= data_fim:
-                        dados.append({
-                            'data': data_post, 
-                            'influenciador': inf['nome'], 
-                            'seguidores': seguidores, 
-                            'views': post.get('views', 0) or 0, 
-                            'alcance': post.get('alcance', 0) or 0, 
-                            'interacoes': post.get('interacoes', 0) or 0, 
-                            'impressoes': calcular_impressoes_post(post)
-                        })
-                except:
-                    pass
-    return dados
-
-
-def coletar_dados_influenciadores(campanhas_list, filtro_formato=None):
-    """Coleta dados por influenciador. Stories do mesmo dia contam como 1 publicacao.
-    
-    Args:
-        campanhas_list: Lista de campanhas
-        filtro_formato: Lista de formatos para filtrar (ex: ['Reels', 'Stories'])
-    """
-    dados_inf = {}
-    
-    for camp in campanhas_list:
-        for camp_inf in camp.get('influenciadores', []):
-            inf = data_manager.get_influenciador(camp_inf.get('influenciador_id'))
-            if not inf:
-                continue
-            inf_id = inf['id']
-            
-            # Se tem filtro de formato, verificar se o influ tem posts nesse formato
-            posts_filtrados = camp_inf.get('posts', [])
-            if filtro_formato:
-                posts_filtrados = [p for p in posts_filtrados if p.get('formato', 'Outro') in filtro_formato]
-                if not posts_filtrados:
-                    continue  # Pula influenciador que nao tem posts no formato filtrado
-            
-            if inf_id not in dados_inf:
-                dados_inf[inf_id] = {
-                    'id': inf_id, 
-                    'nome': inf['nome'], 
-                    'usuario': inf['usuario'], 
-                    'foto': inf.get('foto', ''), 
-                    'classificacao': inf.get('classificacao', 'Desconhecido'), 
-                    'seguidores': inf.get('seguidores', 0), 
-                    'network': inf.get('network', camp_inf.get('network', 'instagram')),
-                    'categoria': inf.get('categoria', camp_inf.get('categoria', '')),
-                    'vinculo_id': inf.get('vinculo_id', camp_inf.get('vinculo_id')),
-                    'impressoes': 0, 
-                    'alcance': 0, 
-                    'alcance_total': 0,
-                    'interacoes': 0,
-                    'curtidas': 0,
-                    'custo': 0, 
-                    'cliques_link': 0, 
-                    'cliques_arroba': 0, 
-                    'posts': 0,
-                    '_stories_datas': set()  # Para contar datas unicas de Stories
-                }
-            dados_inf[inf_id]['custo'] += camp_inf.get('custo', 0)
-            
-            for post in posts_filtrados:
-                formato = post.get('formato', 'Outro')
-                data_post = post.get('data_publicacao', '')
-                
-                # Calcular impressoes combinadas
-                imp = calcular_impressoes_post(post)
-                
-                dados_inf[inf_id]['impressoes'] += imp
-                post_alcance = post.get('alcance', 0) or 0
-                dados_inf[inf_id]['alcance'] = max(dados_inf[inf_id]['alcance'], post_alcance)
-                dados_inf[inf_id]['alcance_total'] += post_alcance
-                dados_inf[inf_id]['interacoes'] += post.get('interacoes', 0) or 0
-                dados_inf[inf_id]['curtidas'] += post.get('curtidas', 0) or 0
-                dados_inf[inf_id]['cliques_link'] += post.get('clique_link', 0) or 0
-                dados_inf[inf_id]['cliques_arroba'] += post.get('clique_arroba', 0) or post.get('cliques_arroba', 0) or 0
-                
-                # Contagem de posts: Stories do mesmo dia = 1 publicacao
-                if formato == 'Stories':
-                    if data_post and data_post not in dados_inf[inf_id]['_stories_datas']:
-                        dados_inf[inf_id]['_stories_datas'].add(data_post)
-                        dados_inf[inf_id]['posts'] += 1
-                    elif not data_post:
-                        # Se nao tem data, conta como post individual
-                        dados_inf[inf_id]['posts'] += 1
-                else:
-                    # Outros formatos contam normalmente
-                    dados_inf[inf_id]['posts'] += 1
-    
-    resultado = []
-    for inf_id, d in dados_inf.items():
-        # Remover campo auxiliar
-        d.pop('_stories_datas', None)
-        
-        d['taxa_eng'] = round((d['interacoes'] / d['impressoes'] * 100), 2) if d['impressoes'] > 0 else 0
-        d['taxa_alcance'] = round((d['alcance'] / d['seguidores'] * 100), 2) if d['seguidores'] > 0 else 0
-        d['taxa_eng_geral'] = round((d['interacoes'] / d['seguidores'] * 100), 2) if d['seguidores'] > 0 else 0
-        # Interacoes Qualificadas = Interacoes - Curtidas
-        d['interacoes_qualif'] = max(0, d['interacoes'] - d['curtidas'])
-        # Taxa de Interacoes Qualificadas = (Interacoes - Curtidas) / Interacoes * 100
-        d['taxa_interacoes_qualif'] = round((d['interacoes_qualif'] / d['interacoes'] * 100), 2) if d['interacoes'] > 0 else 0
-        resultado.append(d)
-    return resultado
-
-
-def render_comentarios(campanhas_list, cores):
+def render_comentarios(ctx, cores):
     st.subheader("Analise de Comentarios")
     
     # Buscar comentarios e mapear formatos por post_url
     comentarios = []
-    formatos_por_url = {}
+    formatos_por_url = ctx.formato_por_link()
     
-    for camp in campanhas_list:
+    for camp in ctx.campanhas:
         camp_id = camp.get('id')
         if not camp_id:
             continue
         
-        # Mapear post_url -> formato
-        for camp_inf in camp.get('influenciadores', []):
-            for post in camp_inf.get('posts', []):
-                link = post.get('link', '') or post.get('link_post', '') or post.get('permalink', '') or post.get('url', '') or ''
-                fmt = post.get('formato', 'Outro') or 'Outro'
-                if link:
-                    formatos_por_url[link] = fmt
-        
         coments_banco = data_manager.get_comentarios_campanha(camp_id, apenas_classificados=True)
         for c in coments_banco:
             post_url = c.get('post_url', '')
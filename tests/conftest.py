@@ -0,0 +1,25 @@
+"""Configuracao dos testes: raiz do projeto no path e banco SQLite temporario"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import data_manager  # noqa: E402
+
+
+@pytest.fixture
+def banco_sqlite(tmp_path, monkeypatch):
+    """Banco SQLite novo, com todas as migracoes aplicadas, usado por data_manager"""
+    if data_manager.USING_POSTGRES:
+        pytest.skip("testes de banco rodam so com SQLite (DATABASE_URL aponta para PostgreSQL)")
+    monkeypatch.setattr(data_manager, 'DB_PATH', str(tmp_path / 'air_relatorios.db'))
+    monkeypatch.setattr(data_manager, '_pool', None)
+    monkeypatch.setattr(data_manager, '_bootstrap_feito', False)
+    data_manager.invalidar_cache()
+    assert data_manager.aplicar_migracoes()
+    yield data_manager
+    data_manager._get_pool().fechar_todas()
+    data_manager.invalidar_cache()
@@ -0,0 +1,11 @@
+"""As consultas quentes (CONSULTAS_INDEXADAS) devem usar indice no banco migrado"""
+
+from utils import data_manager
+
+
+def test_consultas_indexadas_nao_fazem_scan_da_tabela(banco_sqlite):
+    planos = banco_sqlite.verificar_planos_indices()
+    assert len(planos) == len(data_manager.CONSULTAS_INDEXADAS)
+    sem_indice = [f"{item['query']} -> {item['plano']}" for item in planos if not item['usa_indice']]
+    assert not sem_indice, "Consultas com SCAN da tabela:\n" + "\n".join(sem_indice)
+
@@ -0,0 +1,144 @@
+"""
+Cache compartilhado entre sessoes do Streamlit
+
+Os modulos Python sao carregados uma vez por processo, entao uma instancia
+criada no nivel do modulo e vista por todas as sessoes. Cada tabela e cada
+chave tem um contador de versao: invalidar incrementa a versao e descarta as
+entradas, e leituras em andamento com a versao antiga nao sao gravadas. Os
+contadores por chave sao limitados: passando do limite, sao incorporados a
+versao das tabelas.
+
+Os valores sao copiados (deepcopy) ao gravar e ao ler: cada sessao recebe o
+seu proprio objeto e pode altera-lo sem afetar as outras.
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class CacheCompartilhado:
+    """Cache LRU em memoria com versao por tabela/chave, seguro para varias threads"""
+
+    def __init__(self, max_itens: int = 64, max_versoes_chave: int = None):
+        """
+        Args:
+            max_itens: Quantidade maxima de entradas antes de descartar a menos usada
+            max_versoes_chave: Contadores de versao por chave guardados antes de
+                incorpora-los a versao das tabelas (padrao: 4x max_itens)
+        """
+        self.max_itens = max(1, max_itens)
+        self.max_versoes_chave = max(1, max_versoes_chave or 4 * self.max_itens)
+        self._itens: "OrderedDict[Tuple[str, Hashable], Tuple[Tuple[int, int], Any]]" = OrderedDict()
+        self._versoes: Dict[str, int] = {}
+        self._versoes_chave: Dict[Tuple[str, Hashable], int] = {}
+        self._acertos: Dict[str, int] = {}
+        self._falhas: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _versao_atual(self, tabela: str, chave: Hashable) -> Tuple[int, int]:
+        return (self._versoes.get(tabela, 0), self._versoes_chave.get((tabela, chave), 0))
+
+    def versao(self, tabela: str, chave: Hashable = None) -> Tuple[int, int]:
+        """Retorna a versao atual de uma tabela (e da chave, se informada)"""
+        with self._lock:
+            return self._versao_atual(tabela, chave)
+
+    def get(self, tabela: str, chave: Hashable) -> Optional[Any]:
+        """Retorna uma copia do valor em cache ou None se ausente/desatualizado"""
+        with self._lock:
+            item = self._itens.get((tabela, chave))
+            if item is not None and item[0] != self._versao_atual(tabela, chave):
+                del self._itens[(tabela, chave)]
+                item = None
+
+            if item is None:
+                self._falhas[tabela] = self._falhas.get(tabela, 0) + 1
+                return None
+
+            self._acertos[tabela] = self._acertos.get(tabela, 0) + 1
+            self._itens.move_to_end((tabela, chave))
+            valor = item[1]
+
+        # O valor guardado nunca e alterado, entao a copia pode ser feita fora do lock
+        return copy.deepcopy(valor)
+
+    def set(self, tabela: str, chave: Hashable, valor: Any, versao: Tuple[int, int] = None) -> None:
+        """
+        Grava uma copia do valor no cache.
+
+        Args:
+            versao: Versao lida com versao(tabela, chave) ANTES de carregar o
+                valor. Se houve invalidacao durante a carga, o valor nao e gravado.
+        """
+        valor = copy.deepcopy(valor)
+        with self._lock:
+            atual = self._versao_atual(tabela, chave)
+            if versao is not None and versao != atual:
+                return
+
+            self._itens[(tabela, chave)] = (atual, valor)
+            self._itens.move_to_end((tabela, chave))
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def invalidar(self, *tabelas: str) -> None:
+        """Incrementa a versao das tabelas e descarta todas as suas entradas"""
+        with self._lock:
+            for tabela in tabelas:
+                self._versoes[tabela] = self._versoes.get(tabela, 0) + 1
+            for chave in [k for k in self._itens if k[0] in tabelas]:
+                del self._itens[chave]
+
+    def invalidar_chave(self, tabela: str, chave: Hashable) -> None:
+        """Incrementa a versao de uma unica chave e descarta a entrada"""
+        with self._lock:
+            self._versoes_chave[(tabela, chave)] = self._versoes_chave.get((tabela, chave), 0) + 1
+            self._itens.pop((tabela, chave), None)
+            if len(self._versoes_chave) > self.max_versoes_chave:
+                self._compactar_versoes_chave()
+
+    def _compactar_versoes_chave(self) -> None:
+        """Incorpora os contadores por chave a versao das tabelas (com o lock).
+
+        A versao de cada tabela envolvida sobe e os contadores das suas chaves
+        voltam a zero: cargas em andamento deixam de bater com a versao atual e
+        nao sao gravadas, e as entradas ainda validas sao mantidas com a versao
+        nova.
+        """
+        tabelas = {tabela for tabela, _ in self._versoes_chave}
+        validas = {
+            chave: valor for chave, (versao, valor) in self._itens.items()
+            if chave[0] in tabelas and versao == self._versao_atual(*chave)
+        }
+        for tabela in tabelas:
+            self._versoes[tabela] = self._versoes.get(tabela, 0) + 1
+        self._versoes_chave.clear()
+        for chave in [k for k in self._itens if k[0] in tabelas]:
+            if chave in validas:
+                self._itens[chave] = (self._versao_atual(*chave), validas[chave])
+            else:
+                del self._itens[chave]
+
+    def estatisticas(self) -> Dict:
+        """Retorna contadores de acertos/falhas e ocupacao do cache"""
+        with self._lock:
+            acertos = sum(self._acertos.values())
+            falhas = sum(self._falhas.values())
+            tabelas = sorted(set(self._acertos) | set(self._falhas))
+            return {
+                'itens': len(self._itens),
+                'max_itens': self.max_itens,
+                'acertos': acertos,
+                'falhas': falhas,
+                'taxa_acerto': round(acertos / (acertos + falhas) * 100, 1) if acertos + falhas else 0,
+                'por_tabela': {
+                    t: {'acertos': self._acertos.get(t, 0), 'falhas': self._falhas.get(t, 0)}
+                    for t in tabelas
+                }
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._itens)
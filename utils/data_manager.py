@@ -10,7 +10,14 @@ import sqlite3
 import os
 import time
 import base64
+import hashlib
+import re
+import threading
 import requests
+from contextlib import contextmanager
+
+from utils.cache import CacheCompartilhado
+from utils.pool import PoolConexoes
 
 # Verificar se tem DATABASE_URL para PostgreSQL
 DATABASE_URL = os.getenv('DATABASE_URL', '')
@@ -28,49 +35,273 @@ DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'air_
 # Flag para indicar se estamos usando PostgreSQL
 USING_POSTGRES = 'postgresql' in DATABASE_URL.lower() or 'postgres' in DATABASE_URL.lower()
 
+# Cache de leitura compartilhado por todas as sessoes do processo
+CACHE_MAX_ITENS = int(os.getenv('CACHE_MAX_ITENS', '2000'))
+_cache = CacheCompartilhado(max_itens=CACHE_MAX_ITENS)
 
-def converter_foto_para_base64(url_foto: str) -> str:
-    """
-    Converte URL de foto para base64 para salvar no banco e não depender do link externo.
-    Se a foto já estiver em base64, retorna como está.
-    """
-    if not url_foto:
-        return ''
-    
-    # Se já é base64, retorna como está
-    if url_foto.startswith('data:image'):
-        return url_foto
-    
-    # Se não é uma URL válida, retorna vazio
-    if not url_foto.startswith(('http://', 'https://')):
-        return url_foto
-    
+# Pool de conexoes PostgreSQL compartilhado por todas as sessoes do processo
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '1'))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '10'))
+DB_POOL_MAX_OCIOSO = float(os.getenv('DB_POOL_MAX_OCIOSO', '300'))
+DB_POOL_VERIFICAR_APOS = float(os.getenv('DB_POOL_VERIFICAR_APOS', '30'))
+
+# SQLite: conexoes persistentes em modo WAL (varios leitores + um escritor)
+SQLITE_POOL_MAX = int(os.getenv('SQLITE_POOL_MAX', '4'))
+SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', '30'))
+SQLITE_CACHE_KB = int(os.getenv('SQLITE_CACHE_KB', '16384'))
+SQLITE_MMAP_BYTES = int(os.getenv('SQLITE_MMAP_BYTES', str(256 * 1024 * 1024)))
+
+_pool: Optional[PoolConexoes] = None
+_pool_lock = threading.Lock()
+
+# Categorias que indicam comentario ainda nao classificado
+CATEGORIAS_PENDENTES = ('Pendente', 'Nao Classificado', '', None)
+
+# Expressao indexada (GIN) da busca de texto completo no PostgreSQL
+_TSVECTOR_COMENTARIO = "to_tsvector('portuguese', COALESCE({coluna}, ''))"
+
+# Expressao indexada (GIN com pg_trgm) da busca de influenciadores no PostgreSQL
+_TEXTO_BUSCA_INFLUENCIADOR = "LOWER(COALESCE({t}nome, '') || ' ' || COALESCE({t}usuario, ''))"
+
+
+# ========================================
+# MEDIA - IMAGENS FORA DAS LINHAS
+# ========================================
+
+# Fotos e imagens de posts ficam na tabela media, endereçadas pelo sha256 do
+# conteudo; as linhas guardam so a referencia "media:<hash>". Imagens iguais
+# sao gravadas uma unica vez.
+MEDIA_PREFIXO = 'media:'
+
+# Miniaturas geradas ao armazenar (lado maior em pixels); 'o' e o original
+MEDIA_TAMANHOS = {'p': 64, 'm': 200}
+
+
+def _detectar_mime(conteudo: bytes) -> Optional[str]:
+    """Identifica o tipo da imagem pelos primeiros bytes (None se nao for imagem)"""
+    if conteudo.startswith(b'\x89PNG'):
+        return 'image/png'
+    if conteudo.startswith(b'\xff\xd8'):
+        return 'image/jpeg'
+    if conteudo.startswith((b'GIF87a', b'GIF89a')):
+        return 'image/gif'
+    if conteudo[:4] == b'RIFF' and conteudo[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def _baixar_imagem(url: str) -> Optional[tuple]:
+    """Baixa uma imagem e retorna (bytes, mime), ou None se falhar"""
     try:
         # Fazer download da imagem com timeout
-        response = requests.get(url_foto, timeout=10, headers={
+        response = requests.get(url, timeout=10, headers={
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
         response.raise_for_status()
+    except Exception as e:
+        print(f"Erro ao baixar imagem: {e}")
+        return None
+    
+    mime = _detectar_mime(response.content)
+    if not mime:
+        return None
+    return response.content, mime
+
+
+def _decodificar_imagem(valor: str) -> Optional[tuple]:
+    """Converte data URI ou base64 puro em (bytes, mime), ou None se nao for imagem"""
+    b64 = valor.partition(',')[2] if valor.startswith('data:') else valor
+    try:
+        conteudo = base64.b64decode(b64, validate=True)
+    except Exception:
+        return None
+    
+    mime = _detectar_mime(conteudo)
+    if not mime:
+        return None
+    return conteudo, mime
+
+
+def _gerar_miniaturas(conteudo: bytes) -> Dict[str, tuple]:
+    """Gera as miniaturas de MEDIA_TAMANHOS: {tamanho: (bytes, mime)}"""
+    try:
+        import io
+        from PIL import Image
         
-        # Detectar tipo de imagem
-        content_type = response.headers.get('content-type', 'image/jpeg')
-        if 'png' in content_type:
-            mime_type = 'image/png'
-        elif 'gif' in content_type:
-            mime_type = 'image/gif'
-        elif 'webp' in content_type:
-            mime_type = 'image/webp'
+        img = Image.open(io.BytesIO(conteudo))
+        img.load()
+    except Exception as e:
+        print(f"Miniaturas nao geradas: {e}")
+        return {}
+    
+    miniaturas = {}
+    for tamanho, lado in MEDIA_TAMANHOS.items():
+        mini = img.copy()
+        mini.thumbnail((lado, lado))
+        buffer = io.BytesIO()
+        if mini.mode in ('RGBA', 'LA', 'P'):
+            mini.save(buffer, 'PNG', optimize=True)
+            miniaturas[tamanho] = (buffer.getvalue(), 'image/png')
         else:
-            mime_type = 'image/jpeg'
-        
-        # Converter para base64
-        img_base64 = base64.b64encode(response.content).decode('utf-8')
-        return f"data:{mime_type};base64,{img_base64}"
+            mini.convert('RGB').save(buffer, 'JPEG', quality=85)
+            miniaturas[tamanho] = (buffer.getvalue(), 'image/jpeg')
+    return miniaturas
+
+
+def _gravar_media(cursor, conteudo: bytes, mime: str, origem: str = None) -> str:
+    """Grava a imagem e as miniaturas no cursor informado (sem commit); retorna a referencia
+    
+    Args:
+        origem: URL de onde a imagem foi baixada (evita baixar de novo)
+    """
+    hash_media = hashlib.sha256(conteudo).hexdigest()
+    
+    cursor.execute(_adaptar_query("SELECT 1 FROM media WHERE hash = ? AND tamanho = 'o'"), (hash_media,))
+    if not cursor.fetchone():
+        now = datetime.now().isoformat()
+        versoes = {'o': (conteudo, mime), **_gerar_miniaturas(conteudo)}
+        cursor.executemany(
+            _adaptar_query('''
+                INSERT INTO media (hash, tamanho, mime, dados, bytes, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (hash, tamanho) DO NOTHING
+            '''),
+            [
+                (hash_media, tamanho, tipo, base64.b64encode(dados).decode('utf-8'), len(dados), now)
+                for tamanho, (dados, tipo) in versoes.items()
+            ]
+        )
+    
+    if origem:
+        cursor.execute(
+            _adaptar_query("UPDATE media SET origem = ? WHERE hash = ? AND tamanho = 'o'"), (origem, hash_media)
+        )
+    return MEDIA_PREFIXO + hash_media
+
+
+def _media_da_origem(url: str) -> Optional[str]:
+    """Referencia da imagem ja baixada dessa URL (None se ainda nao foi)"""
+    try:
+        row = execute_select_one("SELECT hash FROM media WHERE origem = ? AND tamanho = 'o'", (url,))
+    except Exception as e:
+        print(f"Erro ao buscar media pela origem: {e}")
+        return None
+    return MEDIA_PREFIXO + row['hash'] if row else None
+
+
+def armazenar_imagem(valor: str, baixar: bool = True, cursor=None) -> str:
+    """
+    Guarda uma imagem no media store e retorna a referencia "media:<hash>".
+    
+    Aceita URL (baixada se baixar=True), data URI ou base64 puro. Referencias
+    ja existentes voltam iguais e URLs ja baixadas antes voltam com a
+    referencia guardada, sem novo download; se nao der para obter a imagem,
+    retorna o valor original (ex.: a URL).
+    
+    Args:
+        cursor: Cursor de uma transacao em andamento (usado pelas migracoes)
+    """
+    if not valor or not isinstance(valor, str) or valor.startswith(MEDIA_PREFIXO):
+        return valor or ''
+    
+    origem = None
+    if valor.startswith(('http://', 'https://')):
+        if not baixar:
+            return valor
+        ref = _media_da_origem(valor)
+        if ref:
+            return ref
+        origem = valor
+        imagem = _baixar_imagem(valor)
+    else:
+        imagem = _decodificar_imagem(valor)
+    
+    if not imagem:
+        return valor
     
+    try:
+        if cursor is not None:
+            return _gravar_media(cursor, *imagem, origem=origem)
+        with conexao() as conn:
+            ref = _gravar_media(conn.cursor(), *imagem, origem=origem)
+            conn.commit()
+        return ref
     except Exception as e:
-        # Se falhar, retorna a URL original
-        print(f"Erro ao converter foto para base64: {e}")
-        return url_foto
+        print(f"Erro ao armazenar imagem: {e}")
+        return valor
+
+
+def _carregar_media(hash_media: str, tamanho: str) -> Optional[Dict]:
+    """Retorna {'mime', 'dados'} (base64) da versao pedida, caindo para o original"""
+    chave = (hash_media, tamanho)
+    media = _cache.get('media', chave)
+    if media is not None:
+        return media
+    
+    rows = execute_select(
+        "SELECT tamanho, mime, dados FROM media WHERE hash = ? AND tamanho IN (?, 'o')",
+        (hash_media, tamanho)
+    )
+    por_tamanho = {row['tamanho']: row for row in rows}
+    row = por_tamanho.get(tamanho) or por_tamanho.get('o')
+    if not row:
+        return None
+    
+    # Conteudo e imutavel (endereçado pelo hash), nunca precisa invalidar
+    media = {'mime': row['mime'], 'dados': row['dados']}
+    _cache.set('media', chave, media)
+    return media
+
+
+def imagem_para_exibir(valor: str, tamanho: str = 'm') -> str:
+    """
+    Resolve uma referencia do media store para data URI (para st.image / <img>).
+    
+    Args:
+        tamanho: 'p' (64px), 'm' (200px) ou 'o' (original)
+    
+    Outros valores (URL, data URI) sao retornados como estao.
+    """
+    if not valor or not isinstance(valor, str) or not valor.startswith(MEDIA_PREFIXO):
+        return valor or ''
+    
+    media = _carregar_media(valor[len(MEDIA_PREFIXO):], tamanho)
+    if not media:
+        return ''
+    return f"data:{media['mime']};base64,{media['dados']}"
+
+
+def bytes_imagem(valor: str, tamanho: str = 'm') -> Optional[bytes]:
+    """Retorna os bytes de uma referencia do media store ou de um base64 antigo"""
+    if not valor or not isinstance(valor, str):
+        return None
+    
+    if valor.startswith(MEDIA_PREFIXO):
+        media = _carregar_media(valor[len(MEDIA_PREFIXO):], tamanho)
+        return base64.b64decode(media['dados']) if media else None
+    
+    try:
+        return base64.b64decode(valor.partition(',')[2] if valor.startswith('data:') else valor)
+    except Exception:
+        return None
+
+
+def _armazenar_imagens_post(post: Dict) -> Dict:
+    """Troca imagens embutidas (base64) do post por referencias do media store"""
+    imagens = post.get('imagens')
+    if not imagens:
+        return post
+    return {**post, 'imagens': [armazenar_imagem(img, baixar=False) for img in imagens]}
+
+
+# Formatos de data aceitos nos campos digitados/importados
+FORMATOS_DATA = [
+    '%Y-%m-%d',      # 2025-12-02
+    '%d/%m/%Y',      # 02/12/2025
+    '%d-%m-%Y',      # 02-12-2025
+    '%Y/%m/%d',      # 2025/12/02
+    '%d.%m.%Y',      # 02.12.2025
+]
 
 
 def parse_data_flexivel(data_str: str) -> datetime:
@@ -78,15 +309,7 @@ def parse_data_flexivel(data_str: str) -> datetime:
     if not data_str:
         return datetime.now()
     
-    formatos = [
-        '%Y-%m-%d',      # 2025-12-02
-        '%d/%m/%Y',      # 02/12/2025
-        '%d-%m-%Y',      # 02-12-2025
-        '%Y/%m/%d',      # 2025/12/02
-        '%d.%m.%Y',      # 02.12.2025
-    ]
-    
-    for fmt in formatos:
+    for fmt in FORMATOS_DATA:
         try:
             return datetime.strptime(data_str, fmt)
         except ValueError:
@@ -95,46 +318,170 @@ def parse_data_flexivel(data_str: str) -> datetime:
     return datetime.now()
 
 
+def normalizar_data_post(data_str) -> Optional[str]:
+    """Converte data_publicacao para ISO (YYYY-MM-DD); None se vazia ou invalida.
+    ISO com horario (2025-12-02T10:00:00) usa so a data."""
+    if not data_str or not isinstance(data_str, str):
+        return None
+    
+    data_str = data_str.strip()
+    for valor in (data_str, data_str[:10]):
+        for fmt in FORMATOS_DATA:
+            try:
+                return datetime.strptime(valor, fmt).strftime('%Y-%m-%d')
+            except ValueError:
+                continue
+    return None
+
+
 def get_connection():
-    """Retorna conexao com banco de dados"""
+    """Abre uma conexao avulsa com o banco (quem chamar deve fechar).
+    
+    Para consultas use conexao(), que reaproveita as conexoes do pool.
+    """
     if USING_POSTGRES:
-        # Usar session_state para manter conexao durante a sessao
-        if 'db_conn' not in st.session_state or st.session_state.db_conn is None:
-            import psycopg2
-            from psycopg2.extras import RealDictCursor
-            st.session_state.db_conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
-        
-        # Verificar se conexao ainda esta valida
-        try:
-            cur = st.session_state.db_conn.cursor()
-            cur.execute('SELECT 1')
-            cur.fetchone()
-            return st.session_state.db_conn
-        except:
-            # Reconectar
-            import psycopg2
-            from psycopg2.extras import RealDictCursor
-            try:
-                st.session_state.db_conn.close()
-            except:
-                pass
-            st.session_state.db_conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
-            return st.session_state.db_conn
+        import psycopg2
+        from psycopg2.extras import RealDictCursor
+        return psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
     else:
         os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        conn = sqlite3.connect(DB_PATH, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False)
         conn.row_factory = sqlite3.Row
+        _configurar_sqlite(conn)
         return conn
 
 
-def invalidar_cache():
-    """Invalida cache de dados para forcar reload"""
-    if '_cache_clientes' in st.session_state:
-        del st.session_state._cache_clientes
-    if '_cache_influenciadores' in st.session_state:
-        del st.session_state._cache_influenciadores
-    if '_cache_campanhas' in st.session_state:
-        del st.session_state._cache_campanhas
+def _configurar_sqlite(conn):
+    """Aplica os pragmas de desempenho numa conexao SQLite.
+    
+    WAL deixa leitores e o escritor trabalharem ao mesmo tempo; com WAL,
+    synchronous=NORMAL so sincroniza o disco nos checkpoints e continua
+    seguro contra corrupcao.
+    """
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size=-{SQLITE_CACHE_KB}')
+        conn.execute(f'PRAGMA mmap_size={SQLITE_MMAP_BYTES}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+    except Exception as e:
+        print(f"Erro ao configurar SQLite: {e}")
+
+
+def _get_pool() -> PoolConexoes:
+    """Retorna o pool de conexoes do processo (criado no primeiro uso)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if USING_POSTGRES:
+                    _pool = PoolConexoes(
+                        get_connection,
+                        min_conexoes=DB_POOL_MIN,
+                        max_conexoes=DB_POOL_MAX,
+                        max_ocioso=DB_POOL_MAX_OCIOSO,
+                        verificar_apos=DB_POOL_VERIFICAR_APOS
+                    )
+                else:
+                    # Arquivo local: conexoes nao caem nem expiram, so sao reaproveitadas
+                    _pool = PoolConexoes(
+                        get_connection,
+                        min_conexoes=1,
+                        max_conexoes=SQLITE_POOL_MAX,
+                        max_ocioso=float('inf'),
+                        max_vida=float('inf'),
+                        verificar_apos=float('inf')
+                    )
+    return _pool
+
+
+@contextmanager
+def conexao():
+    """Empresta uma conexao do pool compartilhado para o bloco with.
+    
+    A conexao e devolvida ao final; o que nao for commitado dentro do
+    bloco e desfeito na devolucao.
+    """
+    pool = _get_pool()
+    conn = pool.obter()
+    try:
+        yield conn
+    finally:
+        pool.devolver(conn)
+
+
+def get_estatisticas_pool() -> Dict:
+    """Retorna ocupacao e contadores do pool de conexoes (vazio se nao houver pool)"""
+    if _pool is None:
+        return {}
+    return _pool.estatisticas()
+
+
+# Entidade -> (tabela do cache por id, tabela das listas que dependem dela)
+_CACHE_ENTIDADES = {
+    'cliente': ('cliente', 'clientes'),
+    'influenciador': ('influenciador', 'influenciadores'),
+    'campanha': ('campanha', 'campanhas'),
+}
+
+
+def invalidar_cache(entidade: str = None, entidade_id: int = None):
+    """Invalida cache de dados para forcar reload (vale para todas as sessoes)
+    
+    Args:
+        entidade: 'cliente', 'influenciador' ou 'campanha'. Sem entidade invalida tudo.
+        entidade_id: Invalida apenas essa entidade (e as listas que dependem dela)
+    """
+    if entidade is None:
+        tabelas = [t for par in _CACHE_ENTIDADES.values() for t in par]
+        _cache.invalidar(*tabelas)
+        return
+    
+    tabela_id, tabela_listas = _CACHE_ENTIDADES[entidade]
+    if entidade_id is None:
+        _cache.invalidar(tabela_id, tabela_listas)
+    else:
+        _cache.invalidar_chave(tabela_id, entidade_id)
+        _cache.invalidar(tabela_listas)
+
+
+def get_estatisticas_cache() -> Dict:
+    """Retorna acertos/falhas e ocupacao do cache compartilhado"""
+    return _cache.estatisticas()
+
+
+class RegistroResumo(dict):
+    """Registro com so os campos leves de uma listagem.
+    
+    Campos ausentes (foto, bio, means, posts...) sao carregados do registro
+    completo no primeiro acesso via [] ou get(); `in`, keys() e dict() enxergam
+    apenas os campos ja presentes.
+    """
+    
+    def __init__(self, dados: Dict, carregar_completo):
+        super().__init__(dados)
+        self._carregar_completo = carregar_completo
+        self._completo = False
+    
+    def _completar(self):
+        if self._completo:
+            return
+        self._completo = True
+        completo = self._carregar_completo(self['id'])
+        if completo:
+            for chave, valor in completo.items():
+                self.setdefault(chave, valor)
+    
+    def __missing__(self, chave):
+        self._completar()
+        if dict.__contains__(self, chave):
+            return dict.__getitem__(self, chave)
+        raise KeyError(chave)
+    
+    def get(self, chave, padrao=None):
+        if not dict.__contains__(self, chave):
+            self._completar()
+        return dict.get(self, chave, padrao)
 
 
 def diagnostico_db():
@@ -191,6 +538,40 @@ def diagnostico_db():
                 else:
                     st.success("Conexao rapida!")
     
+    # Cache compartilhado entre sessoes
+    st.markdown("---")
+    st.subheader("Cache Compartilhado")
+    stats_cache = get_estatisticas_cache()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Itens", f"{stats_cache['itens']}/{stats_cache['max_itens']}")
+    with col2:
+        st.metric("Acertos / Falhas", f"{stats_cache['acertos']} / {stats_cache['falhas']}")
+    with col3:
+        st.metric("Taxa de Acerto", f"{stats_cache['taxa_acerto']}%")
+    if stats_cache['por_tabela']:
+        st.caption(" | ".join(
+            f"{tabela}: {v['acertos']}/{v['falhas']}" for tabela, v in stats_cache['por_tabela'].items()
+        ))
+    
+    # Pool de conexoes compartilhado entre sessoes
+    st.markdown("---")
+    st.subheader("Pool de Conexoes")
+    stats_pool = get_estatisticas_pool()
+    if stats_pool:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Em uso / Abertas", f"{stats_pool['em_uso']}/{stats_pool['abertas']}")
+            st.caption(f"Min: {stats_pool['min_conexoes']} | Max: {stats_pool['max_conexoes']}")
+        with col2:
+            st.metric("Emprestimos", stats_pool['emprestimos'])
+            st.caption(f"Esperas: {stats_pool['esperas']} (media {stats_pool['espera_media_ms']}ms)")
+        with col3:
+            st.metric("Conexoes Criadas", stats_pool['criadas'])
+            st.caption(f"Recicladas: {stats_pool['recicladas']} | Falhas na verificacao: {stats_pool['falhas_verificacao']}")
+    else:
+        st.caption("Pool ainda nao inicializado.")
+    
     # Teste de URL customizada
     st.markdown("---")
     st.subheader("🧪 Testar Outra URL")
@@ -234,111 +615,239 @@ def diagnostico_db():
                     st.warning(f"**Lenta: Media: {media:.3f}s** - Tente outra regiao")
 
 
+def _adaptar_query(query: str) -> str:
+    """Adapta placeholders para PostgreSQL (usa %s ao inves de ?)"""
+    if USING_POSTGRES:
+        return query.replace('?', '%s')
+    return query
+
+
+def _ultimo_id(cursor):
+    """Retorna o ID do ultimo INSERT feito no cursor"""
+    if USING_POSTGRES:
+        cursor.execute("SELECT lastval()")
+        result = cursor.fetchone()
+        if not result:
+            return None
+        return result.get('lastval') if isinstance(result, dict) else result[0]
+    return cursor.lastrowid
+
+
 def execute_query(query: str, params: tuple = (), fetch: bool = False):
     """Executa query adaptando para PostgreSQL ou SQLite"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # Adaptar query para PostgreSQL (usa %s ao inves de ?)
+    query = _adaptar_query(query)
     if USING_POSTGRES:
-        query = query.replace('?', '%s')
         query = query.replace('INTEGER PRIMARY KEY AUTOINCREMENT', 'SERIAL PRIMARY KEY')
     
-    try:
+    with conexao() as conn:
+        cursor = conn.cursor()
         cursor.execute(query, params)
         
         if fetch:
-            result = cursor.fetchall()
-            if not USING_POSTGRES:
-                conn.close()
-            return result
-        else:
-            conn.commit()
-            
-            # Pegar ultimo ID inserido
-            if 'INSERT' in query.upper():
-                if USING_POSTGRES:
-                    cursor.execute("SELECT lastval()")
-                    last_id = cursor.fetchone()
-                    return last_id[0] if last_id else None
-                else:
-                    last_id = cursor.lastrowid
-                    conn.close()
-                    return last_id
-            
-            if not USING_POSTGRES:
-                conn.close()
-            return True
-    except Exception as e:
-        if not USING_POSTGRES:
-            conn.close()
-        raise e
-
-
-def execute_sql(query: str, params: tuple = ()):
-    """Executa SQL adaptando placeholders"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    if USING_POSTGRES:
-        query = query.replace('?', '%s')
-    
-    cursor.execute(query, params)
-    return cursor, conn
+            return cursor.fetchall()
+        
+        conn.commit()
+        
+        # Pegar ultimo ID inserido
+        if 'INSERT' in query.upper():
+            return _ultimo_id(cursor)
+        return True
 
 
 def execute_insert(query: str, params: tuple = ()):
     """Executa INSERT e retorna o ID inserido"""
-    cursor, conn = execute_sql(query, params)
-    conn.commit()
-    
-    if USING_POSTGRES:
-        cursor.execute("SELECT lastval()")
-        result = cursor.fetchone()
-        if result:
-            last_id = result.get('lastval') if isinstance(result, dict) else result[0]
-        else:
-            last_id = None
-        # Nao fechar - conexao fica em session_state
-    else:
-        last_id = cursor.lastrowid
-        conn.close()
-    
-    return last_id
+    with conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_adaptar_query(query), params)
+        conn.commit()
+        return _ultimo_id(cursor)
 
 
 def execute_select(query: str, params: tuple = ()):
     """Executa SELECT e retorna todas as linhas"""
-    cursor, conn = execute_sql(query, params)
-    rows = cursor.fetchall()
-    if not USING_POSTGRES:
-        conn.close()
-    return rows
+    with conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_adaptar_query(query), params)
+        return cursor.fetchall()
 
 
 def execute_select_one(query: str, params: tuple = ()):
     """Executa SELECT e retorna uma linha"""
-    cursor, conn = execute_sql(query, params)
-    row = cursor.fetchone()
-    if not USING_POSTGRES:
-        conn.close()
-    return row
+    with conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_adaptar_query(query), params)
+        return cursor.fetchone()
 
 
 def execute_update(query: str, params: tuple = ()):
     """Executa UPDATE/DELETE"""
-    cursor, conn = execute_sql(query, params)
-    conn.commit()
-    if not USING_POSTGRES:
-        conn.close()
+    with conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_adaptar_query(query), params)
+        conn.commit()
     return True
 
 
+def _em_lotes(itens: List, tamanho: int = 500):
+    """Divide uma lista em lotes (limite de parametros do SQLite em IN (...))"""
+    for inicio in range(0, len(itens), tamanho):
+        yield itens[inicio:inicio + tamanho]
+
+
+def _indice_disponivel(nome: str) -> bool:
+    """Indica se um indice de busca opcional foi criado pelas migracoes.
+    
+    FTS5 no SQLite e pg_trgm no PostgreSQL podem nao estar disponiveis; nesse
+    caso as buscas usam LIKE. O resultado fica no cache do processo.
+    """
+    disponivel = _cache.get('indices', nome)
+    if disponivel is None:
+        if USING_POSTGRES:
+            query = "SELECT COUNT(*) AS n FROM pg_indexes WHERE indexname = ?"
+        else:
+            query = "SELECT COUNT(*) AS n FROM sqlite_master WHERE name = ?"
+        disponivel = execute_select_one(query, (nome,))['n'] > 0
+        _cache.set('indices', nome, disponivel)
+    return disponivel
+
+
+def _padrao_like(texto: str, prefixo: bool = False) -> str:
+    """Monta o padrao para LOWER(coluna) LIKE ? ESCAPE '\\' (escapa % e _ digitados)"""
+    texto = texto.lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"{texto}%" if prefixo else f"%{texto}%"
+
+
+def _pagina_keyset(query: str, params: List, cursor: tuple = None, limite: int = 100,
+                   alias: str = '') -> Dict:
+    """Executa uma consulta paginada por chave (created_at, id), do mais recente ao mais antigo.
+    
+    Args:
+        query: SELECT terminando na clausula WHERE (sem ORDER BY/LIMIT)
+        params: Parametros da query
+        cursor: (created_at, id) do ultimo item da pagina anterior; None na primeira
+        limite: Itens por pagina
+        alias: Alias da tabela paginada na query
+    
+    Returns:
+        {'itens': linhas da pagina, 'cursor': cursor da proxima pagina ou None no fim}
+    """
+    col = f"{alias}." if alias else ''
+    params = list(params)
+    if cursor:
+        query += f" AND ({col}created_at, {col}id) < (?, ?)"
+        params += [cursor[0], cursor[1]]
+    query += f" ORDER BY {col}created_at DESC, {col}id DESC LIMIT ?"
+    # Uma linha a mais indica se existe proxima pagina
+    rows = execute_select(query, tuple(params + [limite + 1]))
+    
+    itens = rows[:limite]
+    proximo = None
+    if len(rows) > limite:
+        ultimo = itens[-1]
+        proximo = (ultimo['created_at'], ultimo['id'])
+    return {'itens': itens, 'cursor': proximo}
+
+
+# ========================================
+# SCHEMA - MIGRACOES VERSIONADAS
+# ========================================
+
+_bootstrap_feito = False
+_bootstrap_lock = threading.Lock()
+
+
 def init_db():
-    """Inicializa as tabelas do banco de dados"""
-    conn = get_connection()
-    cursor = conn.cursor()
+    """Aplica as migracoes pendentes, uma vez por processo.
+    
+    O Streamlit reexecuta app.py a cada interacao; depois da primeira
+    chamada bem-sucedida as seguintes retornam sem acessar o banco.
+    """
+    global _bootstrap_feito
+    if _bootstrap_feito:
+        return
+    with _bootstrap_lock:
+        if not _bootstrap_feito:
+            _bootstrap_feito = aplicar_migracoes()
+
+
+def aplicar_migracoes() -> bool:
+    """Aplica, em ordem, as migracoes ainda nao registradas em schema_version.
+    
+    Cada migracao e gravada em schema_version na mesma transacao do seu
+    ultimo commit. Os passos sao idempotentes (IF NOT EXISTS / checagem de
+    coluna), entao uma migracao interrompida pode ser reexecutada.
+    
+    Returns:
+        True se todas as migracoes estao aplicadas
+    """
+    with conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                versao INTEGER PRIMARY KEY,
+                descricao TEXT,
+                aplicada_em TEXT
+            )
+        ''')
+        conn.commit()
+        
+        cursor.execute("SELECT versao FROM schema_version")
+        aplicadas = {row['versao'] for row in cursor.fetchall()}
+        
+        for versao, descricao, migracao in MIGRACOES:
+            if versao in aplicadas:
+                continue
+            try:
+                migracao(cursor, conn)
+                cursor.execute(
+                    _adaptar_query("INSERT INTO schema_version (versao, descricao, aplicada_em) VALUES (?, ?, ?)"),
+                    (versao, descricao, datetime.now().isoformat())
+                )
+                conn.commit()
+                print(f"Migracao {versao} aplicada: {descricao}")
+            except Exception as e:
+                conn.rollback()
+                print(f"Erro na migracao {versao} ({descricao}): {str(e)}")
+                return False
     
+    return True
+
+
+def get_status_migracoes() -> List[Dict]:
+    """Lista as migracoes conhecidas com a data em que foram aplicadas (None se pendente)"""
+    try:
+        rows = execute_select("SELECT versao, aplicada_em FROM schema_version")
+        aplicadas = {row['versao']: row['aplicada_em'] for row in rows}
+    except Exception:
+        aplicadas = {}
+    
+    return [
+        {'versao': versao, 'descricao': descricao, 'aplicada_em': aplicadas.get(versao)}
+        for versao, descricao, _ in MIGRACOES
+    ]
+
+
+def _coluna_existe(cursor, tabela: str, coluna: str) -> bool:
+    """Verifica se a coluna existe na tabela"""
+    if USING_POSTGRES:
+        cursor.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_name = %s AND column_name = %s",
+            (tabela, coluna)
+        )
+        return cursor.fetchone() is not None
+    cursor.execute(f"PRAGMA table_info({tabela})")
+    return any(col[1] == coluna for col in cursor.fetchall())
+
+
+def _adicionar_colunas(cursor, colunas: List[tuple]):
+    """Adiciona colunas (tabela, coluna, tipo, default) que ainda nao existem"""
+    for tabela, coluna, tipo, default in colunas:
+        if not _coluna_existe(cursor, tabela, coluna):
+            cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {tipo} DEFAULT {default}")
+
+
+def _migracao_tabelas_base(cursor, conn):
+    """Cria as tabelas principais do sistema"""
     # Definir tipo de primary key baseado no banco
     if USING_POSTGRES:
         pk_type = "SERIAL PRIMARY KEY"
@@ -551,55 +1060,533 @@ def init_db():
             UNIQUE(influenciador_id, coluna_id)
         )
     ''')
-    
-    conn.commit()
-    
-    # ========== MIGRACOES ==========
-    # Adicionar colunas novas em tabelas existentes (para bancos ja em producao)
-    _run_migrations(cursor, conn)
-    
-    # Só fecha conexão se for SQLite (PostgreSQL usa conexão compartilhada)
-    if not USING_POSTGRES:
-        conn.close()
 
 
-def _run_migrations(cursor, conn):
-    """Executa migracoes para adicionar colunas em tabelas existentes"""
-    
-    migrations = [
-        # (tabela, coluna, tipo, default)
+def _migracao_colunas_influenciadores_campanhas(cursor, conn):
+    """Colunas que eram adicionadas por migrations/add_new_columns.sql"""
+    _adicionar_colunas(cursor, [
+        ("influenciadores", "vinculo_id", "INTEGER", "NULL"),
+        ("influenciadores", "categoria", "TEXT", "NULL"),
+        ("influenciadores", "profile_id", "TEXT", "NULL"),
+        ("campanhas", "top_conteudos", "TEXT", "NULL"),
+        ("campanhas", "colunas_personalizadas", "TEXT", "NULL"),
+    ])
+
+
+def _migracao_colunas_exibicao_campanhas(cursor, conn):
+    """Configuracoes de exibicao do relatorio por campanha"""
+    _adicionar_colunas(cursor, [
         ("campanhas", "mostrar_aba_categoria", "INTEGER", "1"),
         ("campanhas", "colunas_dinamicas_selecionadas", "TEXT", "NULL"),
-    ]
+    ])
+
+
+def _migracao_campanha_posts(cursor, conn):
+    """Tabela de posts das campanhas (um registro por post) e migracao do JSON"""
+    pk_type = "SERIAL PRIMARY KEY" if USING_POSTGRES else "INTEGER PRIMARY KEY AUTOINCREMENT"
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS campanha_posts (
+            id {pk_type},
+            campanha_id INTEGER NOT NULL,
+            influenciador_id INTEGER NOT NULL,
+            post_id INTEGER NOT NULL,
+            ordem INTEGER DEFAULT 0,
+            dados TEXT,
+            created_at TEXT,
+            updated_at TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_campanha_posts_chave
+        ON campanha_posts (campanha_id, influenciador_id, post_id)
+    ''')
+    conn.commit()
+    _migrar_posts_para_tabela(cursor, conn)
+
+
+def _migracao_indices_comentarios(cursor, conn):
+    """Indices de comentarios: busca por comment_id e unico (campanha_id, post_url, comment_id).
     
-    for table, column, col_type, default in migrations:
+    Antes do indice unico, comment_id vazio vira NULL (comentarios sem id nao
+    sao deduplicados) e duplicados ja gravados sao removidos, mantendo o mais antigo.
+    """
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_comentarios_comment_id
+        ON comentarios_posts (comment_id)
+    ''')
+    cursor.execute("UPDATE comentarios_posts SET comment_id = NULL WHERE comment_id = ''")
+    cursor.execute('''
+        DELETE FROM comentarios_posts
+        WHERE comment_id IS NOT NULL AND id NOT IN (
+            SELECT MIN(id) FROM comentarios_posts
+            WHERE comment_id IS NOT NULL
+            GROUP BY campanha_id, post_url, comment_id
+        )
+    ''')
+    if cursor.rowcount:
+        print(f"Migracao: {cursor.rowcount} comentarios duplicados removidos")
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_comentarios_chave
+        ON comentarios_posts (campanha_id, post_url, comment_id)
+    ''')
+
+
+def _ids_posts(posts: List[Dict]) -> List[int]:
+    """post_id de cada post: mantem o id original quando valido e unico, senao usa o proximo livre"""
+    ids_usados = set()
+    ids_posts = []
+    for post in posts:
+        pid = post.get('id')
+        if isinstance(pid, int) and not isinstance(pid, bool) and pid > 0 and pid not in ids_usados:
+            ids_usados.add(pid)
+            ids_posts.append(pid)
+        else:
+            ids_posts.append(None)
+    
+    proximo_id = max(ids_usados, default=0) + 1
+    for i, pid in enumerate(ids_posts):
+        if pid is None:
+            ids_posts[i] = proximo_id
+            proximo_id += 1
+    return ids_posts
+
+
+def _migrar_posts_para_tabela(cursor, conn):
+    """Move posts ainda gravados no JSON campanhas.influenciadores para campanha_posts"""
+    insert_sql = '''
+        INSERT INTO campanha_posts
+        (campanha_id, influenciador_id, post_id, ordem, dados, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    '''
+    update_sql = "UPDATE campanhas SET influenciadores = ? WHERE id = ?"
+    if USING_POSTGRES:
+        insert_sql = insert_sql.replace('?', '%s')
+        update_sql = update_sql.replace('?', '%s')
+    
+    cursor.execute("SELECT id, influenciadores FROM campanhas")
+    rows = [dict(row) for row in cursor.fetchall()]
+    
+    falhas = 0
+    for row in rows:
         try:
-            # Verificar se coluna existe
-            if USING_POSTGRES:
-                cursor.execute(f"""
-                    SELECT column_name FROM information_schema.columns 
-                    WHERE table_name = '{table}' AND column_name = '{column}'
-                """)
-            else:
-                cursor.execute(f"PRAGMA table_info({table})")
-            
-            columns = cursor.fetchall()
+            influenciadores = json.loads(row['influenciadores']) if row.get('influenciadores') else []
+        except:
+            continue
+        
+        if not any(inf.get('posts') for inf in influenciadores):
+            continue
+        
+        try:
+            now = datetime.now().isoformat()
+            for inf in influenciadores:
+                posts = inf.get('posts') or []
+                for ordem, (post, pid) in enumerate(zip(posts, _ids_posts(posts)), start=1):
+                    cursor.execute(insert_sql, (
+                        row['id'],
+                        inf.get('influenciador_id'),
+                        pid,
+                        ordem,
+                        _serializar_post(post),
+                        post.get('created_at') or now,
+                        post.get('updated_at') or now
+                    ))
             
-            # Para SQLite, verificar de forma diferente
+            cursor.execute(update_sql, (_serializar_influenciadores(influenciadores), row['id']))
+            conn.commit()
+            print(f"Migracao: Posts da campanha {row['id']} movidos para campanha_posts")
+        except Exception as e:
+            conn.rollback()
+            print(f"Migracao campanha_posts (campanha {row['id']}): {str(e)}")
+            falhas += 1
+    
+    # Nao registrar a migracao enquanto houver campanha com posts no JSON
+    if falhas:
+        raise Exception(f"{falhas} campanha(s) nao migradas para campanha_posts")
+
+
+def _migracao_indices_consultas(cursor, conn):
+    """Indices secundarios para os filtros mais usados.
+    
+    tokens_compartilhamento.token, convites.token e
+    influenciador_colunas(influenciador_id, coluna_id) ja sao indexados pelas
+    restricoes UNIQUE; comentarios_posts.campanha_id usa idx_comentarios_chave.
+    """
+    indices = [
+        "CREATE INDEX IF NOT EXISTS idx_comentarios_post_url ON comentarios_posts (post_url)",
+        "CREATE INDEX IF NOT EXISTS idx_influenciadores_profile_id ON influenciadores (profile_id)",
+        # Indice de expressao usado por get_influenciador_por_usuario
+        "CREATE INDEX IF NOT EXISTS idx_influenciadores_usuario_lower ON influenciadores (LOWER(usuario))",
+        "CREATE INDEX IF NOT EXISTS idx_insights_campanha_pagina ON insights_campanha (campanha_id, pagina, ativo)",
+        "CREATE INDEX IF NOT EXISTS idx_insights_historico_pagina ON insights_historico (campanha_id, pagina)",
+        "CREATE INDEX IF NOT EXISTS idx_tokens_campanha ON tokens_compartilhamento (campanha_id)",
+        "CREATE INDEX IF NOT EXISTS idx_influenciador_colunas_valor ON influenciador_colunas (coluna_id, valor)",
+        "CREATE INDEX IF NOT EXISTS idx_campanhas_cliente ON campanhas (cliente_id)",
+    ]
+    for sql in indices:
+        cursor.execute(sql)
+
+
+def _migracao_media(cursor, conn):
+    """Tabela media e transferencia das fotos/imagens em base64 para ela"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS media (
+            hash TEXT NOT NULL,
+            tamanho TEXT NOT NULL,
+            mime TEXT,
+            dados TEXT,
+            bytes INTEGER DEFAULT 0,
+            created_at TEXT,
+            PRIMARY KEY (hash, tamanho)
+        )
+    ''')
+    conn.commit()
+    
+    # Uma linha lida por vez (fotos em base64 sao grandes), um commit por lote
+    update_foto = _adaptar_query("UPDATE influenciadores SET foto = ? WHERE id = ?")
+    cursor.execute("SELECT id FROM influenciadores WHERE foto LIKE 'data:%'")
+    ids = [row['id'] for row in cursor.fetchall()]
+    for lote in _em_lotes(ids, 100):
+        for inf_id in lote:
+            cursor.execute(_adaptar_query("SELECT foto FROM influenciadores WHERE id = ?"), (inf_id,))
+            foto = cursor.fetchone()['foto']
+            ref = armazenar_imagem(foto, baixar=False, cursor=cursor)
+            if ref != foto:
+                cursor.execute(update_foto, (ref, inf_id))
+        conn.commit()
+    
+    # Posts com imagens embutidas no JSON (URLs continuam como estao)
+    update_post = _adaptar_query("UPDATE campanha_posts SET dados = ? WHERE id = ?")
+    cursor.execute('''SELECT id FROM campanha_posts WHERE dados LIKE '%"imagens": ["%' ''')
+    ids = [row['id'] for row in cursor.fetchall()]
+    for lote in _em_lotes(ids, 100):
+        for post_row_id in lote:
+            cursor.execute(_adaptar_query("SELECT dados FROM campanha_posts WHERE id = ?"), (post_row_id,))
+            post = json.loads(cursor.fetchone()['dados'])
+            imagens = [armazenar_imagem(img, baixar=False, cursor=cursor) for img in post.get('imagens') or []]
+            if imagens != post.get('imagens'):
+                post['imagens'] = imagens
+                cursor.execute(update_post, (json.dumps(post), post_row_id))
+        conn.commit()
+
+
+def _migracao_indices_paginacao(cursor, conn):
+    """Indices (created_at, id) para a paginacao por chave de comentarios e influenciadores.
+    
+    Linhas antigas sem created_at recebem '' para que a ordenacao seja total
+    (NULL fica fora das comparacoes de cursor).
+    """
+    cursor.execute("UPDATE comentarios_posts SET created_at = '' WHERE created_at IS NULL")
+    cursor.execute("UPDATE influenciadores SET created_at = '' WHERE created_at IS NULL")
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_comentarios_pagina
+        ON comentarios_posts (campanha_id, created_at, id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_influenciadores_pagina
+        ON influenciadores (created_at, id)
+    ''')
+
+
+def _migracao_busca_comentarios(cursor, conn):
+    """Indice de texto completo em comentarios_posts.texto.
+    
+    PostgreSQL: indice GIN sobre to_tsvector('portuguese', texto).
+    SQLite: tabela FTS5 de conteudo externo mantida por triggers. Se o SQLite
+    nao tiver FTS5, a busca continua com LIKE.
+    """
+    if USING_POSTGRES:
+        cursor.execute(f'''
+            CREATE INDEX IF NOT EXISTS idx_comentarios_texto_fts
+            ON comentarios_posts USING GIN ({_TSVECTOR_COMENTARIO.format(coluna='texto')})
+        ''')
+        return
+    
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS comentarios_fts USING fts5(
+                texto, content='comentarios_posts', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        print(f"FTS5 indisponivel, busca de comentarios usara LIKE: {e}")
+        return
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS comentarios_fts_insert AFTER INSERT ON comentarios_posts BEGIN
+            INSERT INTO comentarios_fts (rowid, texto) VALUES (new.id, new.texto);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS comentarios_fts_delete AFTER DELETE ON comentarios_posts BEGIN
+            INSERT INTO comentarios_fts (comentarios_fts, rowid, texto) VALUES ('delete', old.id, old.texto);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS comentarios_fts_update AFTER UPDATE OF texto ON comentarios_posts BEGIN
+            INSERT INTO comentarios_fts (comentarios_fts, rowid, texto) VALUES ('delete', old.id, old.texto);
+            INSERT INTO comentarios_fts (rowid, texto) VALUES (new.id, new.texto);
+        END
+    ''')
+    # Indexa os comentarios ja existentes
+    cursor.execute("INSERT INTO comentarios_fts (comentarios_fts) VALUES ('rebuild')")
+
+
+def _migracao_busca_influenciadores(cursor, conn):
+    """Indice de trigramas sobre nome e usuario dos influenciadores.
+    
+    PostgreSQL: GIN com pg_trgm (se a extensao nao puder ser criada, a busca usa LIKE).
+    SQLite: tabela FTS5 com tokenizador trigram mantida por triggers.
+    """
+    if USING_POSTGRES:
+        try:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"pg_trgm indisponivel, busca de influenciadores usara LIKE: {e}")
+            return
+        cursor.execute(f'''
+            CREATE INDEX IF NOT EXISTS idx_influenciadores_busca_trgm
+            ON influenciadores USING GIN (({_TEXTO_BUSCA_INFLUENCIADOR.format(t='')}) gin_trgm_ops)
+        ''')
+        return
+    
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS influenciadores_busca USING fts5(
+                nome, usuario, content='influenciadores', content_rowid='id',
+                tokenize='trigram'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        print(f"FTS5 trigram indisponivel, busca de influenciadores usara LIKE: {e}")
+        return
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS influenciadores_busca_insert AFTER INSERT ON influenciadores BEGIN
+            INSERT INTO influenciadores_busca (rowid, nome, usuario) VALUES (new.id, new.nome, new.usuario);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS influenciadores_busca_delete AFTER DELETE ON influenciadores BEGIN
+            INSERT INTO influenciadores_busca (influenciadores_busca, rowid, nome, usuario)
+            VALUES ('delete', old.id, old.nome, old.usuario);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS influenciadores_busca_update AFTER UPDATE OF nome, usuario ON influenciadores BEGIN
+            INSERT INTO influenciadores_busca (influenciadores_busca, rowid, nome, usuario)
+            VALUES ('delete', old.id, old.nome, old.usuario);
+            INSERT INTO influenciadores_busca (rowid, nome, usuario) VALUES (new.id, new.nome, new.usuario);
+        END
+    ''')
+    cursor.execute("INSERT INTO influenciadores_busca (influenciadores_busca) VALUES ('rebuild')")
+
+
+def _migracao_data_posts(cursor, conn):
+    """Data de publicacao normalizada em campanha_posts.data_iso e indice (campanha_id, data_iso).
+    
+    data_publicacao continua no JSON como foi digitada (dd/mm/yyyy ou ISO);
+    data_iso e gravada junto com o post e permite filtrar periodo por faixa.
+    Os posts existentes sao preenchidos aqui.
+    """
+    _adicionar_colunas(cursor, [("campanha_posts", "data_iso", "TEXT", "NULL")])
+    conn.commit()
+    
+    cursor.execute("SELECT id, dados FROM campanha_posts WHERE data_iso IS NULL")
+    atualizacoes = []
+    for row in cursor.fetchall():
+        try:
+            post = json.loads(row['dados']) if row['dados'] else {}
+        except:
+            continue
+        data_iso = normalizar_data_post(post.get('data_publicacao'))
+        if data_iso:
+            atualizacoes.append((data_iso, row['id']))
+    
+    update_sql = _adaptar_query("UPDATE campanha_posts SET data_iso = ? WHERE id = ?")
+    for lote in _em_lotes(atualizacoes):
+        cursor.executemany(update_sql, lote)
+        conn.commit()
+    
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_campanha_posts_data
+        ON campanha_posts (campanha_id, data_iso)
+    ''')
+
+
+def _migracao_metricas_campanhas(cursor, conn):
+    """Tabela campanha_metricas: totais de cada campanha mantidos nas escritas.
+
+    As linhas sao preenchidas na primeira leitura (get_metricas_campanhas) ou
+    por reconstruir_metricas_campanhas.
+    """
+    real_type = "DOUBLE PRECISION" if USING_POSTGRES else "REAL"
+    colunas = ",\n            ".join(
+        f"{coluna} {'INTEGER' if coluna in _COLUNAS_METRICAS_INTEIRAS else real_type} DEFAULT 0"
+        for coluna in COLUNAS_METRICAS_CAMPANHA
+    )
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS campanha_metricas (
+            campanha_id INTEGER PRIMARY KEY,
+            {colunas},
+            atualizado_em TEXT
+        )
+    ''')
+
+
+def _migracao_metricas_diarias(cursor, conn):
+    """Tabela campanha_metricas_diarias: posts somados por campanha/influenciador/formato/dia.
+    
+    Alimenta as series temporais (get_serie_temporal); as linhas dos posts
+    existentes sao gravadas pela migracao 14, que completa as colunas.
+    """
+    real_type = "DOUBLE PRECISION" if USING_POSTGRES else "REAL"
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS campanha_metricas_diarias (
+            campanha_id INTEGER NOT NULL,
+            influenciador_id INTEGER NOT NULL,
+            formato TEXT NOT NULL,
+            data TEXT NOT NULL,
+            views {real_type} DEFAULT 0,
+            alcance {real_type} DEFAULT 0,
+            interacoes {real_type} DEFAULT 0,
+            impressoes {real_type} DEFAULT 0,
+            posts INTEGER DEFAULT 0,
+            PRIMARY KEY (campanha_id, influenciador_id, formato, data)
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_campanha_metricas_diarias_data
+        ON campanha_metricas_diarias (campanha_id, data)
+    ''')
+
+
+def _migracao_metricas_incrementais(cursor, conn):
+    """campanha_metricas mantida por fatia (influenciador/dia) a partir de campanha_metricas_diarias.
+    
+    - campanha_metricas_diarias ganha os demais campos somados e as publicacoes
+      (regra dos Stories); posts sem data entram com data ''
+    - campanha_influenciadores: participacoes por id, para achar as campanhas
+      de um influenciador sem varrer o JSON das campanhas
+    As linhas diarias sao refeitas e campanha_metricas volta a ser calculada na leitura.
+    """
+    real_type = "DOUBLE PRECISION" if USING_POSTGRES else "REAL"
+    _adicionar_colunas(cursor, [
+        ('campanha_metricas_diarias', campo, 'INTEGER' if campo == 'publicacoes' else real_type, '0')
+        for campo in CAMPOS_METRICAS_DIARIAS
+    ])
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS campanha_influenciadores (
+            campanha_id INTEGER NOT NULL,
+            influenciador_id INTEGER NOT NULL,
+            PRIMARY KEY (campanha_id, influenciador_id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_campanha_influenciadores_inf
+        ON campanha_influenciadores (influenciador_id)
+    ''')
+    conn.commit()
+    
+    cursor.execute("SELECT id, influenciadores FROM campanhas")
+    linhas = []
+    for row in cursor.fetchall():
+        linhas.extend(_linhas_campanha_influenciadores(row['id'], _lista_influenciadores(row['influenciadores'])))
+    cursor.execute("DELETE FROM campanha_influenciadores")
+    _inserir_campanha_influenciadores(cursor, linhas)
+    
+    _reconstruir_metricas_diarias(cursor)
+    cursor.execute("DELETE FROM campanha_metricas")
+
+
+def _migracao_preencher_metricas_campanhas(cursor, conn):
+    """Grava a linha de campanha_metricas de todas as campanhas (a partir de
+    campanha_metricas_diarias); depois disso as escritas mantem as linhas e
+    as leituras nao precisam calcular nada."""
+    cursor.execute("SELECT id FROM campanhas")
+    _atualizar_metricas_campanhas(cursor, [row['id'] for row in cursor.fetchall()])
+
+
+def _migracao_media_origem(cursor, conn):
+    """Coluna media.origem (URL de onde a imagem veio) e indice para achar
+    pela URL sem baixar de novo"""
+    _adicionar_colunas(cursor, [('media', 'origem', 'TEXT', 'NULL')])
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_media_origem ON media (origem)")
+
+
+# Migracoes em ordem de aplicacao: (versao, descricao, funcao(cursor, conn)).
+# Novas mudancas de schema entram no fim da lista com a proxima versao.
+MIGRACOES = [
+    (1, "Tabelas base", _migracao_tabelas_base),
+    (2, "Colunas vinculo_id/categoria/profile_id e top_conteudos/colunas_personalizadas", _migracao_colunas_influenciadores_campanhas),
+    (3, "Colunas mostrar_aba_categoria e colunas_dinamicas_selecionadas em campanhas", _migracao_colunas_exibicao_campanhas),
+    (4, "Tabela campanha_posts e migracao dos posts do JSON", _migracao_campanha_posts),
+    (5, "Indices de comentarios (comment_id e chave unica)", _migracao_indices_comentarios),
+    (6, "Indices para os filtros mais usados", _migracao_indices_consultas),
+    (7, "Tabela media com fotos e imagens de posts fora das linhas", _migracao_media),
+    (8, "Indices (created_at, id) para paginacao de comentarios e influenciadores", _migracao_indices_paginacao),
+    (9, "Indice de texto completo dos comentarios (FTS5 / tsvector)", _migracao_busca_comentarios),
+    (10, "Indice de trigramas para busca de influenciadores (FTS5 trigram / pg_trgm)", _migracao_busca_influenciadores),
+    (11, "Data de publicacao normalizada (campanha_posts.data_iso) e indice por campanha/data", _migracao_data_posts),
+    (12, "Tabela campanha_metricas com os totais materializados de cada campanha", _migracao_metricas_campanhas),
+    (13, "Tabela campanha_metricas_diarias (campanha x influenciador x formato x dia)", _migracao_metricas_diarias),
+    (14, "Metricas de campanha por fatia diaria e tabela campanha_influenciadores", _migracao_metricas_incrementais),
+    (15, "Linhas de campanha_metricas de todas as campanhas", _migracao_preencher_metricas_campanhas),
+    (16, "Coluna media.origem com a URL de origem das imagens baixadas", _migracao_media_origem),
+]
+
+
+# Consultas que devem usar indice (verificadas por verificar_planos_indices)
+CONSULTAS_INDEXADAS = [
+    ("SELECT * FROM comentarios_posts WHERE campanha_id = ?", (1,)),
+    ("SELECT * FROM comentarios_posts WHERE post_url = ?", ('x',)),
+    ("SELECT * FROM comentarios_posts WHERE comment_id = ?", ('x',)),
+    ("SELECT * FROM tokens_compartilhamento WHERE token = ? AND ativo = 1", ('x',)),
+    ("SELECT * FROM tokens_compartilhamento WHERE campanha_id = ?", (1,)),
+    ("SELECT * FROM influenciadores WHERE profile_id = ?", ('x',)),
+    ("SELECT * FROM influenciadores WHERE LOWER(usuario) = ?", ('x',)),
+    ("SELECT * FROM insights_campanha WHERE campanha_id = ? AND pagina = ? AND ativo = 1", (1, 'x')),
+    ("SELECT coluna_id, valor FROM influenciador_colunas WHERE influenciador_id = ?", (1,)),
+    ("SELECT * FROM convites WHERE token = ? AND usado = 0", ('x',)),
+    ("SELECT id FROM campanhas WHERE cliente_id = ?", (1,)),
+    ("SELECT id FROM comentarios_posts WHERE campanha_id = ? ORDER BY created_at DESC, id DESC LIMIT 100", (1,)),
+    ("SELECT id FROM influenciadores ORDER BY created_at DESC, id DESC LIMIT 100", ()),
+    ("SELECT id FROM campanha_posts WHERE campanha_id = ? AND data_iso BETWEEN ? AND ?", (1, '2025-01-01', '2025-12-31')),
+    ("SELECT * FROM campanha_metricas_diarias WHERE campanha_id = ? AND data BETWEEN ? AND ?", (1, '2025-01-01', '2025-12-31')),
+    ("SELECT campanha_id FROM campanha_influenciadores WHERE influenciador_id = ?", (1,)),
+    ("SELECT hash FROM media WHERE origem = ? AND tamanho = 'o'", ('x',)),
+]
+
+
+def verificar_planos_indices() -> List[Dict]:
+    """Roda EXPLAIN nas CONSULTAS_INDEXADAS e indica se o plano usa indice.
+    
+    No PostgreSQL o seq scan e desligado na transacao da verificacao, senao
+    tabelas pequenas sempre aparecem com Seq Scan mesmo tendo indice.
+    
+    Returns:
+        Lista de {'query', 'usa_indice', 'plano'}
+    """
+    resultado = []
+    with conexao() as conn:
+        cursor = conn.cursor()
+        if USING_POSTGRES:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        
+        for query, params in CONSULTAS_INDEXADAS:
             if USING_POSTGRES:
-                column_exists = len(columns) > 0
+                cursor.execute("EXPLAIN " + _adaptar_query(query), params)
+                plano = [row['QUERY PLAN'] for row in cursor.fetchall()]
+                usa_indice = any('Index' in linha for linha in plano) and not any('Seq Scan' in linha for linha in plano)
             else:
-                column_exists = any(col[1] == column for col in columns)
-            
-            if not column_exists:
-                # Adicionar coluna
-                alter_sql = f"ALTER TABLE {table} ADD COLUMN {column} {col_type} DEFAULT {default}"
-                cursor.execute(alter_sql)
-                conn.commit()
-                print(f"Migracao: Adicionada coluna {column} na tabela {table}")
-        except Exception as e:
-            # Ignorar erros (coluna ja pode existir)
-            print(f"Migracao {table}.{column}: {str(e)}")
+                cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+                plano = [row['detail'] for row in cursor.fetchall()]
+                usa_indice = all('USING' in linha for linha in plano if linha.startswith(('SCAN', 'SEARCH')))
+            resultado.append({'query': query, 'usa_indice': usa_indice, 'plano': ' | '.join(plano)})
+    
+    return resultado
 
 
 # ========================================
@@ -673,20 +1660,16 @@ def get_faixas_classificacao() -> Dict:
 def salvar_faixas_classificacao(faixas: Dict) -> bool:
     """Salva faixas de classificacao"""
     if USING_POSTGRES:
-        cursor, conn = execute_sql('''
+        execute_update('''
             INSERT INTO configuracoes (chave, valor)
             VALUES (?, ?)
             ON CONFLICT (chave) DO UPDATE SET valor = EXCLUDED.valor
         ''', ('faixas_classificacao', json.dumps(faixas)))
-        conn.commit()
-        # Nao fechar - conexao fica em session_state
     else:
-        cursor, conn = execute_sql('''
+        execute_update('''
             INSERT OR REPLACE INTO configuracoes (chave, valor)
             VALUES ('faixas_classificacao', ?)
         ''', (json.dumps(faixas),))
-        conn.commit()
-        conn.close()
     return True
 
 
@@ -723,7 +1706,6 @@ def calcular_classificacao(seguidores: int) -> str:
 
 def criar_cliente(dados: Dict) -> Dict:
     """Cria novo cliente"""
-    invalidar_cache()
     cliente_id = execute_insert('''
         INSERT INTO clientes (nome, cnpj, contato, email, classificacao_cliente, created_at)
         VALUES (?, ?, ?, ?, ?, ?)
@@ -736,6 +1718,7 @@ def criar_cliente(dados: Dict) -> Dict:
         datetime.now().isoformat()
     ))
     
+    invalidar_cache('cliente', cliente_id)
     return {'id': cliente_id, **dados}
 
 
@@ -749,20 +1732,20 @@ def get_cliente(cliente_id: int) -> Optional[Dict]:
 
 
 def get_clientes() -> List[Dict]:
-    """Retorna todos os clientes (com cache)"""
-    # Cache por sessao
-    if '_cache_clientes' in st.session_state:
-        return st.session_state._cache_clientes
+    """Retorna todos os clientes (com cache compartilhado)"""
+    result = _cache.get('clientes', 'todos')
+    if result is not None:
+        return result
     
+    versao = _cache.versao('clientes')
     rows = execute_select("SELECT * FROM clientes ORDER BY nome")
     result = [dict(row) for row in rows]
-    st.session_state._cache_clientes = result
+    _cache.set('clientes', 'todos', result, versao)
     return result
 
 
 def atualizar_cliente(cliente_id: int, dados: Dict) -> bool:
     """Atualiza dados de um cliente"""
-    invalidar_cache()
     execute_update('''
         UPDATE clientes SET nome = ?, cnpj = ?, contato = ?, email = ?, classificacao_cliente = ?
         WHERE id = ?
@@ -774,13 +1757,14 @@ def atualizar_cliente(cliente_id: int, dados: Dict) -> bool:
         dados.get('classificacao_cliente', 'padrao'),
         cliente_id
     ))
+    invalidar_cache('cliente', cliente_id)
     return True
 
 
 def excluir_cliente(cliente_id: int) -> bool:
     """Exclui um cliente"""
-    invalidar_cache()
     execute_update("DELETE FROM clientes WHERE id = ?", (cliente_id,))
+    invalidar_cache('cliente', cliente_id)
     return True
 
 
@@ -790,15 +1774,14 @@ def excluir_cliente(cliente_id: int) -> bool:
 
 def criar_influenciador(dados: Dict) -> Dict:
     """Cria influenciador na base"""
-    invalidar_cache()
     classificacao = classificar_influenciador(dados.get('seguidores', 0))
     now = datetime.now().isoformat()
     
     means_json = json.dumps(dados.get('means', {})) if dados.get('means') else '{}'
     hashtags_json = json.dumps(dados.get('hashtags', [])) if dados.get('hashtags') else '[]'
     
-    # Converter foto para base64 se for URL
-    foto = converter_foto_para_base64(dados.get('foto', ''))
+    # Guardar a foto no media store (a linha fica so com a referencia)
+    foto = armazenar_imagem(dados.get('foto', ''))
     
     inf_id = execute_insert('''
         INSERT INTO influenciadores (
@@ -832,27 +1815,29 @@ def criar_influenciador(dados: Dict) -> Dict:
         now
     ))
     
-    return {'id': inf_id, 'classificacao': classificacao, **dados}
+    invalidar_cache('influenciador', inf_id)
+    return {'id': inf_id, 'classificacao': classificacao, **dados, 'foto': foto}
+
+
+def _parse_influenciador(row) -> Dict:
+    """Converte linha da tabela influenciadores em dict com means/hashtags parseados"""
+    inf = dict(row)
+    if inf.get('means'):
+        try:
+            inf['means'] = json.loads(inf['means'])
+        except:
+            inf['means'] = {}
+    if inf.get('hashtags'):
+        try:
+            inf['hashtags'] = json.loads(inf['hashtags'])
+        except:
+            inf['hashtags'] = []
+    return inf
 
 
 def get_influenciador(inf_id: int) -> Optional[Dict]:
-    """Busca influenciador por ID"""
-    row = execute_select_one("SELECT * FROM influenciadores WHERE id = ?", (inf_id,))
-    
-    if row:
-        inf = dict(row)
-        if inf.get('means'):
-            try:
-                inf['means'] = json.loads(inf['means'])
-            except:
-                inf['means'] = {}
-        if inf.get('hashtags'):
-            try:
-                inf['hashtags'] = json.loads(inf['hashtags'])
-            except:
-                inf['hashtags'] = []
-        return inf
-    return None
+    """Busca influenciador por ID (com cache compartilhado)"""
+    return get_influenciadores_por_ids([inf_id]).get(inf_id)
 
 
 def get_influenciador_por_usuario(usuario: str) -> Optional[Dict]:
@@ -860,20 +1845,7 @@ def get_influenciador_por_usuario(usuario: str) -> Optional[Dict]:
     usuario_limpo = usuario.replace('@', '').strip().lower()
     row = execute_select_one("SELECT * FROM influenciadores WHERE LOWER(usuario) = ?", (usuario_limpo,))
     
-    if row:
-        inf = dict(row)
-        if inf.get('means'):
-            try:
-                inf['means'] = json.loads(inf['means'])
-            except:
-                inf['means'] = {}
-        if inf.get('hashtags'):
-            try:
-                inf['hashtags'] = json.loads(inf['hashtags'])
-            except:
-                inf['hashtags'] = []
-        return inf
-    return None
+    return _parse_influenciador(row) if row else None
 
 
 def buscar_influenciador_por_profile_id(profile_id: str) -> Optional[Dict]:
@@ -883,100 +1855,264 @@ def buscar_influenciador_por_profile_id(profile_id: str) -> Optional[Dict]:
     
     row = execute_select_one("SELECT * FROM influenciadores WHERE profile_id = ?", (profile_id,))
     
-    if row:
-        inf = dict(row)
-        if inf.get('means'):
-            try:
-                inf['means'] = json.loads(inf['means'])
-            except:
-                inf['means'] = {}
-        if inf.get('hashtags'):
-            try:
-                inf['hashtags'] = json.loads(inf['hashtags'])
-            except:
-                inf['hashtags'] = []
-        return inf
-    return None
+    return _parse_influenciador(row) if row else None
 
 
 def get_influenciadores() -> List[Dict]:
-    """Retorna todos os influenciadores (com cache)"""
-    # Cache por sessao
-    if '_cache_influenciadores' in st.session_state:
-        return st.session_state._cache_influenciadores
+    """Retorna todos os influenciadores (com cache compartilhado)"""
+    influenciadores = _cache.get('influenciadores', 'todos')
+    if influenciadores is not None:
+        return influenciadores
     
+    versao = _cache.versao('influenciadores')
     rows = execute_select("SELECT * FROM influenciadores ORDER BY nome")
+    influenciadores = [_parse_influenciador(row) for row in rows]
+    _cache.set('influenciadores', 'todos', influenciadores, versao)
+    return influenciadores
+
+
+def get_influenciadores_resumo() -> List[RegistroResumo]:
+    """Lista leve de influenciadores para selects e filtros (sem foto, bio, means, hashtags).
     
-    influenciadores = []
-    for row in rows:
-        inf = dict(row)
-        if inf.get('means'):
-            try:
-                inf['means'] = json.loads(inf['means'])
-            except:
-                inf['means'] = {}
-        if inf.get('hashtags'):
-            try:
-                inf['hashtags'] = json.loads(inf['hashtags'])
-            except:
-                inf['hashtags'] = []
-        influenciadores.append(inf)
+    Outros campos sao carregados sob demanda, um influenciador por vez.
+    """
+    resumo = _cache.get('influenciadores', 'resumo')
+    if resumo is None:
+        versao = _cache.versao('influenciadores')
+        rows = execute_select('''
+            SELECT id, nome, usuario, network, seguidores, classificacao,
+                   categoria, profile_id, vinculo_id
+            FROM influenciadores ORDER BY nome
+        ''')
+        resumo = [dict(row) for row in rows]
+        _cache.set('influenciadores', 'resumo', resumo, versao)
+    
+    # Copias por chamada: o carregamento preguicoso nao altera o cache
+    return [RegistroResumo(inf, get_influenciador) for inf in resumo]
+
+
+def get_classificacoes_influenciadores() -> List[str]:
+    """Classificacoes distintas presentes na base (com cache compartilhado)"""
+    classificacoes = _cache.get('influenciadores', 'classificacoes')
+    if classificacoes is None:
+        versao = _cache.versao('influenciadores')
+        rows = execute_select('''
+            SELECT DISTINCT classificacao FROM influenciadores
+            WHERE classificacao IS NOT NULL AND classificacao <> ''
+            ORDER BY classificacao
+        ''')
+        classificacoes = [dict(row)['classificacao'] for row in rows]
+        _cache.set('influenciadores', 'classificacoes', classificacoes, versao)
+    return classificacoes
+
+
+def get_redes_influenciadores() -> List[str]:
+    """Redes distintas presentes na base (com cache compartilhado)"""
+    redes = _cache.get('influenciadores', 'redes')
+    if redes is None:
+        versao = _cache.versao('influenciadores')
+        rows = execute_select('''
+            SELECT DISTINCT network FROM influenciadores
+            WHERE network IS NOT NULL AND network <> ''
+            ORDER BY network
+        ''')
+        redes = [dict(row)['network'] for row in rows]
+        _cache.set('influenciadores', 'redes', redes, versao)
+    return redes
+
+
+def get_influenciadores_pagina(filtros: Dict = None, limite: int = 50, cursor: tuple = None) -> Dict:
+    """Retorna uma pagina de influenciadores (mais recentes primeiro) com filtros no banco.
     
-    st.session_state._cache_influenciadores = influenciadores
-    return influenciadores
+    Args:
+        filtros: network, classificacao e busca (contida no nome ou no usuario)
+        limite: Influenciadores por pagina
+        cursor: Cursor retornado pela pagina anterior (None na primeira)
+    
+    Returns:
+        {'itens', 'cursor' (proxima pagina ou None), 'total' (com os filtros)}
+    """
+    filtros = filtros or {}
+    where = "WHERE 1 = 1"
+    params = []
+    
+    if filtros.get('network'):
+        where += " AND network = ?"
+        params.append(filtros['network'])
+    if filtros.get('classificacao'):
+        where += " AND classificacao = ?"
+        params.append(filtros['classificacao'])
+    if filtros.get('busca'):
+        where += " AND (LOWER(nome) LIKE ? ESCAPE '\\' OR LOWER(usuario) LIKE ? ESCAPE '\\')"
+        padrao = _padrao_like(filtros['busca'])
+        params += [padrao, padrao]
+    
+    pagina = _pagina_keyset(f"SELECT * FROM influenciadores {where}", params, cursor, limite)
+    pagina['itens'] = [_parse_influenciador(row) for row in pagina['itens']]
+    pagina['total'] = execute_select_one(
+        f"SELECT COUNT(*) AS total FROM influenciadores {where}", tuple(params)
+    )['total']
+    return pagina
+
+
+def buscar_influenciadores(busca: str = '', excluir=None, network: str = None,
+                           classificacoes: List[str] = None, limite: int = 50) -> List[Dict]:
+    """Busca os influenciadores que melhor casam com o texto (nome ou usuario).
+    
+    Usa o indice de trigramas (pg_trgm / FTS5 trigram), entao o custo nao
+    depende do tamanho da base. Sem texto, retorna os de mais seguidores.
+    
+    Args:
+        busca: Trecho do nome ou do @ (a partir de 3 caracteres usa o indice)
+        excluir: Ids que nao devem aparecer (ex.: ja na campanha)
+        network: Rede social
+        classificacoes: Classificacoes aceitas (Nano, Micro, ...)
+        limite: Quantidade maxima de resultados
+    
+    Returns:
+        Lista de dicts com id, nome, usuario, network, seguidores e classificacao
+    """
+    busca = (busca or '').replace('@', '').strip().lower()
+    where = "WHERE 1 = 1"
+    params = []
+    
+    if excluir:
+        excluir = list(excluir)
+        where += f" AND i.id NOT IN ({', '.join('?' * len(excluir))})"
+        params += excluir
+    if network:
+        where += " AND i.network = ?"
+        params.append(network)
+    if classificacoes:
+        where += f" AND i.classificacao IN ({', '.join('?' * len(classificacoes))})"
+        params += list(classificacoes)
+    
+    colunas = "i.id, i.nome, i.usuario, i.network, i.seguidores, i.classificacao"
+    ordem = "i.seguidores DESC"
+    fonte = "influenciadores i"
+    
+    if len(busca) >= 3 and USING_POSTGRES and _indice_disponivel('idx_influenciadores_busca_trgm'):
+        texto = _TEXTO_BUSCA_INFLUENCIADOR.format(t='i.')
+        where += f" AND {texto} LIKE ? ESCAPE '\\'"
+        ordem = f"similarity({texto}, ?) DESC, {ordem}"
+        params += [_padrao_like(busca), busca]
+    elif len(busca) >= 3 and not USING_POSTGRES and _indice_disponivel('influenciadores_busca'):
+        # CROSS JOIN fixa a ordem: primeiro o indice de trigramas
+        fonte = """(SELECT rowid, bm25(influenciadores_busca) AS relevancia
+                    FROM influenciadores_busca WHERE influenciadores_busca MATCH ?) f
+                   CROSS JOIN influenciadores i ON i.id = f.rowid"""
+        ordem = f"f.relevancia, {ordem}"
+        params.insert(0, '"' + busca.replace('"', '""') + '"')
+    elif busca:
+        where += " AND (LOWER(i.nome) LIKE ? ESCAPE '\\' OR LOWER(i.usuario) LIKE ? ESCAPE '\\')"
+        params += [_padrao_like(busca), _padrao_like(busca)]
+    
+    rows = execute_select(
+        f"SELECT {colunas} FROM {fonte} {where} ORDER BY {ordem} LIMIT ?",
+        tuple(params + [limite])
+    )
+    return [dict(row) for row in rows]
+
+
+def get_influenciadores_por_ids(ids) -> Dict[int, Dict]:
+    """Busca varios influenciadores de uma vez (WHERE id IN).
+    
+    Returns:
+        Dict mapeando id -> influenciador (ids inexistentes ficam de fora)
+    """
+    resultado = {}
+    faltantes = []
+    for inf_id in dict.fromkeys(i for i in ids if i is not None):
+        inf = _cache.get('influenciador', inf_id)
+        if inf is None:
+            faltantes.append(inf_id)
+        else:
+            resultado[inf_id] = inf
+    
+    versoes = {inf_id: _cache.versao('influenciador', inf_id) for inf_id in faltantes}
+    for lote in _em_lotes(faltantes):
+        placeholders = ', '.join('?' for _ in lote)
+        rows = execute_select(f"SELECT * FROM influenciadores WHERE id IN ({placeholders})", tuple(lote))
+        for row in rows:
+            inf = _parse_influenciador(row)
+            _cache.set('influenciador', inf['id'], inf, versoes.get(inf['id']))
+            resultado[inf['id']] = inf
+    
+    return resultado
+
+
+def get_influenciadores_das_campanhas(campanhas: List[Dict]) -> Dict[int, Dict]:
+    """Busca em uma unica consulta todos os influenciadores presentes nas campanhas"""
+    return get_influenciadores_por_ids(
+        inf_camp.get('influenciador_id')
+        for camp in campanhas
+        for inf_camp in camp.get('influenciadores', [])
+    )
 
 
 def atualizar_influenciador(inf_id: int, dados: Dict) -> bool:
     """Atualiza dados de um influenciador"""
-    invalidar_cache()
     classificacao = classificar_influenciador(dados.get('seguidores', 0))
     now = datetime.now().isoformat()
     
     means_json = json.dumps(dados.get('means', {})) if dados.get('means') else '{}'
     hashtags_json = json.dumps(dados.get('hashtags', [])) if dados.get('hashtags') else '[]'
     
-    # Converter foto para base64 se for URL
-    foto = converter_foto_para_base64(dados.get('foto', ''))
-    
-    execute_update('''
-        UPDATE influenciadores SET
-            profile_id = ?, nome = ?, usuario = ?, network = ?, seguidores = ?,
-            foto = ?, bio = ?, engagement_rate = ?, air_score = ?, reach_rate = ?,
-            means = ?, hashtags = ?, classificacao = ?, nicho = ?, categoria = ?,
-            total_posts = ?, total_likes = ?, total_views = ?, total_comments = ?,
-            vinculo_id = ?, updated_at = ?
-        WHERE id = ?
-    ''', (
-        dados.get('profile_id', ''),
-        dados.get('nome', ''),
-        dados.get('usuario', ''),
-        dados.get('network', 'instagram'),
-        dados.get('seguidores', 0),
-        foto,
-        dados.get('bio', ''),
-        dados.get('engagement_rate', 0),
-        dados.get('air_score', 0),
-        dados.get('reach_rate', 0),
-        means_json,
-        hashtags_json,
-        classificacao,
-        dados.get('nicho', ''),
-        dados.get('categoria', ''),
-        dados.get('total_posts', 0),
-        dados.get('total_likes', 0),
-        dados.get('total_views', 0),
-        dados.get('total_comments', 0),
-        dados.get('vinculo_id'),
-        now,
-        inf_id
-    ))
+    # Guardar a foto no media store (a linha fica so com a referencia); se
+    # for a mesma ja gravada (referencia ou URL que nao baixou), fica como esta
+    foto = dados.get('foto', '')
+    atual = execute_select_one("SELECT foto FROM influenciadores WHERE id = ?", (inf_id,))
+    if not atual or foto != atual['foto']:
+        foto = armazenar_imagem(foto)
+    
+    with conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_adaptar_query('''
+            UPDATE influenciadores SET
+                profile_id = ?, nome = ?, usuario = ?, network = ?, seguidores = ?,
+                foto = ?, bio = ?, engagement_rate = ?, air_score = ?, reach_rate = ?,
+                means = ?, hashtags = ?, classificacao = ?, nicho = ?, categoria = ?,
+                total_posts = ?, total_likes = ?, total_views = ?, total_comments = ?,
+                vinculo_id = ?, updated_at = ?
+            WHERE id = ?
+        '''), (
+            dados.get('profile_id', ''),
+            dados.get('nome', ''),
+            dados.get('usuario', ''),
+            dados.get('network', 'instagram'),
+            dados.get('seguidores', 0),
+            foto,
+            dados.get('bio', ''),
+            dados.get('engagement_rate', 0),
+            dados.get('air_score', 0),
+            dados.get('reach_rate', 0),
+            means_json,
+            hashtags_json,
+            classificacao,
+            dados.get('nicho', ''),
+            dados.get('categoria', ''),
+            dados.get('total_posts', 0),
+            dados.get('total_likes', 0),
+            dados.get('total_views', 0),
+            dados.get('total_comments', 0),
+            dados.get('vinculo_id'),
+            now,
+            inf_id
+        ))
+        _atualizar_metricas_do_influenciador(cursor, inf_id)
+        conn.commit()
+    invalidar_cache('influenciador', inf_id)
     return True
 
 
 def excluir_influenciador(inf_id: int) -> bool:
     """Exclui um influenciador"""
-    invalidar_cache()
-    execute_update("DELETE FROM influenciadores WHERE id = ?", (inf_id,))
+    with conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_adaptar_query("DELETE FROM influenciadores WHERE id = ?"), (inf_id,))
+        _atualizar_metricas_do_influenciador(cursor, inf_id)
+        conn.commit()
+    invalidar_cache('influenciador', inf_id)
     return True
 
 
@@ -986,13 +2122,12 @@ def excluir_influenciador(inf_id: int) -> bool:
 
 def criar_campanha(dados: Dict) -> Dict:
     """Cria nova campanha"""
-    invalidar_cache()
     now = datetime.now().isoformat()
     
     metricas_json = json.dumps(dados.get('metricas_selecionadas', {}))
     insights_json = json.dumps(dados.get('insights_config', {}))
     categorias_json = json.dumps(dados.get('categorias_comentarios', []))
-    influenciadores_json = json.dumps(dados.get('influenciadores', []))
+    influenciadores_json = _serializar_influenciadores(dados.get('influenciadores', []))
     top_conteudos_json = json.dumps(dados.get('top_conteudos', {}))
     colunas_personalizadas_json = json.dumps(dados.get('colunas_personalizadas', {}))
     
@@ -1027,109 +2162,170 @@ def criar_campanha(dados: Dict) -> Dict:
         now
     ))
     
+    # Posts embutidos (ex.: restauracao de backup) vao para campanha_posts
+    influenciadores = dados.get('influenciadores', [])
+    linhas_posts = _linhas_posts_campanha(camp_id, influenciadores)
+    with conexao() as conn:
+        cursor = conn.cursor()
+        if linhas_posts:
+            _inserir_posts_campanha(cursor, linhas_posts)
+            _atualizar_metricas_diarias(cursor, camp_id)
+        _sincronizar_campanha_influenciadores(cursor, camp_id, influenciadores)
+        _atualizar_metricas_campanhas(cursor, [camp_id])
+        conn.commit()
+    
+    invalidar_cache('campanha', camp_id)
     return {'id': camp_id, **dados}
 
 
-def get_campanha(camp_id: int) -> Optional[Dict]:
-    """Busca campanha por ID"""
+def _parse_campanha(row) -> Dict:
+    """Converte linha da tabela campanhas em dict com campos JSON parseados"""
+    camp = dict(row)
+    # Parse JSON fields - listas
+    for field in ['metricas_selecionadas', 'categorias_comentarios', 'influenciadores']:
+        if camp.get(field):
+            try:
+                camp[field] = json.loads(camp[field])
+            except:
+                camp[field] = []
+    # Parse JSON fields - dicts
+    for field in ['insights_config', 'top_conteudos', 'colunas_personalizadas']:
+        if camp.get(field):
+            try:
+                camp[field] = json.loads(camp[field])
+            except:
+                camp[field] = {}
+        else:
+            camp[field] = {}
+    if not camp.get('influenciadores'):
+        camp['influenciadores'] = []
+    camp['is_aon'] = bool(camp.get('is_aon'))
+    camp['mostrar_aba_categoria'] = bool(camp.get('mostrar_aba_categoria', 1))
+    return camp
+
+
+def _anexar_posts(campanhas: List[Dict], posts_por_campanha: Dict) -> List[Dict]:
+    """Preenche inf['posts'] de cada campanha com os posts da tabela campanha_posts"""
+    for camp in campanhas:
+        posts_por_inf = posts_por_campanha.get(camp.get('id'), {})
+        for inf in camp.get('influenciadores', []):
+            inf['posts'] = posts_por_inf.get(inf.get('influenciador_id'), [])
+    return campanhas
+
+
+def _get_campanha_sem_posts(camp_id: int) -> Optional[Dict]:
+    """Busca campanha por ID sem carregar os posts (sem cache, para escrita)"""
     if not camp_id:
         return None
     
     row = execute_select_one("SELECT * FROM campanhas WHERE id = ?", (camp_id,))
+    return _parse_campanha(row) if row else None
+
+
+def _get_campanhas_por_ids(ids: List[int]) -> Dict[int, Dict]:
+    """Monta campanhas (com posts) a partir do cache por id, carregando so as ausentes"""
+    resultado = {}
+    faltantes = []
+    for camp_id in ids:
+        camp = _cache.get('campanha', camp_id)
+        if camp is None:
+            faltantes.append(camp_id)
+        else:
+            resultado[camp_id] = camp
+    
+    versoes = {camp_id: _cache.versao('campanha', camp_id) for camp_id in faltantes}
+    for lote in _em_lotes(faltantes):
+        placeholders = ', '.join('?' for _ in lote)
+        rows = execute_select(f"SELECT * FROM campanhas WHERE id IN ({placeholders})", tuple(lote))
+        campanhas = [_parse_campanha(row) for row in rows]
+        _anexar_posts(campanhas, _carregar_posts([c['id'] for c in campanhas]))
+        for camp in campanhas:
+            _cache.set('campanha', camp['id'], camp, versoes.get(camp['id']))
+            resultado[camp['id']] = camp
     
-    if row:
-        camp = dict(row)
-        # Parse JSON fields - listas
-        for field in ['metricas_selecionadas', 'categorias_comentarios', 'influenciadores']:
-            if camp.get(field):
-                try:
-                    camp[field] = json.loads(camp[field])
-                except:
-                    camp[field] = []
-        # Parse JSON fields - dicts
-        for field in ['insights_config', 'top_conteudos', 'colunas_personalizadas']:
-            if camp.get(field):
-                try:
-                    camp[field] = json.loads(camp[field])
-                except:
-                    camp[field] = {}
-            else:
-                camp[field] = {}
-        camp['is_aon'] = bool(camp.get('is_aon'))
-        camp['mostrar_aba_categoria'] = bool(camp.get('mostrar_aba_categoria', 1))
-        return camp
-    return None
+    return resultado
+
+
+def _get_ids_campanhas(chave: str, query: str, params: tuple = ()) -> List[int]:
+    """Lista ordenada de ids de campanhas (com cache compartilhado)"""
+    ids = _cache.get('campanhas', chave)
+    if ids is None:
+        versao = _cache.versao('campanhas', chave)
+        ids = [dict(row)['id'] for row in execute_select(query, params)]
+        _cache.set('campanhas', chave, ids, versao)
+    return ids
+
+
+def get_campanha(camp_id: int) -> Optional[Dict]:
+    """Busca campanha por ID (com cache compartilhado)"""
+    if not camp_id:
+        return None
+    return _get_campanhas_por_ids([camp_id]).get(camp_id)
 
 
 def get_campanhas() -> List[Dict]:
-    """Retorna todas as campanhas (com cache)"""
-    # Cache por sessao
-    if '_cache_campanhas' in st.session_state:
-        return st.session_state._cache_campanhas
-    
-    rows = execute_select("SELECT * FROM campanhas ORDER BY created_at DESC")
-    
-    campanhas = []
-    for row in rows:
-        camp = dict(row)
-        # Parse JSON fields - listas
-        for field in ['metricas_selecionadas', 'categorias_comentarios', 'influenciadores']:
-            if camp.get(field):
-                try:
-                    camp[field] = json.loads(camp[field])
-                except:
-                    camp[field] = []
-        # Parse JSON fields - dicts
-        for field in ['insights_config', 'top_conteudos', 'colunas_personalizadas']:
-            if camp.get(field):
-                try:
-                    camp[field] = json.loads(camp[field])
-                except:
-                    camp[field] = {}
-            else:
-                camp[field] = {}
-        camp['is_aon'] = bool(camp.get('is_aon'))
-        camp['mostrar_aba_categoria'] = bool(camp.get('mostrar_aba_categoria', 1))
-        campanhas.append(camp)
-    
-    st.session_state._cache_campanhas = campanhas
-    return campanhas
+    """Retorna todas as campanhas (com cache compartilhado)"""
+    ids = _get_ids_campanhas('todas', "SELECT id FROM campanhas ORDER BY created_at DESC")
+    por_id = _get_campanhas_por_ids(ids)
+    return [por_id[camp_id] for camp_id in ids if camp_id in por_id]
 
 
+def get_campanhas_exportacao() -> List[Dict]:
+    """Todas as campanhas com posts, lidas direto do banco (backup).
+    
+    Carrega em lotes sem passar pelo cache compartilhado: exportar nao
+    tira do cache as campanhas em uso nem copia cada uma delas.
+    """
+    ids = [dict(row)['id'] for row in execute_select("SELECT id FROM campanhas ORDER BY created_at DESC")]
+    por_id = {}
+    for lote in _em_lotes(ids):
+        placeholders = ', '.join('?' for _ in lote)
+        rows = execute_select(f"SELECT * FROM campanhas WHERE id IN ({placeholders})", tuple(lote))
+        campanhas = [_parse_campanha(row) for row in rows]
+        _anexar_posts(campanhas, _carregar_posts([c['id'] for c in campanhas]))
+        por_id.update((camp['id'], camp) for camp in campanhas)
+    return [por_id[camp_id] for camp_id in ids if camp_id in por_id]
+
 def get_campanhas_por_cliente(cliente_id: int) -> List[Dict]:
     """Retorna campanhas de um cliente"""
-    rows = execute_select("SELECT * FROM campanhas WHERE cliente_id = ? ORDER BY created_at DESC", (cliente_id,))
+    ids = _get_ids_campanhas(
+        f'cliente:{cliente_id}',
+        "SELECT id FROM campanhas WHERE cliente_id = ? ORDER BY created_at DESC",
+        (cliente_id,)
+    )
+    por_id = _get_campanhas_por_ids(ids)
+    return [por_id[camp_id] for camp_id in ids if camp_id in por_id]
+
+
+def get_campanhas_resumo(cliente_id: int = None) -> List[RegistroResumo]:
+    """Lista leve de campanhas (sem influenciadores/posts e demais JSONs).
     
-    campanhas = []
-    for row in rows:
-        camp = dict(row)
-        # Parse JSON fields
-        for field in ['influenciadores']:
-            if camp.get(field):
-                try:
-                    camp[field] = json.loads(camp[field])
-                except:
-                    camp[field] = []
-        for field in ['top_conteudos', 'colunas_personalizadas']:
-            if camp.get(field):
-                try:
-                    camp[field] = json.loads(camp[field])
-                except:
-                    camp[field] = {}
-            else:
-                camp[field] = {}
-        camp['is_aon'] = bool(camp.get('is_aon'))
-        camp['mostrar_aba_categoria'] = bool(camp.get('mostrar_aba_categoria', 1))
-        campanhas.append(camp)
+    Outros campos sao carregados sob demanda, uma campanha por vez.
     
-    return campanhas
+    Args:
+        cliente_id: Apenas as campanhas desse cliente
+    """
+    resumo = _cache.get('campanhas', 'resumo')
+    if resumo is None:
+        versao = _cache.versao('campanhas', 'resumo')
+        rows = execute_select('''
+            SELECT id, nome, cliente_id, cliente_nome, status, is_aon,
+                   data_inicio, data_fim, created_at
+            FROM campanhas ORDER BY created_at DESC
+        ''')
+        resumo = [dict(row) for row in rows]
+        _cache.set('campanhas', 'resumo', resumo, versao)
+    
+    if cliente_id is not None:
+        resumo = [c for c in resumo if c['cliente_id'] == cliente_id]
+    return [RegistroResumo(c, get_campanha) for c in resumo]
 
 
 def atualizar_campanha(camp_id: int, dados: Dict) -> bool:
-    """Atualiza dados de uma campanha"""
-    invalidar_cache()
-    # Buscar campanha atual para merge
-    campanha_atual = get_campanha(camp_id)
+    """Atualiza dados de uma campanha.
+    Posts dentro de dados['influenciadores'] sao ignorados - use as funcoes de POSTS."""
+    # Buscar campanha atual para merge (posts ficam em campanha_posts)
+    campanha_atual = _get_campanha_sem_posts(camp_id)
     if not campanha_atual:
         return False
     
@@ -1140,50 +2336,82 @@ def atualizar_campanha(camp_id: int, dados: Dict) -> bool:
     metricas_json = json.dumps(campanha_atual.get('metricas_selecionadas', {}))
     insights_json = json.dumps(campanha_atual.get('insights_config', {}))
     categorias_json = json.dumps(campanha_atual.get('categorias_comentarios', []))
-    influenciadores_json = json.dumps(campanha_atual.get('influenciadores', []))
+    influenciadores_json = _serializar_influenciadores(campanha_atual.get('influenciadores', []))
     top_conteudos_json = json.dumps(campanha_atual.get('top_conteudos', {}))
     colunas_personalizadas_json = json.dumps(campanha_atual.get('colunas_personalizadas', {}))
     
-    execute_update('''
-        UPDATE campanhas SET
-            nome = ?, cliente_id = ?, cliente_nome = ?, objetivo = ?,
-            data_inicio = ?, data_fim = ?, tipo_dados = ?, is_aon = ?,
-            status = ?, metricas_selecionadas = ?, insights_config = ?,
-            categorias_comentarios = ?, notas = ?, influenciadores = ?,
-            top_conteudos = ?, colunas_personalizadas = ?,
-            estimativa_alcance = ?, estimativa_impressoes = ?, investimento_total = ?,
-            mostrar_aba_categoria = ?
-        WHERE id = ?
-    ''', (
-        campanha_atual.get('nome', ''),
-        campanha_atual.get('cliente_id'),
-        campanha_atual.get('cliente_nome', ''),
-        campanha_atual.get('objetivo', ''),
-        campanha_atual.get('data_inicio', ''),
-        campanha_atual.get('data_fim', ''),
-        campanha_atual.get('tipo_dados', 'estatico'),
-        1 if campanha_atual.get('is_aon') else 0,
-        campanha_atual.get('status', 'ativa'),
-        metricas_json,
-        insights_json,
-        categorias_json,
-        campanha_atual.get('notas', ''),
-        influenciadores_json,
-        top_conteudos_json,
-        colunas_personalizadas_json,
-        campanha_atual.get('estimativa_alcance', 0),
-        campanha_atual.get('estimativa_impressoes', 0),
-        campanha_atual.get('investimento_total', 0),
-        1 if campanha_atual.get('mostrar_aba_categoria', True) else 0,
-        camp_id
-    ))
+    with conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_adaptar_query('''
+            UPDATE campanhas SET
+                nome = ?, cliente_id = ?, cliente_nome = ?, objetivo = ?,
+                data_inicio = ?, data_fim = ?, tipo_dados = ?, is_aon = ?,
+                status = ?, metricas_selecionadas = ?, insights_config = ?,
+                categorias_comentarios = ?, notas = ?, influenciadores = ?,
+                top_conteudos = ?, colunas_personalizadas = ?,
+                estimativa_alcance = ?, estimativa_impressoes = ?, investimento_total = ?,
+                mostrar_aba_categoria = ?
+            WHERE id = ?
+        '''), (
+            campanha_atual.get('nome', ''),
+            campanha_atual.get('cliente_id'),
+            campanha_atual.get('cliente_nome', ''),
+            campanha_atual.get('objetivo', ''),
+            campanha_atual.get('data_inicio', ''),
+            campanha_atual.get('data_fim', ''),
+            campanha_atual.get('tipo_dados', 'estatico'),
+            1 if campanha_atual.get('is_aon') else 0,
+            campanha_atual.get('status', 'ativa'),
+            metricas_json,
+            insights_json,
+            categorias_json,
+            campanha_atual.get('notas', ''),
+            influenciadores_json,
+            top_conteudos_json,
+            colunas_personalizadas_json,
+            campanha_atual.get('estimativa_alcance', 0),
+            campanha_atual.get('estimativa_impressoes', 0),
+            campanha_atual.get('investimento_total', 0),
+            1 if campanha_atual.get('mostrar_aba_categoria', True) else 0,
+            camp_id
+        ))
+        _sincronizar_campanha_influenciadores(cursor, camp_id, campanha_atual.get('influenciadores', []))
+        _atualizar_metricas_campanhas(cursor, [camp_id])
+        conn.commit()
+    invalidar_cache('campanha', camp_id)
     return True
 
 
 def excluir_campanha(camp_id: int) -> bool:
-    """Exclui uma campanha"""
+    """Exclui uma campanha (e seus posts, participacoes e metricas)"""
+    with conexao() as conn:
+        cursor = conn.cursor()
+        for tabela in ('campanha_posts', 'campanha_metricas_diarias', 'campanha_influenciadores', 'campanha_metricas'):
+            cursor.execute(_adaptar_query(f"DELETE FROM {tabela} WHERE campanha_id = ?"), (camp_id,))
+        cursor.execute(_adaptar_query("DELETE FROM campanhas WHERE id = ?"), (camp_id,))
+        conn.commit()
+    invalidar_cache('campanha', camp_id)
+    return True
+
+
+
+# Tabelas apagadas por limpar_dados (dependentes antes das principais)
+TABELAS_LIMPEZA = [
+    'campanha_posts', 'campanha_metricas', 'campanha_metricas_diarias', 'campanha_influenciadores',
+    'media', 'campanhas', 'influenciadores', 'clientes',
+]
+
+
+def limpar_dados() -> bool:
+    """Apaga campanhas, influenciadores, clientes e as tabelas ligadas a eles
+    (posts, metricas materializadas, participacoes e imagens) em uma transacao"""
+    with conexao() as conn:
+        cursor = conn.cursor()
+        for tabela in TABELAS_LIMPEZA:
+            cursor.execute(f"DELETE FROM {tabela}")
+        conn.commit()
     invalidar_cache()
-    execute_update("DELETE FROM campanhas WHERE id = ?", (camp_id,))
+    _cache.invalidar('media')
     return True
 
 
@@ -1191,9 +2419,29 @@ def excluir_campanha(camp_id: int) -> bool:
 # INFLUENCIADORES NA CAMPANHA
 # ========================================
 
+def _gravar_influenciadores_campanha(cursor, camp_id: int, influenciadores: List[Dict]):
+    """Grava a lista de influenciadores, as participacoes e a linha de metricas (sem commit)"""
+    cursor.execute(
+        _adaptar_query("UPDATE campanhas SET influenciadores = ? WHERE id = ?"),
+        (_serializar_influenciadores(influenciadores), camp_id)
+    )
+    _sincronizar_campanha_influenciadores(cursor, camp_id, influenciadores)
+    _atualizar_metricas_campanhas(cursor, [camp_id])
+
+
+def _salvar_influenciadores_campanha(camp_id: int, influenciadores: List[Dict]) -> bool:
+    """Grava apenas a lista de influenciadores da campanha (sem posts)"""
+    with conexao() as conn:
+        cursor = conn.cursor()
+        _gravar_influenciadores_campanha(cursor, camp_id, influenciadores)
+        conn.commit()
+    invalidar_cache('campanha', camp_id)
+    return True
+
+
 def adicionar_influenciador_campanha(camp_id: int, inf_id: int, custo: float = 0, categoria: str = '') -> bool:
     """Adiciona influenciador a uma campanha com custo e categoria"""
-    campanha = get_campanha(camp_id)
+    campanha = _get_campanha_sem_posts(camp_id)
     if not campanha:
         return False
     
@@ -1218,19 +2466,16 @@ def adicionar_influenciador_campanha(camp_id: int, inf_id: int, custo: float = 0
         'network': influenciador.get('network', 'instagram'),
         'custo': custo,
         'categoria': categoria or influenciador.get('categoria', ''),
-        'vinculo_id': influenciador.get('vinculo_id'),
-        'posts': []
+        'vinculo_id': influenciador.get('vinculo_id')
     }
     
     influenciadores.append(novo_inf)
-    
-    campanha['influenciadores'] = influenciadores
-    return atualizar_campanha(camp_id, campanha)
+    return _salvar_influenciadores_campanha(camp_id, influenciadores)
 
 
 def atualizar_custo_influenciador_campanha(camp_id: int, inf_id: int, custo: float) -> bool:
     """Atualiza custo de um influenciador na campanha"""
-    campanha = get_campanha(camp_id)
+    campanha = _get_campanha_sem_posts(camp_id)
     if not campanha:
         return False
     
@@ -1241,13 +2486,12 @@ def atualizar_custo_influenciador_campanha(camp_id: int, inf_id: int, custo: flo
             influenciadores[i]['custo'] = custo
             break
     
-    campanha['influenciadores'] = influenciadores
-    return atualizar_campanha(camp_id, campanha)
+    return _salvar_influenciadores_campanha(camp_id, influenciadores)
 
 
 def atualizar_classificacoes_influenciador_campanha(camp_id: int, inf_id: int, classificacoes: dict) -> bool:
     """Atualiza classificacoes especificas de um influenciador na campanha"""
-    campanha = get_campanha(camp_id)
+    campanha = _get_campanha_sem_posts(camp_id)
     if not campanha:
         return False
     
@@ -1258,31 +2502,40 @@ def atualizar_classificacoes_influenciador_campanha(camp_id: int, inf_id: int, c
             influenciadores[i]['classificacoes_especificas'] = classificacoes
             break
     
-    campanha['influenciadores'] = influenciadores
-    return atualizar_campanha(camp_id, campanha)
+    return _salvar_influenciadores_campanha(camp_id, influenciadores)
 
 
 def remover_influenciador_campanha(camp_id: int, inf_id: int) -> bool:
     """Remove influenciador de uma campanha"""
-    campanha = get_campanha(camp_id)
+    campanha = _get_campanha_sem_posts(camp_id)
     if not campanha:
         return False
     
     influenciadores = campanha.get('influenciadores', [])
     influenciadores = [inf for inf in influenciadores if inf.get('influenciador_id') != inf_id]
     
-    campanha['influenciadores'] = influenciadores
-    return atualizar_campanha(camp_id, campanha)
+    with conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            _adaptar_query("DELETE FROM campanha_posts WHERE campanha_id = ? AND influenciador_id = ?"),
+            (camp_id, inf_id)
+        )
+        _atualizar_metricas_diarias(cursor, camp_id, inf_id)
+        _gravar_influenciadores_campanha(cursor, camp_id, influenciadores)
+        conn.commit()
+    invalidar_cache('campanha', camp_id)
+    return True
 
 
 def get_influenciador_campanha(camp_id: int, inf_id: int) -> Optional[Dict]:
     """Retorna dados de um influenciador especifico na campanha"""
-    campanha = get_campanha(camp_id)
+    campanha = _get_campanha_sem_posts(camp_id)
     if not campanha:
         return None
     
     for inf in campanha.get('influenciadores', []):
         if inf.get('influenciador_id') == inf_id:
+            inf['posts'] = get_posts_influenciador(camp_id, inf_id)
             return inf
     
     return None
@@ -1295,10 +2548,11 @@ def get_influenciadores_campanha(camp_id: int) -> List[Dict]:
         return []
     
     resultado = []
+    influenciadores = get_influenciadores_das_campanhas([campanha])
     
     for inf_camp in campanha.get('influenciadores', []):
         inf_id = inf_camp.get('influenciador_id')
-        inf = get_influenciador(inf_id)
+        inf = influenciadores.get(inf_id)
         
         if inf:
             # Mesclar dados do influenciador com dados da campanha
@@ -1328,245 +2582,330 @@ def get_influenciadores_campanha(camp_id: int) -> List[Dict]:
 # ========================================
 # POSTS
 # ========================================
+# Cada post e uma linha em campanha_posts, identificada por
+# (campanha_id, influenciador_id, post_id). O JSON campanhas.influenciadores
+# guarda apenas os dados do influenciador na campanha, sem os posts.
 
-def adicionar_post(camp_id: int, inf_id: int, post_data: Dict) -> bool:
-    """Adiciona post a um influenciador na campanha"""
-    campanha = get_campanha(camp_id)
-    if not campanha:
-        return False
-    
-    influenciadores = campanha.get('influenciadores', [])
+def _serializar_post(post: Dict) -> str:
+    """Serializa post para a coluna campanha_posts.dados (id e data_iso ficam em colunas proprias)"""
+    return json.dumps({k: v for k, v in post.items() if k not in ('id', 'data_iso')})
+
+
+def _lista_influenciadores(influenciadores_json) -> List[Dict]:
+    """Lista de influenciadores de campanhas.influenciadores ([] se vazia ou invalida)"""
+    try:
+        influenciadores = json.loads(influenciadores_json) if influenciadores_json else []
+    except:
+        return []
+    return influenciadores if isinstance(influenciadores, list) else []
+
+
+def _linhas_campanha_influenciadores(camp_id: int, influenciadores: List[Dict]) -> List[tuple]:
+    """Pares (campanha_id, influenciador_id) unicos da lista da campanha"""
+    ids = dict.fromkeys(
+        inf.get('influenciador_id') for inf in influenciadores
+        if isinstance(inf, dict) and inf.get('influenciador_id') is not None
+    )
+    return [(camp_id, inf_id) for inf_id in ids]
+
+
+def _inserir_campanha_influenciadores(cursor, linhas: List[tuple]):
+    """Insere pares de _linhas_campanha_influenciadores (sem commit)"""
+    insert_sql = _adaptar_query(
+        "INSERT INTO campanha_influenciadores (campanha_id, influenciador_id) VALUES (?, ?)"
+    )
+    for lote in _em_lotes(linhas):
+        cursor.executemany(insert_sql, lote)
+
+
+def _sincronizar_campanha_influenciadores(cursor, camp_id: int, influenciadores: List[Dict]):
+    """Regrava as participacoes da campanha em campanha_influenciadores (sem commit)"""
+    cursor.execute(_adaptar_query("DELETE FROM campanha_influenciadores WHERE campanha_id = ?"), (camp_id,))
+    _inserir_campanha_influenciadores(cursor, _linhas_campanha_influenciadores(camp_id, influenciadores))
+
+
+def _serializar_influenciadores(influenciadores: List[Dict]) -> str:
+    """Serializa a lista de influenciadores da campanha sem os posts"""
+    return json.dumps([
+        {k: v for k, v in inf.items() if k != 'posts'}
+        for inf in (influenciadores or [])
+    ])
+
+
+def _parse_post(row: Dict) -> Dict:
+    """Converte linha de campanha_posts no dict de post usado pelas paginas"""
+    try:
+        post = json.loads(row['dados']) if row.get('dados') else {}
+    except:
+        post = {}
+    post['id'] = row['post_id']
+    post['data_iso'] = row.get('data_iso')
+    return post
+
+
+def _carregar_posts(camp_ids: List[int] = None) -> Dict[int, Dict[int, List[Dict]]]:
+    """Carrega posts agrupados por campanha_id -> influenciador_id -> lista ordenada"""
+    query = "SELECT campanha_id, influenciador_id, post_id, data_iso, dados FROM campanha_posts"
+    ordem = " ORDER BY campanha_id, influenciador_id, ordem, id"
+    if camp_ids is None:
+        consultas = [(query + ordem, ())]
+    else:
+        consultas = [
+            (query + f" WHERE campanha_id IN ({', '.join('?' for _ in lote)})" + ordem, tuple(lote))
+            for lote in _em_lotes(list(camp_ids))
+        ]
     
-    for i, inf in enumerate(influenciadores):
-        if inf.get('influenciador_id') == inf_id:
-            if 'posts' not in inf:
-                inf['posts'] = []
-            
-            # Gerar ID para o post
-            post_data['id'] = len(inf['posts']) + 1
-            post_data['created_at'] = datetime.now().isoformat()
-            
-            inf['posts'].append(post_data)
-            influenciadores[i] = inf
-            break
+    posts = {}
+    for sql, params in consultas:
+        for row in execute_select(sql, params):
+            row = dict(row)
+            posts.setdefault(row['campanha_id'], {}).setdefault(row['influenciador_id'], []).append(_parse_post(row))
+    return posts
+
+
+def _linhas_posts_campanha(camp_id: int, influenciadores: List[Dict]) -> List[tuple]:
+    """Linhas de campanha_posts dos posts embutidos na lista de influenciadores.
     
-    campanha['influenciadores'] = influenciadores
-    return atualizar_campanha(camp_id, campanha)
+    As imagens vao para o media store aqui, antes da transacao que grava as linhas.
+    """
+    now = datetime.now().isoformat()
+    linhas = []
+    for inf in influenciadores:
+        posts = inf.get('posts') or []
+        for ordem, (post, pid) in enumerate(zip(posts, _ids_posts(posts)), start=1):
+            post = _armazenar_imagens_post(post)
+            linhas.append((
+                camp_id, inf.get('influenciador_id'), pid, ordem, _serializar_post(post),
+                normalizar_data_post(post.get('data_publicacao')),
+                post.get('created_at') or now, post.get('updated_at') or now
+            ))
+    return linhas
+
+
+def _inserir_posts_campanha(cursor, linhas: List[tuple]):
+    """Insere linhas de _linhas_posts_campanha (sem commit)"""
+    insert_sql = _adaptar_query('''
+        INSERT INTO campanha_posts
+        (campanha_id, influenciador_id, post_id, ordem, dados, data_iso, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''')
+    for lote in _em_lotes(linhas):
+        cursor.executemany(insert_sql, lote)
 
 
-def atualizar_post(camp_id: int, inf_id: int, post_id: int, post_data: Dict) -> bool:
-    """Atualiza um post existente"""
-    campanha = get_campanha(camp_id)
+def _influenciador_na_campanha(camp_id: int, inf_id: int) -> bool:
+    """Verifica se o influenciador faz parte da campanha"""
+    campanha = _get_campanha_sem_posts(camp_id)
     if not campanha:
         return False
+    return any(inf.get('influenciador_id') == inf_id for inf in campanha.get('influenciadores', []))
+
+
+def _travar_campanha(cursor, camp_id: int):
+    """Bloqueia a campanha ate o fim da transacao.
     
-    influenciadores = campanha.get('influenciadores', [])
-    
-    for i, inf in enumerate(influenciadores):
-        if inf.get('influenciador_id') == inf_id:
-            posts = inf.get('posts', [])
-            for j, post in enumerate(posts):
-                if post.get('id') == post_id:
-                    post_data['id'] = post_id
-                    post_data['updated_at'] = datetime.now().isoformat()
-                    posts[j] = post_data
-                    break
-            inf['posts'] = posts
-            influenciadores[i] = inf
-            break
+    Escritas de posts da mesma campanha ficam em fila, entao post_id/ordem
+    (MAX + 1) e a diferenca aplicada em campanha_metricas partem sempre do
+    estado ja gravado pela escrita anterior.
+    """
+    if USING_POSTGRES:
+        cursor.execute(_adaptar_query("SELECT id FROM campanhas WHERE id = ? FOR UPDATE"), (camp_id,))
+    else:
+        # SQLite tem um escritor por vez: escrever ja pega o lock do banco
+        cursor.execute("UPDATE campanhas SET id = id WHERE id = ?", (camp_id,))
+
+
+def _post_no_indice(cursor, camp_id: int, inf_id: int, post_idx: int) -> Optional[Dict]:
+    """id e data_iso do post na posicao post_idx do influenciador (None se nao existe)"""
+    cursor.execute(_adaptar_query('''
+        SELECT id, data_iso FROM campanha_posts
+        WHERE campanha_id = ? AND influenciador_id = ?
+        ORDER BY ordem, id LIMIT 1 OFFSET ?
+    '''), (camp_id, inf_id, post_idx))
+    row = cursor.fetchone()
+    return dict(row) if row else None
+
+
+def adicionar_post(camp_id: int, inf_id: int, post_data: Dict) -> bool:
+    """Adiciona post a um influenciador na campanha"""
+    if not _influenciador_na_campanha(camp_id, inf_id):
+        return False
     
-    campanha['influenciadores'] = influenciadores
-    return atualizar_campanha(camp_id, campanha)
+    now = datetime.now().isoformat()
+    post_data['created_at'] = now
+    dados = _serializar_post(_armazenar_imagens_post(post_data))
+    data_iso = normalizar_data_post(post_data.get('data_publicacao'))
+    
+    with conexao() as conn:
+        cursor = conn.cursor()
+        _travar_campanha(cursor, camp_id)
+        # post_id e ordem calculados no proprio INSERT (proximo da sequencia do influenciador)
+        cursor.execute(_adaptar_query('''
+            INSERT INTO campanha_posts
+            (campanha_id, influenciador_id, post_id, ordem, dados, data_iso, created_at, updated_at)
+            SELECT ?, ?, COALESCE(MAX(post_id), 0) + 1, COALESCE(MAX(ordem), 0) + 1, ?, ?, ?, ?
+            FROM campanha_posts WHERE campanha_id = ? AND influenciador_id = ?
+        '''), (camp_id, inf_id, dados, data_iso, now, now, camp_id, inf_id))
+        _atualizar_metricas_diarias(cursor, camp_id, inf_id, [data_iso])
+        conn.commit()
+    invalidar_cache('campanha', camp_id)
+    return True
+
+
+def atualizar_post(camp_id: int, inf_id: int, post_id: int, post_data: Dict) -> bool:
+    """Atualiza um post existente"""
+    now = datetime.now().isoformat()
+    post_data['id'] = post_id
+    post_data['updated_at'] = now
+    dados = _serializar_post(_armazenar_imagens_post(post_data))
+    data_iso = normalizar_data_post(post_data.get('data_publicacao'))
+    
+    with conexao() as conn:
+        cursor = conn.cursor()
+        _travar_campanha(cursor, camp_id)
+        cursor.execute(_adaptar_query(
+            "SELECT data_iso FROM campanha_posts WHERE campanha_id = ? AND influenciador_id = ? AND post_id = ?"
+        ), (camp_id, inf_id, post_id))
+        anterior = cursor.fetchone()
+        if anterior:
+            cursor.execute(_adaptar_query('''
+                UPDATE campanha_posts SET dados = ?, data_iso = ?, updated_at = ?
+                WHERE campanha_id = ? AND influenciador_id = ? AND post_id = ?
+            '''), (dados, data_iso, now, camp_id, inf_id, post_id))
+            _atualizar_metricas_diarias(cursor, camp_id, inf_id, [anterior['data_iso'], data_iso])
+        conn.commit()
+    invalidar_cache('campanha', camp_id)
+    return True
 
 
 def excluir_post(camp_id: int, inf_id: int, post_id: int) -> bool:
     """Exclui um post"""
-    campanha = get_campanha(camp_id)
-    if not campanha:
-        return False
-    
-    influenciadores = campanha.get('influenciadores', [])
-    
-    for i, inf in enumerate(influenciadores):
-        if inf.get('influenciador_id') == inf_id:
-            posts = inf.get('posts', [])
-            posts = [p for p in posts if p.get('id') != post_id]
-            inf['posts'] = posts
-            influenciadores[i] = inf
-            break
-    
-    campanha['influenciadores'] = influenciadores
-    return atualizar_campanha(camp_id, campanha)
+    with conexao() as conn:
+        cursor = conn.cursor()
+        _travar_campanha(cursor, camp_id)
+        cursor.execute(_adaptar_query(
+            "SELECT data_iso FROM campanha_posts WHERE campanha_id = ? AND influenciador_id = ? AND post_id = ?"
+        ), (camp_id, inf_id, post_id))
+        anterior = cursor.fetchone()
+        if anterior:
+            cursor.execute(_adaptar_query(
+                "DELETE FROM campanha_posts WHERE campanha_id = ? AND influenciador_id = ? AND post_id = ?"
+            ), (camp_id, inf_id, post_id))
+            _atualizar_metricas_diarias(cursor, camp_id, inf_id, [anterior['data_iso']])
+        conn.commit()
+    invalidar_cache('campanha', camp_id)
+    return True
 
 
 def atualizar_post_campanha(camp_id: int, inf_id: int, post_idx: int, post_data: Dict) -> bool:
-    """Atualiza um post existente pelo indice"""
-    campanha = get_campanha(camp_id)
-    if not campanha:
+    """Atualiza um post existente pelo indice"""
+    if post_idx < 0:
         return False
     
-    influenciadores = campanha.get('influenciadores', [])
-    
-    for i, inf in enumerate(influenciadores):
-        if inf.get('influenciador_id') == inf_id:
-            posts = inf.get('posts', [])
-            if 0 <= post_idx < len(posts):
-                post_data['updated_at'] = datetime.now().isoformat()
-                posts[post_idx] = post_data
-                inf['posts'] = posts
-                influenciadores[i] = inf
-            break
-    
-    campanha['influenciadores'] = influenciadores
-    return atualizar_campanha(camp_id, campanha)
+    now = datetime.now().isoformat()
+    post_data['updated_at'] = now
+    dados = _serializar_post(_armazenar_imagens_post(post_data))
+    data_iso = normalizar_data_post(post_data.get('data_publicacao'))
+    
+    with conexao() as conn:
+        cursor = conn.cursor()
+        _travar_campanha(cursor, camp_id)
+        anterior = _post_no_indice(cursor, camp_id, inf_id, post_idx)
+        if anterior:
+            cursor.execute(
+                _adaptar_query("UPDATE campanha_posts SET dados = ?, data_iso = ?, updated_at = ? WHERE id = ?"),
+                (dados, data_iso, now, anterior['id'])
+            )
+            _atualizar_metricas_diarias(cursor, camp_id, inf_id, [anterior['data_iso'], data_iso])
+        conn.commit()
+    invalidar_cache('campanha', camp_id)
+    return True
 
 
 def remover_post_campanha(camp_id: int, inf_id: int, post_idx: int) -> bool:
     """Remove um post pelo indice"""
-    campanha = get_campanha(camp_id)
-    if not campanha:
+    if post_idx < 0:
         return False
     
-    influenciadores = campanha.get('influenciadores', [])
-    
-    for i, inf in enumerate(influenciadores):
-        if inf.get('influenciador_id') == inf_id:
-            posts = inf.get('posts', [])
-            if 0 <= post_idx < len(posts):
-                posts.pop(post_idx)
-                inf['posts'] = posts
-                influenciadores[i] = inf
-            break
-    
-    campanha['influenciadores'] = influenciadores
-    return atualizar_campanha(camp_id, campanha)
+    with conexao() as conn:
+        cursor = conn.cursor()
+        _travar_campanha(cursor, camp_id)
+        anterior = _post_no_indice(cursor, camp_id, inf_id, post_idx)
+        if anterior:
+            cursor.execute(_adaptar_query("DELETE FROM campanha_posts WHERE id = ?"), (anterior['id'],))
+            _atualizar_metricas_diarias(cursor, camp_id, inf_id, [anterior['data_iso']])
+        conn.commit()
+    invalidar_cache('campanha', camp_id)
+    return True
 
 
 def get_posts_influenciador(camp_id: int, inf_id: int) -> List[Dict]:
     """Retorna todos os posts de um influenciador na campanha"""
-    inf_camp = get_influenciador_campanha(camp_id, inf_id)
-    if inf_camp:
-        return inf_camp.get('posts', [])
-    return []
+    rows = execute_select('''
+        SELECT campanha_id, influenciador_id, post_id, data_iso, dados FROM campanha_posts
+        WHERE campanha_id = ? AND influenciador_id = ?
+        ORDER BY ordem, id
+    ''', (camp_id, inf_id))
+    return [_parse_post(dict(row)) for row in rows]
 
 
 # ========================================
 # METRICAS
 # ========================================
 
-def calcular_metricas_campanha(campanha: Dict) -> Dict:
-    """Calcula metricas agregadas de uma campanha. Stories do mesmo dia/influenciador = 1 publicacao, alcance = maior valor."""
-    
-    total_influenciadores = 0
-    total_seguidores = 0
-    total_posts = 0
-    total_views = 0
-    total_alcance = 0
-    total_interacoes = 0
-    total_impressoes = 0
-    total_curtidas = 0
-    total_comentarios = 0
-    total_compartilhamentos = 0
-    total_saves = 0
-    total_cliques_link = 0
-    total_conversoes = 0
-    total_custo = 0
-    
-    influenciadores = campanha.get('influenciadores', [])
-    total_influenciadores = len(influenciadores)
+def calcular_metricas_campanha(campanha: Dict, influenciadores_base: Dict[int, Dict] = None) -> Dict:
+    """Calcula metricas agregadas de uma campanha (regras de utils.metricas).
+    influenciadores_base (id -> influenciador) evita nova consulta quando ja carregado."""
+    from utils.metricas import MotorMetricas
+    return MotorMetricas([campanha], influenciadores_base).totais()
+
+
+def agrupar_influenciadores_vinculados(inf_ids, influenciadores_base: Dict[int, Dict] = None) -> Dict[int, int]:
+    """Agrupa influenciadores ligados por vinculo_id (union-find em uma passada).
     
-    for inf_camp in influenciadores:
-        inf = get_influenciador(inf_camp.get('influenciador_id'))
-        inf_id = inf_camp.get('influenciador_id')
-        if inf:
-            total_seguidores += inf.get('seguidores', 0)
-        
-        # Custo do influenciador na campanha
-        total_custo += inf_camp.get('custo', 0)
-        
-        posts = inf_camp.get('posts', [])
-        stories_datas = set()  # Para contar datas unicas de Stories
-        stories_alcance_max = 0  # Maior alcance de stories deste influenciador
-        
-        for post in posts:
-            formato = post.get('formato', 'Outro')
-            data_post = post.get('data_publicacao', '')
-            
-            # Contagem de posts: Stories do mesmo dia = 1 publicacao
-            if formato == 'Stories':
-                if data_post and data_post not in stories_datas:
-                    stories_datas.add(data_post)
-                    total_posts += 1
-                elif not data_post:
-                    total_posts += 1
-                
-                # Para Stories: pegar o MAIOR alcance (nao somar)
-                alcance_story = post.get('alcance', 0) or 0
-                if alcance_story > stories_alcance_max:
-                    stories_alcance_max = alcance_story
-                
-                # Views, impressoes e interacoes de stories ainda somam
-                total_views += post.get('views', 0) or 0
-                total_impressoes += post.get('impressoes', 0) or 0
-                total_interacoes += post.get('interacoes', 0) or 0
-            else:
-                total_posts += 1
-                # Para outros formatos: somar normalmente
-                total_views += post.get('views', 0) or 0
-                total_impressoes += post.get('impressoes', 0) or 0
-                total_alcance += post.get('alcance', 0) or 0
-                total_interacoes += post.get('interacoes', 0) or 0
-            
-            total_curtidas += post.get('curtidas', 0) or 0
-            # comentarios pode ser lista de objetos ou numero
-            comentarios = post.get('comentarios', 0)
-            if isinstance(comentarios, list):
-                total_comentarios += len(comentarios)
-            elif isinstance(comentarios, int):
-                total_comentarios += comentarios
-            # comentarios_qtd e o campo numerico
-            total_comentarios += post.get('comentarios_qtd', 0) or 0
-            total_compartilhamentos += post.get('compartilhamentos', 0) or 0
-            total_saves += post.get('saves', 0) or 0
-            total_cliques_link += post.get('cliques_link', 0) or 0
-            total_cliques_link += post.get('clique_link', 0) or 0
-            total_conversoes += post.get('conversoes', 0) or 0
-            total_conversoes += post.get('cupom_conversoes', 0) or 0
-        
-        # Somar o maior alcance de stories deste influenciador ao total
-        total_alcance += stories_alcance_max
+    Apenas vinculos entre ids do proprio conjunto unem grupos; ids que nao
+    existem na base ficam de fora.
     
-    engajamento_efetivo = 0
-    taxa_alcance = 0
+    Returns:
+        Dict mapeando id -> id do grupo (menor id do grupo)
+    """
+    ids = set(i for i in inf_ids if i is not None)
+    if influenciadores_base is None:
+        influenciadores_base = get_influenciadores_por_ids(ids)
     
-    # Total combinado de views e impressoes (sempre somar)
-    total_imp_combinado = total_views + total_impressoes
+    pai = {i: i for i in ids if i in influenciadores_base}
     
-    if total_imp_combinado > 0:
-        engajamento_efetivo = round((total_interacoes / total_imp_combinado) * 100, 2)
+    def raiz(i):
+        while pai[i] != i:
+            pai[i] = pai[pai[i]]
+            i = pai[i]
+        return i
     
-    if total_seguidores > 0:
-        taxa_alcance = round((total_alcance / total_seguidores) * 100, 2)
+    for inf_id in pai:
+        vinculo_id = influenciadores_base[inf_id].get('vinculo_id')
+        if vinculo_id in pai:
+            a, b = raiz(inf_id), raiz(vinculo_id)
+            if a != b:
+                pai[max(a, b)] = min(a, b)
     
-    return {
-        'total_influenciadores': total_influenciadores,
-        'total_seguidores': total_seguidores,
-        'total_posts': total_posts,
-        'total_views': total_views,
-        'total_alcance': total_alcance,
-        'total_interacoes': total_interacoes,
-        'total_impressoes': total_impressoes,
-        'total_imp_combinado': total_imp_combinado,
-        'total_curtidas': total_curtidas,
-        'total_comentarios': total_comentarios,
-        'total_compartilhamentos': total_compartilhamentos,
-        'total_saves': total_saves,
-        'total_cliques_link': total_cliques_link,
-        'total_conversoes': total_conversoes,
-        'total_custo': total_custo,
-        'engajamento_efetivo': engajamento_efetivo,
-        'taxa_alcance': taxa_alcance
-    }
+    return {i: raiz(i) for i in pai}
+
+
+def contar_influenciadores_unicos(inf_ids, influenciadores_base: Dict[int, Dict] = None) -> int:
+    """Conta influenciadores unicos - contas vinculadas contam como 1"""
+    return len(set(agrupar_influenciadores_vinculados(inf_ids, influenciadores_base).values()))
+
+
+# Metricas de cliente sem campanhas
+_METRICAS_CLIENTE_VAZIO = {
+    'total_campanhas': 0,
+    'total_influenciadores': 0,
+    'total_posts': 0,
+    'total_views': 0,
+    'total_alcance': 0,
+    'total_interacoes': 0,
+    'engajamento_efetivo': 0
+}
 
 
 def calcular_metricas_por_cliente(cliente_id: int) -> Dict:
@@ -1574,232 +2913,478 @@ def calcular_metricas_por_cliente(cliente_id: int) -> Dict:
     campanhas = get_campanhas_por_cliente(cliente_id)
     
     if not campanhas:
-        return {
-            'total_campanhas': 0,
-            'total_influenciadores': 0,
-            'total_posts': 0,
-            'total_views': 0,
-            'total_alcance': 0,
-            'total_interacoes': 0,
-            'engajamento_efetivo': 0
-        }
+        return dict(_METRICAS_CLIENTE_VAZIO)
     
     metricas = calcular_metricas_multiplas_campanhas(campanhas)
     metricas['total_campanhas'] = len(campanhas)
     return metricas
 
 
-def calcular_metricas_multiplas_campanhas(campanhas: List[Dict]) -> Dict:
-    """Calcula metricas agregadas de multiplas campanhas.
+def calcular_metricas_todos_clientes() -> Dict[int, Dict]:
+    """Metricas de todos os clientes de uma vez (cliente_id -> mesmas chaves de calcular_metricas_por_cliente).
+    
+    Carrega as campanhas e os influenciadores uma vez e agrupa por cliente
+    no motor de metricas; clientes sem campanhas saem zerados.
+    """
+    from utils.metricas import MotorMetricas
+    campanhas = get_campanhas()
+    cliente_por_campanha = {c['id']: c.get('cliente_id') for c in campanhas if c.get('cliente_id') is not None}
+    totais = MotorMetricas(campanhas).totais_por(cliente_por_campanha)
+    
+    qtd_campanhas = {}
+    for cliente_id in cliente_por_campanha.values():
+        qtd_campanhas[cliente_id] = qtd_campanhas.get(cliente_id, 0) + 1
+    
+    resultado = {}
+    for cliente in get_clientes():
+        cliente_id = cliente['id']
+        if cliente_id in totais:
+            resultado[cliente_id] = {**totais[cliente_id], 'total_campanhas': qtd_campanhas[cliente_id]}
+        else:
+            resultado[cliente_id] = dict(_METRICAS_CLIENTE_VAZIO)
+    return resultado
+
+
+def calcular_metricas_multiplas_campanhas(campanhas: List[Dict], influenciadores_base: Dict[int, Dict] = None) -> Dict:
+    """Calcula metricas agregadas de multiplas campanhas (regras de utils.metricas).
     Influenciadores vinculados contam como 1 apenas."""
+    from utils.metricas import MotorMetricas
+    return MotorMetricas(campanhas, influenciadores_base).totais()
+
+
+def calcular_metricas_influenciador_campanha(campanha: Dict, inf_id: int, influenciadores_base: Dict[int, Dict] = None) -> Dict:
+    """Calcula metricas de um influenciador especifico na campanha ({} se nao participa)"""
+    from utils.metricas import MotorMetricas
+    return MotorMetricas([campanha], influenciadores_base).totais_influenciador(inf_id)
+
+
+# Colunas de campanha_metricas (mesmas chaves de MotorMetricas.totais)
+COLUNAS_METRICAS_CAMPANHA = [
+    'total_influenciadores', 'total_seguidores', 'total_posts', 'total_views',
+    'total_alcance', 'total_interacoes', 'total_impressoes', 'total_imp_combinado',
+    'total_curtidas', 'total_comentarios', 'total_compartilhamentos', 'total_saves',
+    'total_cliques_link', 'total_conversoes', 'total_custo',
+    'engajamento_efetivo', 'taxa_alcance', 'cpm_campanha', 'cpe_campanha', 'cpa_campanha',
+]
+_COLUNAS_METRICAS_INTEIRAS = {'total_influenciadores', 'total_posts'}
+
+# Campos somados em campanha_metricas_diarias (impressoes = views + impressoes do post).
+# publicacoes/alcance_publicacoes seguem a regra dos Stories (mesmo dia = 1 publicacao
+# com o maior alcance); alcance e a soma simples, usada nas series
+CAMPOS_METRICAS_DIARIAS = [
+    'views', 'alcance', 'interacoes', 'impressoes', 'curtidas', 'comentarios',
+    'compartilhamentos', 'saves', 'cliques_link', 'conversoes', 'posts',
+    'publicacoes', 'alcance_publicacoes',
+]
+# Soma de campanha_metricas_diarias -> coluna de campanha_metricas
+_TOTAIS_DAS_METRICAS_DIARIAS = {
+    'views': 'total_views',
+    'interacoes': 'total_interacoes',
+    'impressoes': 'total_imp_combinado',
+    'curtidas': 'total_curtidas',
+    'comentarios': 'total_comentarios',
+    'compartilhamentos': 'total_compartilhamentos',
+    'saves': 'total_saves',
+    'cliques_link': 'total_cliques_link',
+    'conversoes': 'total_conversoes',
+    'publicacoes': 'total_posts',
+    'alcance_publicacoes': 'total_alcance',
+}
+CAMPOS_SERIE_TEMPORAL = ['views', 'alcance', 'interacoes', 'impressoes']
+AGRUPAMENTOS_SERIE = ('dia', 'semana', 'mes')
+
+
+def _gravar_linhas_metricas(cursor, metricas_por_campanha: Dict[int, Dict]):
+    """Substitui as linhas de campanha_metricas das campanhas informadas (sem commit)"""
+    now = datetime.now().isoformat()
+    colunas = ', '.join(COLUNAS_METRICAS_CAMPANHA)
+    placeholders = ', '.join('?' for _ in range(len(COLUNAS_METRICAS_CAMPANHA) + 2))
+    linhas = [
+        (camp_id, *[metricas.get(coluna, 0) or 0 for coluna in COLUNAS_METRICAS_CAMPANHA], now)
+        for camp_id, metricas in metricas_por_campanha.items()
+    ]
+    for lote in _em_lotes(linhas):
+        ids = tuple(linha[0] for linha in lote)
+        cursor.execute(
+            _adaptar_query(f"DELETE FROM campanha_metricas WHERE campanha_id IN ({', '.join('?' for _ in ids)})"),
+            ids
+        )
+        cursor.executemany(_adaptar_query(f'''
+            INSERT INTO campanha_metricas (campanha_id, {colunas}, atualizado_em)
+            VALUES ({placeholders})
+        '''), lote)
+
+
+def _completar_metricas(metricas: Dict) -> Dict:
+    """Preenche total_impressoes e as taxas de um dict com os demais totais"""
+    from utils.metricas import taxas
+    for coluna, valor in metricas.items():
+        valor = round(float(valor), 6)
+        metricas[coluna] = int(valor) if valor.is_integer() else valor
+    metricas['total_impressoes'] = metricas['total_imp_combinado'] - metricas['total_views']
+    metricas.update(taxas(
+        metricas['total_interacoes'], metricas['total_imp_combinado'], metricas['total_alcance'],
+        metricas['total_seguidores'], metricas['total_custo']
+    ))
+    return {coluna: metricas[coluna] for coluna in COLUNAS_METRICAS_CAMPANHA}
+
+
+def _calcular_metricas_campanhas(cursor, ids: List[int]) -> Dict[int, Dict]:
+    """Calcula os totais de cada campanha sem carregar os posts.
     
-    total_influenciadores = 0
-    total_seguidores = 0
-    total_posts = 0
-    total_views = 0
-    total_alcance = 0
-    total_interacoes = 0
-    total_impressoes = 0
-    total_curtidas = 0
-    total_comentarios = 0
-    total_compartilhamentos = 0
-    total_saves = 0
-    total_cliques_link = 0
-    total_conversoes = 0
-    total_custo = 0
+    A parte dos posts e a soma das linhas de campanha_metricas_diarias; custo,
+    seguidores e influenciadores vem da lista de participacoes da campanha
+    (uma consulta de influenciadores para todas). Usa o cursor informado, entao
+    enxerga o que a transacao ja gravou.
+    """
+    from utils.metricas import totais_participacoes
+    somas_diarias = ', '.join(f"SUM({campo}) AS {campo}" for campo in _TOTAIS_DAS_METRICAS_DIARIAS)
+    somas_por_campanha = {}
+    participacoes = {}
+    for lote in _em_lotes(list(ids)):
+        placeholders = ', '.join('?' for _ in lote)
+        cursor.execute(_adaptar_query(f'''
+            SELECT campanha_id, {somas_diarias} FROM campanha_metricas_diarias
+            WHERE campanha_id IN ({placeholders}) GROUP BY campanha_id
+        '''), tuple(lote))
+        for row in cursor.fetchall():
+            row = dict(row)
+            somas_por_campanha[row.pop('campanha_id')] = row
+        cursor.execute(
+            _adaptar_query(f"SELECT id, influenciadores FROM campanhas WHERE id IN ({placeholders})"), tuple(lote)
+        )
+        for row in cursor.fetchall():
+            participacoes[row['id']] = _lista_influenciadores(row['influenciadores'])
     
-    influenciadores_ids = set()
-    vinculos_processados = set()  # Para nao contar vinculados duplicados
+    influenciadores_base = {}
+    ids_influenciadores = list(dict.fromkeys(
+        inf.get('influenciador_id') for influenciadores in participacoes.values() for inf in influenciadores
+        if inf.get('influenciador_id') is not None
+    ))
+    for lote in _em_lotes(ids_influenciadores):
+        cursor.execute(_adaptar_query(
+            f"SELECT id, seguidores, vinculo_id FROM influenciadores WHERE id IN ({', '.join('?' for _ in lote)})"
+        ), tuple(lote))
+        for row in cursor.fetchall():
+            influenciadores_base[row['id']] = dict(row)
+    
+    resultado = {}
+    for camp_id, influenciadores in participacoes.items():
+        somas = somas_por_campanha.get(camp_id, {})
+        metricas = {coluna: somas.get(campo) or 0 for campo, coluna in _TOTAIS_DAS_METRICAS_DIARIAS.items()}
+        metricas.update(totais_participacoes(influenciadores, influenciadores_base))
+        resultado[camp_id] = _completar_metricas(metricas)
+    return resultado
+
+
+def _atualizar_metricas_campanhas(cursor, ids: List[int]):
+    """Recalcula e grava as linhas de campanha_metricas das campanhas (sem commit)"""
+    for lote in _em_lotes(list(ids), 100):
+        _gravar_linhas_metricas(cursor, _calcular_metricas_campanhas(cursor, lote))
+
+
+def _atualizar_metricas_do_influenciador(cursor, inf_id: int):
+    """Recalcula as metricas das campanhas em que o influenciador participa
+    (seguidores e vinculo entram nos totais), sem commit"""
+    cursor.execute(_adaptar_query(
+        "SELECT campanha_id FROM campanha_influenciadores WHERE influenciador_id = ?"
+    ), (inf_id,))
+    _atualizar_metricas_campanhas(cursor, [row['campanha_id'] for row in cursor.fetchall()])
+
+
+def _linha_metricas(row) -> Dict:
+    """Converte uma linha de campanha_metricas no dict de totais"""
+    metricas = {}
+    for coluna in COLUNAS_METRICAS_CAMPANHA:
+        valor = row[coluna] if row[coluna] is not None else 0
+        if coluna.startswith('total_') and coluna != 'total_custo' and float(valor).is_integer():
+            valor = int(valor)
+        metricas[coluna] = valor
+    return metricas
+
+
+def get_metricas_campanhas(ids: List[int]) -> Dict[int, Dict]:
+    """Totais materializados por campanha (id -> mesmas chaves de calcular_metricas_campanha).
     
-    for campanha in campanhas:
-        influenciadores = campanha.get('influenciadores', [])
-        
-        for inf_camp in influenciadores:
-            inf_id = inf_camp.get('influenciador_id')
-            
-            if inf_id not in influenciadores_ids:
-                influenciadores_ids.add(inf_id)
-                inf = get_influenciador(inf_id)
-                if inf:
-                    total_seguidores += inf.get('seguidores', 0)
-                    
-                    # Verificar se este influ tem vinculo
-                    vinculo_id = inf.get('vinculo_id')
-                    if vinculo_id:
-                        # Se o vinculado ja foi processado, nao conta este
-                        if vinculo_id in vinculos_processados:
-                            # Ja contou o par, nao incrementa total_influenciadores
-                            pass
-                        else:
-                            # Marca ambos como processados e conta como 1
-                            vinculos_processados.add(inf_id)
-                            vinculos_processados.add(vinculo_id)
-                    else:
-                        # Sem vinculo, conta normalmente (marcando como processado)
-                        vinculos_processados.add(inf_id)
-            
-            # Custo do influenciador na campanha
-            total_custo += inf_camp.get('custo', 0)
-            
-            posts = inf_camp.get('posts', [])
-            total_posts += len(posts)
-            
-            for post in posts:
-                total_views += post.get('views', 0) or 0
-                total_alcance += post.get('alcance', 0) or 0
-                total_interacoes += post.get('interacoes', 0) or 0
-                total_impressoes += post.get('impressoes', 0) or 0
-                total_curtidas += post.get('curtidas', 0) or 0
-                # comentarios pode ser lista de objetos ou numero
-                comentarios = post.get('comentarios', 0)
-                if isinstance(comentarios, list):
-                    total_comentarios += len(comentarios)
-                elif isinstance(comentarios, int):
-                    total_comentarios += comentarios
-                total_comentarios += post.get('comentarios_qtd', 0) or 0
-                total_compartilhamentos += post.get('compartilhamentos', 0) or 0
-                total_saves += post.get('saves', 0) or 0
-                total_cliques_link += post.get('cliques_link', 0) or 0
-                total_cliques_link += post.get('clique_link', 0) or 0
-                total_conversoes += post.get('conversoes', 0) or 0
-                total_conversoes += post.get('cupom_conversoes', 0) or 0
-    
-    # Conta influenciadores unicos (vinculados = 1)
-    total_influenciadores = len(vinculos_processados) - len([v for v in vinculos_processados if get_influenciador(v) and get_influenciador(v).get('vinculo_id') in vinculos_processados and v > get_influenciador(v).get('vinculo_id', 0)])
-    
-    # Simplificar: contar quantos "grupos" de influenciadores existem
-    # Cada influ sem vinculo = 1, cada par vinculado = 1
-    grupos_contados = set()
-    for inf_id in influenciadores_ids:
-        inf = get_influenciador(inf_id)
-        if inf:
-            vinculo_id = inf.get('vinculo_id')
-            if vinculo_id and vinculo_id in influenciadores_ids:
-                # Par vinculado - usa o menor ID como identificador do grupo
-                grupo_id = min(inf_id, vinculo_id)
-            else:
-                grupo_id = inf_id
-            grupos_contados.add(grupo_id)
+    Le uma linha por campanha de campanha_metricas; as que ainda nao tem linha
+    sao calculadas e gravadas na hora.
+    """
+    ids = [camp_id for camp_id in dict.fromkeys(ids) if camp_id]
+    resultado = {}
+    try:
+        for lote in _em_lotes(ids):
+            placeholders = ', '.join('?' for _ in lote)
+            rows = execute_select(
+                f"SELECT * FROM campanha_metricas WHERE campanha_id IN ({placeholders})", tuple(lote)
+            )
+            for row in rows:
+                row = dict(row)
+                resultado[row['campanha_id']] = _linha_metricas(row)
+    except Exception as e:
+        print(f"Erro ao ler campanha_metricas: {e}")
     
-    total_influenciadores = len(grupos_contados)
+    faltantes = [camp_id for camp_id in ids if camp_id not in resultado]
+    if faltantes:
+        with conexao() as conn:
+            cursor = conn.cursor()
+            calculadas = _calcular_metricas_campanhas(cursor, faltantes)
+            try:
+                _gravar_linhas_metricas(cursor, calculadas)
+                conn.commit()
+            except Exception as e:
+                print(f"Erro ao gravar campanha_metricas: {e}")
+        resultado.update(calculadas)
     
-    engajamento_efetivo = 0
-    taxa_alcance = 0
+    return resultado
+
+
+def reconstruir_metricas_campanhas() -> int:
+    """Recalcula campanha_metricas (e campanha_influenciadores) de todas as campanhas (reparo).
     
-    total_imp_views = total_impressoes + total_views
-    if total_imp_views > 0:
-        engajamento_efetivo = round((total_interacoes / total_imp_views) * 100, 2)
+    Parte das linhas de campanha_metricas_diarias: rode reconstruir_metricas_diarias antes.
     
-    if total_seguidores > 0:
-        taxa_alcance = round((total_alcance / total_seguidores) * 100, 2)
+    Returns:
+        Quantidade de campanhas recalculadas
+    """
+    with conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, influenciadores FROM campanhas")
+        ids = []
+        linhas = []
+        for row in cursor.fetchall():
+            ids.append(row['id'])
+            linhas.extend(_linhas_campanha_influenciadores(row['id'], _lista_influenciadores(row['influenciadores'])))
+        cursor.execute("DELETE FROM campanha_influenciadores")
+        _inserir_campanha_influenciadores(cursor, linhas)
+        cursor.execute("DELETE FROM campanha_metricas")
+        _atualizar_metricas_campanhas(cursor, ids)
+        conn.commit()
+    return len(ids)
+
+
+def _agregar_posts_por_dia(rows) -> List[tuple]:
+    """Soma linhas de campanha_posts (campanha_id, influenciador_id, data_iso, dados)
+    por campanha/influenciador/formato/dia, com as regras de utils.metricas.
     
-    # Calcular eficiencia de gasto da campanha
-    cpm_campanha = round((total_custo / total_imp_views * 1000), 2) if total_imp_views > 0 else 0
-    cpe_campanha = round((total_custo / total_interacoes), 2) if total_interacoes > 0 else 0
-    cpa_campanha = round((total_custo / total_alcance * 1000), 2) if total_alcance > 0 else 0
+    Posts sem data ficam no dia ''. Cada linha sai como a chave seguida de
+    CAMPOS_METRICAS_DIARIAS, na ordem.
+    """
+    from utils.metricas import metricas_post
+    somas = {}
+    for row in rows:
+        try:
+            post = json.loads(row['dados']) if row['dados'] else {}
+        except:
+            continue
+        valores = metricas_post(post)
+        valores['impressoes'] = valores['impressoes_total']
+        chave = (row['campanha_id'], row['influenciador_id'], post.get('formato') or 'Outro', row['data_iso'] or '')
+        linha = somas.setdefault(chave, dict.fromkeys(CAMPOS_METRICAS_DIARIAS, 0))
+        for campo in CAMPOS_METRICAS_DIARIAS:
+            if campo in valores:
+                linha[campo] += valores[campo]
+        linha['posts'] += 1
+        linha['alcance_publicacoes'] = max(linha['alcance_publicacoes'], valores['alcance'])
     
-    return {
-        'total_influenciadores': total_influenciadores,
-        'total_seguidores': total_seguidores,
-        'total_posts': total_posts,
-        'total_views': total_views,
-        'total_alcance': total_alcance,
-        'total_interacoes': total_interacoes,
-        'total_impressoes': total_impressoes,
-        'total_curtidas': total_curtidas,
-        'total_comentarios': total_comentarios,
-        'total_compartilhamentos': total_compartilhamentos,
-        'total_saves': total_saves,
-        'total_cliques_link': total_cliques_link,
-        'total_conversoes': total_conversoes,
-        'total_custo': total_custo,
-        'engajamento_efetivo': engajamento_efetivo,
-        'taxa_alcance': taxa_alcance,
-        'cpm_campanha': cpm_campanha,
-        'cpe_campanha': cpe_campanha,
-        'cpa_campanha': cpa_campanha
-    }
+    resultado = []
+    for chave, linha in somas.items():
+        # Stories do mesmo dia: 1 publicacao com o maior alcance; o resto conta post a post
+        if not (chave[2] == 'Stories' and chave[3]):
+            linha['publicacoes'] = linha['posts']
+            linha['alcance_publicacoes'] = linha['alcance']
+        else:
+            linha['publicacoes'] = 1
+        resultado.append(chave + tuple(linha[campo] for campo in CAMPOS_METRICAS_DIARIAS))
+    return resultado
 
 
-def calcular_metricas_influenciador_campanha(campanha: Dict, inf_id: int) -> Dict:
-    """Calcula metricas de um influenciador especifico na campanha"""
-    
-    inf_camp = None
-    for inf in campanha.get('influenciadores', []):
-        if inf.get('influenciador_id') == inf_id:
-            inf_camp = inf
-            break
+def _inserir_metricas_diarias(cursor, linhas: List[tuple]):
+    """Insere linhas agregadas por _agregar_posts_por_dia (sem commit)"""
+    insert_sql = _adaptar_query(f'''
+        INSERT INTO campanha_metricas_diarias
+        (campanha_id, influenciador_id, formato, data, {', '.join(CAMPOS_METRICAS_DIARIAS)})
+        VALUES ({', '.join('?' for _ in range(len(CAMPOS_METRICAS_DIARIAS) + 4))})
+    ''')
+    for lote in _em_lotes(linhas):
+        cursor.executemany(insert_sql, lote)
+
+
+def _somar_metricas_diarias(cursor, filtro: str, params: tuple) -> Dict:
+    """Somas de CAMPOS_METRICAS_DIARIAS nas linhas diarias do filtro"""
+    somas = ', '.join(f"SUM({campo}) AS {campo}" for campo in CAMPOS_METRICAS_DIARIAS)
+    cursor.execute(_adaptar_query(f"SELECT {somas} FROM campanha_metricas_diarias WHERE {filtro}"), params)
+    row = cursor.fetchone()
+    return {campo: (row[campo] if row else 0) or 0 for campo in CAMPOS_METRICAS_DIARIAS}
+
+
+def _aplicar_diferenca_metricas(cursor, camp_id: int, diferenca: Dict):
+    """Soma a diferenca das linhas diarias na linha de campanha_metricas (sem commit).
     
-    if not inf_camp:
-        return {}
+    Sem linha nao ha o que ajustar: ela e calculada inteira na proxima leitura.
+    """
+    cursor.execute(_adaptar_query("SELECT * FROM campanha_metricas WHERE campanha_id = ?"), (camp_id,))
+    row = cursor.fetchone()
+    if not row:
+        return
+    metricas = _linha_metricas(dict(row))
+    for campo, coluna in _TOTAIS_DAS_METRICAS_DIARIAS.items():
+        metricas[coluna] += diferenca[campo]
+    _gravar_linhas_metricas(cursor, {camp_id: _completar_metricas(metricas)})
+
+
+def _atualizar_metricas_diarias(cursor, camp_id: int, inf_id: int = None, datas: List[str] = None):
+    """Refaz as linhas diarias de uma fatia a partir dos posts e ajusta
+    campanha_metricas pela diferenca (sem commit: roda na transacao da escrita).
     
-    inf = get_influenciador(inf_id)
-    seguidores = inf.get('seguidores', 0) if inf else 0
+    Args:
+        camp_id: Campanha
+        inf_id: Influenciador da fatia (None = todos da campanha)
+        datas: data_iso dos dias afetados (None/'' = posts sem data); sem a
+            lista, todos os dias
+    """
+    filtro = "campanha_id = ?"
+    params = (camp_id,)
+    if inf_id is not None:
+        filtro += " AND influenciador_id = ?"
+        params += (inf_id,)
+    filtro_posts = filtro
+    if datas is not None:
+        datas = tuple(sorted({data or '' for data in datas}))
+        placeholders = ', '.join('?' for _ in datas)
+        filtro += f" AND data IN ({placeholders})"
+        filtro_posts += f" AND COALESCE(data_iso, '') IN ({placeholders})"
+        params += datas
+    
+    anteriores = _somar_metricas_diarias(cursor, filtro, params)
+    cursor.execute(_adaptar_query(
+        f"SELECT campanha_id, influenciador_id, data_iso, dados FROM campanha_posts WHERE {filtro_posts}"
+    ), params)
+    linhas = _agregar_posts_por_dia(cursor.fetchall())
+    cursor.execute(_adaptar_query(f"DELETE FROM campanha_metricas_diarias WHERE {filtro}"), params)
+    _inserir_metricas_diarias(cursor, linhas)
+    diferenca = {
+        campo: sum(linha[4 + i] for linha in linhas) - anteriores[campo]
+        for i, campo in enumerate(CAMPOS_METRICAS_DIARIAS)
+    }
+    _aplicar_diferenca_metricas(cursor, camp_id, diferenca)
+
+
+def _reconstruir_metricas_diarias(cursor) -> int:
+    """Refaz campanha_metricas_diarias a partir de todos os posts (sem commit)"""
+    cursor.execute("SELECT campanha_id, influenciador_id, data_iso, dados FROM campanha_posts")
+    linhas = _agregar_posts_por_dia(cursor.fetchall())
+    cursor.execute("DELETE FROM campanha_metricas_diarias")
+    _inserir_metricas_diarias(cursor, linhas)
+    return len(linhas)
+
+
+def reconstruir_metricas_diarias() -> int:
+    """Refaz campanha_metricas_diarias a partir de todos os posts (reparo).
     
-    total_posts = 0
-    total_views = 0
-    total_alcance = 0
-    total_interacoes = 0
-    total_impressoes = 0
-    total_curtidas = 0
-    total_comentarios = 0
-    total_compartilhamentos = 0
-    total_saves = 0
-    total_cliques_link = 0
-    total_conversoes = 0
+    Returns:
+        Quantidade de linhas gravadas
+    """
+    with conexao() as conn:
+        total = _reconstruir_metricas_diarias(conn.cursor())
+        conn.commit()
+    return total
+
+
+def _expressao_periodo(agrupamento: str) -> str:
+    """Expressao SQL do inicio do periodo de r.data ('YYYY-MM-DD'; 'YYYY-MM' no mes)"""
+    if agrupamento == 'mes':
+        return "substr(r.data, 1, 7)"
+    if agrupamento == 'semana':
+        if USING_POSTGRES:
+            return "to_char(date_trunc('week', CAST(r.data AS DATE)), 'YYYY-MM-DD')"
+        return "date(r.data, '-6 days', 'weekday 1')"
+    return "r.data"
+
+
+def get_serie_temporal(campanha_ids: List[int], data_ini=None, data_fim=None, agrupamento: str = 'dia',
+                       influenciadores=None, detalhar: tuple = ()) -> List[Dict]:
+    """Serie de metricas por periodo a partir de campanha_metricas_diarias.
     
-    # Custo do influenciador na campanha
-    total_custo = inf_camp.get('custo', 0)
+    Considera apenas influenciadores cadastrados e posts com data (data <> '').
     
-    posts = inf_camp.get('posts', [])
-    total_posts = len(posts)
+    Args:
+        campanha_ids: Campanhas somadas na serie
+        data_ini, data_fim: Janela inclusive (date ou 'YYYY-MM-DD'); None = sem limite
+        agrupamento: 'dia', 'semana' (inicio na segunda) ou 'mes'
+        influenciadores: Ids a considerar (None = todos)
+        detalhar: Quebras dentro do periodo: 'influenciador' e/ou 'formato'
     
-    for post in posts:
-        total_views += post.get('views', 0) or 0
-        total_alcance += post.get('alcance', 0) or 0
-        total_interacoes += post.get('interacoes', 0) or 0
-        total_impressoes += post.get('impressoes', 0) or 0
-        total_curtidas += post.get('curtidas', 0) or 0
-        # comentarios pode ser lista de objetos ou numero
-        comentarios = post.get('comentarios', 0)
-        if isinstance(comentarios, list):
-            total_comentarios += len(comentarios)
-        elif isinstance(comentarios, int):
-            total_comentarios += comentarios
-        total_comentarios += post.get('comentarios_qtd', 0) or 0
-        total_compartilhamentos += post.get('compartilhamentos', 0) or 0
-        total_saves += post.get('saves', 0) or 0
-        total_cliques_link += post.get('cliques_link', 0) or 0
-        total_cliques_link += post.get('clique_link', 0) or 0
-        total_conversoes += post.get('conversoes', 0) or 0
-        total_conversoes += post.get('cupom_conversoes', 0) or 0
-    
-    engajamento_efetivo = 0
-    taxa_alcance = 0
-    
-    if total_views > 0:
-        engajamento_efetivo = round((total_interacoes / total_views) * 100, 2)
-    
-    if seguidores > 0:
-        taxa_alcance = round((total_alcance / seguidores) * 100, 2)
+    Returns:
+        Uma linha por periodo (e quebra), em ordem: periodo, views, alcance,
+        interacoes, impressoes (views + impressoes), posts, seguidores (somados
+        por post), influenciadores (unicos) e seguidores_influenciadores (dos
+        unicos); com as quebras, influenciador_id/nome e formato
+    """
+    if agrupamento not in AGRUPAMENTOS_SERIE:
+        raise ValueError(f"Agrupamento invalido: {agrupamento}")
+    ids_influenciadores = set(influenciadores) if influenciadores is not None else None
+    
+    periodo = _expressao_periodo(agrupamento)
+    grupo = ["r.influenciador_id", "i.nome", "i.seguidores"]
+    if 'formato' in detalhar:
+        grupo.append("r.formato")
+    filtros = " AND r.data <> ''"
+    params_janela = []
+    if data_ini is not None:
+        filtros += " AND r.data >= ?"
+        params_janela.append(str(data_ini)[:10])
+    if data_fim is not None:
+        filtros += " AND r.data <= ?"
+        params_janela.append(str(data_fim)[:10])
+    
+    series = {}
+    for lote in _em_lotes([c for c in campanha_ids if c]):
+        placeholders = ', '.join('?' for _ in lote)
+        rows = execute_select(f'''
+            SELECT {periodo} AS periodo, {', '.join(grupo)},
+                   SUM(r.views) AS views, SUM(r.alcance) AS alcance, SUM(r.interacoes) AS interacoes,
+                   SUM(r.impressoes) AS impressoes, SUM(r.posts) AS posts
+            FROM campanha_metricas_diarias r
+            JOIN influenciadores i ON i.id = r.influenciador_id
+            WHERE r.campanha_id IN ({placeholders}){filtros}
+            GROUP BY {periodo}, {', '.join(grupo)}
+        ''', tuple(lote) + tuple(params_janela))
+        
+        for row in rows:
+            row = dict(row)
+            inf_id = row['influenciador_id']
+            if ids_influenciadores is not None and inf_id not in ids_influenciadores:
+                continue
+            chave = (row['periodo'],)
+            item = {'periodo': row['periodo']}
+            if 'influenciador' in detalhar:
+                chave += (inf_id,)
+                item.update(influenciador_id=inf_id, nome=row['nome'])
+            if 'formato' in detalhar:
+                chave += (row['formato'],)
+                item['formato'] = row['formato']
+            if chave not in series:
+                series[chave] = {**item, **dict.fromkeys(CAMPOS_SERIE_TEMPORAL, 0), 'posts': 0,
+                                 'seguidores': 0, '_seguidores_por_influenciador': {}}
+            item = series[chave]
+            for campo in CAMPOS_SERIE_TEMPORAL:
+                item[campo] += row[campo] or 0
+            seguidores = row['seguidores'] or 0
+            item['posts'] += int(row['posts'] or 0)
+            item['seguidores'] += seguidores * int(row['posts'] or 0)
+            item['_seguidores_por_influenciador'][inf_id] = seguidores
     
-    return {
-        'seguidores': seguidores,
-        'total_posts': total_posts,
-        'total_views': total_views,
-        'total_alcance': total_alcance,
-        'total_interacoes': total_interacoes,
-        'total_impressoes': total_impressoes,
-        'total_curtidas': total_curtidas,
-        'total_comentarios': total_comentarios,
-        'total_compartilhamentos': total_compartilhamentos,
-        'total_saves': total_saves,
-        'total_cliques_link': total_cliques_link,
-        'total_conversoes': total_conversoes,
-        'total_custo': total_custo,
-        'engajamento_efetivo': engajamento_efetivo,
-        'taxa_alcance': taxa_alcance
-    }
+    resultado = []
+    for chave in sorted(series, key=lambda c: tuple(str(v) for v in c)):
+        item = series[chave]
+        seguidores_por_influenciador = item.pop('_seguidores_por_influenciador')
+        item['influenciadores'] = len(seguidores_por_influenciador)
+        item['seguidores_influenciadores'] = sum(seguidores_por_influenciador.values())
+        for campo in CAMPOS_SERIE_TEMPORAL:
+            if float(item[campo]).is_integer():
+                item[campo] = int(item[campo])
+        resultado.append(item)
+    return resultado
 
 
 # ========================================
@@ -1834,31 +3419,25 @@ def salvar_configuracoes(config: Dict) -> bool:
 # ========================================
 
 def get_estatisticas_dashboard() -> Dict:
-    """Retorna estatisticas para o dashboard"""
-    clientes = get_clientes()
-    influenciadores = get_influenciadores()
-    campanhas = get_campanhas()
-    
-    campanhas_ativas = [c for c in campanhas if c.get('status') == 'ativa']
-    
-    total_posts = 0
-    total_alcance = 0
+    """Retorna estatisticas para o dashboard (contagens e somas feitas no banco).
     
-    for camp in campanhas:
-        for inf in camp.get('influenciadores', []):
-            posts = inf.get('posts', [])
-            total_posts += len(posts)
-            for post in posts:
-                total_alcance += post.get('alcance', 0)
-    
-    return {
-        'total_clientes': len(clientes),
-        'total_influenciadores': len(influenciadores),
-        'total_campanhas': len(campanhas),
-        'campanhas_ativas': len(campanhas_ativas),
-        'total_posts': total_posts,
-        'total_alcance': total_alcance
-    }
+    Views e alcance somam campanha_metricas (alcance com Stories deduplicados,
+    como nos relatorios), cuja linha e gravada nas escritas de cada campanha.
+    """
+    row = dict(execute_select_one('''
+        SELECT
+            (SELECT COUNT(*) FROM clientes) AS total_clientes,
+            (SELECT COUNT(*) FROM influenciadores) AS total_influenciadores,
+            (SELECT COUNT(*) FROM campanhas) AS total_campanhas,
+            (SELECT COUNT(*) FROM campanhas WHERE status = 'ativa') AS campanhas_ativas,
+            (SELECT COUNT(*) FROM campanha_posts p
+             JOIN campanhas c ON c.id = p.campanha_id) AS total_posts,
+            (SELECT COALESCE(SUM(m.total_views), 0) FROM campanha_metricas m
+             JOIN campanhas c ON c.id = m.campanha_id) AS total_views,
+            (SELECT COALESCE(SUM(m.total_alcance), 0) FROM campanha_metricas m
+             JOIN campanhas c ON c.id = m.campanha_id) AS total_alcance
+    '''))
+    return {chave: int(valor or 0) for chave, valor in row.items()}
 
 
 # ========================================
@@ -1888,8 +3467,10 @@ def exportar_balizadores_csv(campanha: Dict) -> str:
     writer = csv.DictWriter(output, fieldnames=colunas)
     writer.writeheader()
     
+    infs_base = get_influenciadores_das_campanhas([campanha])
+    
     for inf_camp in campanha.get('influenciadores', []):
-        inf = get_influenciador(inf_camp.get('influenciador_id'))
+        inf = infs_base.get(inf_camp.get('influenciador_id'))
         if not inf:
             continue
         
@@ -2028,7 +3609,6 @@ def adicionar_insight(campanha_id: int, pagina: str, insight: Dict, fonte: str =
         now
     ))
     
-    invalidar_cache()
     return insight_id
 
 
@@ -2062,7 +3642,6 @@ def atualizar_insight(insight_id: int, dados: Dict) -> bool:
     
     query = f"UPDATE insights_campanha SET {', '.join(campos)} WHERE id = ?"
     execute_update(query, tuple(valores))
-    invalidar_cache()
     return True
 
 
@@ -2072,7 +3651,6 @@ def excluir_insight(insight_id: int, soft_delete: bool = True) -> bool:
         return atualizar_insight(insight_id, {'ativo': 0})
     else:
         execute_update("DELETE FROM insights_campanha WHERE id = ?", (insight_id,))
-        invalidar_cache()
         return True
 
 
@@ -2083,7 +3661,6 @@ def reordenar_insights(campanha_id: int, pagina: str, ordem_ids: List[int]) -> b
             "UPDATE insights_campanha SET ordem = ? WHERE id = ? AND campanha_id = ?",
             (idx + 1, insight_id, campanha_id)
         )
-    invalidar_cache()
     return True
 
 
@@ -2156,7 +3733,6 @@ def restaurar_insights_historico(historico_id: int) -> bool:
     for insight in insights:
         adicionar_insight(campanha_id, pagina, insight, fonte='historico')
     
-    invalidar_cache()
     return True
 
 
@@ -2169,7 +3745,6 @@ def limpar_insights_pagina(campanha_id: int, pagina: str, salvar_historico: bool
         "UPDATE insights_campanha SET ativo = 0 WHERE campanha_id = ? AND pagina = ?",
         (campanha_id, pagina)
     )
-    invalidar_cache()
     return True
 
 
@@ -2194,7 +3769,6 @@ def atualizar_insights_ia(campanha_id: int, pagina: str, novos_insights: List[Di
     for insight in novos_insights:
         adicionar_insight(campanha_id, pagina, insight, fonte='ia')
     
-    invalidar_cache()
     return True
 
 
@@ -2205,61 +3779,102 @@ def atualizar_insights_ia(campanha_id: int, pagina: str, novos_insights: List[Di
 def salvar_comentarios(campanha_id: int, post_url: str, comentarios: List[Dict], 
                        influenciador_id: int = None, post_shortcode: str = None) -> int:
     """
-    Salva comentarios no banco. Pula duplicados (mesmo comment_id + post_url).
+    Salva comentarios no banco numa unica transacao. Pula duplicados (mesmo
+    comment_id + post_url) pelo indice unico idx_comentarios_chave.
     
     Returns:
         Quantidade de comentarios novos salvos
     """
-    count = 0
     now = datetime.now().isoformat()
     
-    # Buscar comment_ids ja existentes para este post
-    existentes = execute_select(
-        "SELECT comment_id FROM comentarios_posts WHERE campanha_id = ? AND post_url = ?",
-        (campanha_id, post_url)
-    )
-    ids_existentes = set(str(r.get('comment_id', '')) for r in existentes if r.get('comment_id'))
-    
+    linhas = []
+    vistos = set()
     for comentario in comentarios:
         try:
-            cid = str(comentario.get('id', ''))
-            
-            # Pular se ja existe
-            if cid and cid in ids_existentes:
-                continue
+            # Sem id o comentario nao e deduplicado (NULL nao conflita no indice)
+            cid = str(comentario.get('id', '') or '') or None
+            if cid is not None:
+                if cid in vistos:
+                    continue
+                vistos.add(cid)
             
-            execute_insert(
-                """INSERT INTO comentarios_posts 
-                   (campanha_id, influenciador_id, post_url, post_shortcode, comment_id,
-                    usuario, texto, data_comentario, likes, categoria, sentimento,
-                    confianca, justificativa, classificado, created_at)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    campanha_id,
-                    influenciador_id,
-                    post_url,
-                    post_shortcode or '',
-                    cid,
-                    comentario.get('usuario', ''),
-                    comentario.get('texto', ''),
-                    comentario.get('data', ''),
-                    comentario.get('likes', 0),
-                    comentario.get('categoria', 'Pendente'),
-                    comentario.get('sentimento', ''),
-                    comentario.get('confianca', 0),
-                    comentario.get('justificativa', ''),
-                    1 if comentario.get('categoria') and comentario.get('categoria') not in ('Pendente', 'Nao Classificado') else 0,
-                    now
+            # Valores convertidos aqui para um comentario malformado nao derrubar o lote
+            categoria = _texto_comentario(comentario.get('categoria', 'Pendente'))
+            linhas.append((
+                campanha_id,
+                influenciador_id,
+                post_url,
+                post_shortcode or '',
+                cid,
+                _texto_comentario(comentario.get('usuario', '')),
+                _texto_comentario(comentario.get('texto', '')),
+                _texto_comentario(comentario.get('data', '')),
+                int(float(comentario.get('likes') or 0)),
+                categoria,
+                _texto_comentario(comentario.get('sentimento', '')),
+                float(comentario.get('confianca') or 0),
+                _texto_comentario(comentario.get('justificativa', '')),
+                1 if categoria and categoria not in ('Pendente', 'Nao Classificado') else 0,
+                now
+            ))
+        except Exception as e:
+            print(f"Erro ao preparar comentario: {e}")
+    
+    if not linhas:
+        return 0
+    
+    colunas = """(campanha_id, influenciador_id, post_url, post_shortcode, comment_id,
+                  usuario, texto, data_comentario, likes, categoria, sentimento,
+                  confianca, justificativa, classificado, created_at)"""
+    conflito = "ON CONFLICT (campanha_id, post_url, comment_id) DO NOTHING"
+    insert_sql = _adaptar_query(
+        f"INSERT INTO comentarios_posts {colunas} "
+        f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) {conflito}"
+    )
+    
+    with conexao() as conn:
+        cursor = conn.cursor()
+        try:
+            if USING_POSTGRES:
+                from psycopg2.extras import execute_values
+                # VALUES com varias linhas por comando; RETURNING conta so as inseridas
+                inseridos = execute_values(
+                    cursor,
+                    f"INSERT INTO comentarios_posts {colunas} VALUES %s {conflito} RETURNING id",
+                    linhas,
+                    page_size=1000,
+                    fetch=True
                 )
-            )
-            count += 1
+                count = len(inseridos)
+            else:
+                # rowcount soma as linhas inseridas (sem as ignoradas e sem as do indice de busca)
+                cursor.executemany(insert_sql, linhas)
+                count = cursor.rowcount
+            conn.commit()
+            return count
         except Exception as e:
-            print(f"Erro ao salvar comentario: {e}")
+            conn.rollback()
+            print(f"Erro ao salvar comentarios em lote, gravando um a um: {e}")
+        
+        # O lote falhou inteiro: grava linha a linha e pula so as que derem erro
+        count = 0
+        for linha in linhas:
+            try:
+                cursor.execute(insert_sql, linha)
+                count += max(cursor.rowcount, 0)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"Erro ao salvar comentario {linha[4]}: {e}")
     
-    invalidar_cache()
     return count
 
 
+def _texto_comentario(valor) -> str:
+    """Campo de texto do comentario como str (None vira '')"""
+    return '' if valor is None else str(valor)
+
+
 def atualizar_classificacao_comentario(comment_id: str, categoria: str) -> bool:
     """Atualiza a classificacao de um comentario pelo comment_id"""
     try:
@@ -2269,7 +3884,6 @@ def atualizar_classificacao_comentario(comment_id: str, categoria: str) -> bool:
                WHERE comment_id = ?""",
             (categoria, str(comment_id))
         )
-        invalidar_cache()
         return True
     except Exception as e:
         print(f"Erro ao atualizar classificacao: {e}")
@@ -2277,8 +3891,9 @@ def atualizar_classificacao_comentario(comment_id: str, categoria: str) -> bool:
 
 
 def atualizar_comentario(campanha_id: int, post_url: str, usuario: str, texto: str, 
-                         categoria: str = None, sentimento: str = None) -> bool:
-    """Atualiza categoria e/ou sentimento de um comentario"""
+                         categoria: str = None, sentimento: str = None,
+                         comentario_id: int = None) -> bool:
+    """Atualiza categoria e/ou sentimento de um comentario (pelo id, quando informado)"""
     try:
         # Montar query dinamicamente
         campos = []
@@ -2297,14 +3912,18 @@ def atualizar_comentario(campanha_id: int, post_url: str, usuario: str, texto: s
             return False
         
         # Adicionar WHERE
-        valores.extend([campanha_id, post_url, usuario, texto[:100]])
+        if comentario_id:
+            valores.extend([campanha_id, comentario_id])
+            where = "campanha_id = ? AND id = ?"
+        else:
+            valores.extend([campanha_id, post_url, usuario, texto])
+            where = "campanha_id = ? AND post_url = ? AND usuario = ? AND texto = ?"
         
         query = f"""UPDATE comentarios_posts 
                     SET {', '.join(campos)}
-                    WHERE campanha_id = ? AND post_url = ? AND usuario = ? AND texto LIKE ?"""
+                    WHERE {where}"""
         
         execute_query(query, tuple(valores))
-        invalidar_cache()
         return True
     except Exception as e:
         print(f"Erro ao atualizar comentario: {e}")
@@ -2316,6 +3935,8 @@ def atualizar_classificacoes_lote(classificacoes: list) -> int:
     Atualiza classificacoes em lote.
     Formato: [{"comment_id": "123", "classification": "Elogio"}, ...]
     Um comment_id pode ter multiplas classificacoes (junta com ' | ').
+    Aplica tudo numa unica transacao (join com VALUES no PostgreSQL,
+    executemany no SQLite).
     
     Returns:
         Quantidade de comentarios atualizados
@@ -2331,21 +3952,43 @@ def atualizar_classificacoes_lote(classificacoes: list) -> int:
             if cat not in mapa[cid]:
                 mapa[cid].append(cat)
     
-    count = 0
-    for cid, cats in mapa.items():
-        categoria_str = " | ".join(cats)
-        try:
-            execute_query(
-                """UPDATE comentarios_posts 
-                   SET categoria = ?, classificado = 1
-                   WHERE comment_id = ?""",
-                (categoria_str, cid)
-            )
-            count += 1
-        except Exception as e:
-            print(f"Erro ao atualizar {cid}: {e}")
+    if not mapa:
+        return 0
+    
+    valores = [(cid, " | ".join(cats)) for cid, cats in mapa.items()]
+    
+    # Lote inteiro numa unica transacao
+    try:
+        with conexao() as conn:
+            cursor = conn.cursor()
+            if USING_POSTGRES:
+                from psycopg2.extras import execute_values
+                # Join com a lista de valores: um UPDATE por pagina de 1000 ids
+                atualizados = execute_values(
+                    cursor,
+                    """UPDATE comentarios_posts AS c
+                       SET categoria = v.categoria, classificado = 1
+                       FROM (VALUES %s) AS v (comment_id, categoria)
+                       WHERE c.comment_id = v.comment_id
+                       RETURNING c.id""",
+                    valores,
+                    page_size=1000,
+                    fetch=True
+                )
+                count = len(atualizados)
+            else:
+                cursor.executemany(
+                    """UPDATE comentarios_posts 
+                       SET categoria = ?, classificado = 1
+                       WHERE comment_id = ?""",
+                    [(categoria, cid) for cid, categoria in valores]
+                )
+                count = cursor.rowcount
+            conn.commit()
+    except Exception as e:
+        print(f"Erro ao atualizar classificacoes em lote: {e}")
+        return 0
     
-    invalidar_cache()
     return count
 
 
@@ -2371,6 +4014,132 @@ def get_comentarios_campanha(campanha_id: int, apenas_classificados: bool = Fals
     return rows
 
 
+def _filtros_comentarios(campanha_id: int, filtros: Dict) -> tuple:
+    """Monta o WHERE (alias c) e os parametros dos filtros de comentarios"""
+    where = "WHERE c.campanha_id = ?"
+    params = [campanha_id]
+    
+    if filtros.get('influenciador_id'):
+        where += " AND c.influenciador_id = ?"
+        params.append(filtros['influenciador_id'])
+    if filtros.get('usuario'):
+        where += " AND LOWER(c.usuario) LIKE ? ESCAPE '\\'"
+        params.append(_padrao_like(filtros['usuario'].replace('@', '').strip(), prefixo=True))
+    if filtros.get('categoria'):
+        where += " AND LOWER(c.categoria) LIKE ? ESCAPE '\\'"
+        params.append(_padrao_like(filtros['categoria']))
+    if filtros.get('sentimento') == 'Nao classificado':
+        where += " AND (c.sentimento IS NULL OR c.sentimento IN ('', 'Nao classificado'))"
+    elif filtros.get('sentimento'):
+        where += " AND c.sentimento = ?"
+        params.append(filtros['sentimento'])
+    if filtros.get('texto'):
+        where += " AND LOWER(c.texto) LIKE ? ESCAPE '\\'"
+        params.append(_padrao_like(filtros['texto']))
+    
+    return where, params
+
+
+def get_comentarios_pagina(campanha_id: int, filtros: Dict = None, limite: int = 100,
+                           cursor: tuple = None) -> Dict:
+    """Retorna uma pagina de comentarios da campanha com os filtros aplicados no banco.
+    
+    Args:
+        filtros: influenciador_id, usuario (prefixo do @), categoria (contida),
+            sentimento ('Nao classificado' inclui vazios) e texto (contido)
+        limite: Comentarios por pagina
+        cursor: Cursor retornado pela pagina anterior (None na primeira)
+    
+    Returns:
+        {'itens', 'cursor' (proxima pagina ou None), 'total' (com os filtros)}
+    """
+    where, params = _filtros_comentarios(campanha_id, filtros or {})
+    
+    pagina = _pagina_keyset(
+        f"""SELECT c.*, i.nome as influenciador
+            FROM comentarios_posts c
+            LEFT JOIN influenciadores i ON c.influenciador_id = i.id
+            {where}""",
+        params, cursor, limite, alias='c'
+    )
+    pagina['total'] = execute_select_one(
+        f"SELECT COUNT(*) AS total FROM comentarios_posts c {where}", tuple(params)
+    )['total']
+    return pagina
+
+
+def _consulta_texto_completo(texto: str) -> str:
+    """Converte o texto digitado em consulta de prefixos com E entre as palavras"""
+    palavras = re.findall(r'\w+', texto.lower())
+    if USING_POSTGRES:
+        return ' & '.join(f"{p}:*" for p in palavras)
+    return ' '.join(f'"{p}"*' for p in palavras)
+
+
+def buscar_comentarios(campanha_id: int, query: str, filtros: Dict = None, limite: int = 100,
+                       cursor: tuple = None) -> Dict:
+    """Busca comentarios da campanha pelo texto usando o indice de texto completo.
+    
+    Os resultados vem ordenados por relevancia (bm25 no SQLite, ts_rank no
+    PostgreSQL). Sem indice disponivel cai no LIKE de get_comentarios_pagina.
+    
+    Args:
+        query: Palavras buscadas (todas devem aparecer; cada uma casa como prefixo)
+        filtros: Mesmos filtros de get_comentarios_pagina (exceto texto)
+        limite: Comentarios por pagina
+        cursor: Cursor retornado pela pagina anterior (None na primeira)
+    
+    Returns:
+        {'itens', 'cursor' (proxima pagina ou None), 'total'}; cada item traz 'relevancia'
+    """
+    filtros = dict(filtros or {}, texto=None)
+    consulta = _consulta_texto_completo(query or '')
+    if not consulta:
+        return get_comentarios_pagina(campanha_id, filtros, limite, cursor)
+    if not _indice_disponivel('idx_comentarios_texto_fts' if USING_POSTGRES else 'comentarios_fts'):
+        return get_comentarios_pagina(campanha_id, dict(filtros, texto=query), limite, cursor)
+    
+    where, params = _filtros_comentarios(campanha_id, filtros)
+    if USING_POSTGRES:
+        tsvector = _TSVECTOR_COMENTARIO.format(coluna='c.texto')
+        # Menor relevancia = melhor nos dois bancos (ts_rank e invertido)
+        base = f"""
+            SELECT c.*, i.nome AS influenciador,
+                   -ts_rank({tsvector}, to_tsquery('portuguese', ?)) AS relevancia
+            FROM comentarios_posts c
+            LEFT JOIN influenciadores i ON c.influenciador_id = i.id
+            {where} AND {tsvector} @@ to_tsquery('portuguese', ?)
+        """
+        params = [consulta] + params + [consulta]
+    else:
+        # CROSS JOIN fixa a ordem: primeiro o indice FTS, depois as linhas casadas
+        base = f"""
+            SELECT c.*, i.nome AS influenciador, f.relevancia
+            FROM (SELECT rowid, bm25(comentarios_fts) AS relevancia
+                  FROM comentarios_fts WHERE comentarios_fts MATCH ?) f
+            CROSS JOIN comentarios_posts c ON c.id = f.rowid
+            LEFT JOIN influenciadores i ON c.influenciador_id = i.id
+            {where}
+        """
+        params = [consulta] + params
+    
+    total = execute_select_one(f"SELECT COUNT(*) AS total FROM ({base}) r", tuple(params))['total']
+    
+    query_pagina = f"SELECT * FROM ({base}) r"
+    params_pagina = list(params)
+    if cursor:
+        query_pagina += " WHERE (relevancia, id) > (?, ?)"
+        params_pagina += [cursor[0], cursor[1]]
+    query_pagina += " ORDER BY relevancia, id LIMIT ?"
+    rows = execute_select(query_pagina, tuple(params_pagina + [limite + 1]))
+    
+    itens = rows[:limite]
+    proximo = None
+    if len(rows) > limite:
+        proximo = (itens[-1]['relevancia'], itens[-1]['id'])
+    return {'itens': itens, 'cursor': proximo, 'total': total}
+
+
 def get_comentarios_post(post_url: str) -> List[Dict]:
     """Retorna comentarios de um post especifico"""
     rows = execute_select(
@@ -2381,43 +4150,74 @@ def get_comentarios_post(post_url: str) -> List[Dict]:
 
 
 def get_estatisticas_comentarios(campanha_id: int) -> Dict:
-    """Retorna estatisticas dos comentarios de uma campanha"""
-    comentarios = get_comentarios_campanha(campanha_id, apenas_classificados=True)
-    
-    if not comentarios:
-        return {
-            'total': 0,
-            'classificados': 0,
-            'por_categoria': {},
-            'por_sentimento': {}
-        }
+    """Retorna estatisticas dos comentarios de uma campanha.
     
-    total = len(comentarios)
+    As contagens vem de um unico GROUP BY (post_url, categoria, sentimento),
+    sem carregar os textos dos comentarios.
     
-    # Contagem por categoria
+    Returns:
+        total e classificados (comentarios com classificado = 1, base dos
+        percentuais de por_categoria e por_sentimento); total_comentarios e
+        pendentes (todos os comentarios, pela categoria); sentimentos (todos,
+        para exibicao) e por_post {post_url: {total, pendentes}}
+    """
+    rows = execute_select('''
+        SELECT post_url, categoria, sentimento, classificado, COUNT(*) AS quantidade
+        FROM comentarios_posts
+        WHERE campanha_id = ?
+        GROUP BY post_url, categoria, sentimento, classificado
+    ''', (campanha_id,))
+    
+    total = 0
+    total_comentarios = 0
+    pendentes = 0
     por_categoria = {}
-    for c in comentarios:
-        cat = c.get('categoria', 'Nao Classificado')
-        por_categoria[cat] = por_categoria.get(cat, 0) + 1
-    
-    # Contagem por sentimento
     por_sentimento = {'positivo': 0, 'neutro': 0, 'negativo': 0}
-    for c in comentarios:
-        sent = c.get('sentimento', 'neutro')
-        if sent in por_sentimento:
-            por_sentimento[sent] += 1
+    sentimentos = {}
+    por_post = {}
+    
+    for row in rows:
+        qtd = row['quantidade']
+        categoria = row['categoria']
+        sentimento = row['sentimento']
+        pendente = categoria in CATEGORIAS_PENDENTES
+        
+        total_comentarios += qtd
+        if pendente:
+            pendentes += qtd
+        
+        post = por_post.setdefault(row['post_url'] or '', {'total': 0, 'pendentes': 0})
+        post['total'] += qtd
+        if pendente:
+            post['pendentes'] += qtd
+        
+        rotulo = sentimento or 'Nao classificado'
+        sentimentos[rotulo] = sentimentos.get(rotulo, 0) + qtd
+        
+        if row['classificado'] == 1:
+            total += qtd
+            cat = categoria or 'Nao Classificado'
+            por_categoria[cat] = por_categoria.get(cat, 0) + qtd
+            if sentimento in por_sentimento:
+                por_sentimento[sentimento] += qtd
+    
+    def _percentuais(contagens):
+        if not total:
+            return {}
+        return {
+            chave: {'quantidade': qtd, 'percentual': round(qtd / total * 100, 1)}
+            for chave, qtd in contagens.items()
+        }
     
     return {
         'total': total,
         'classificados': total,
-        'por_categoria': {
-            cat: {'quantidade': qtd, 'percentual': round(qtd / total * 100, 1)}
-            for cat, qtd in por_categoria.items()
-        },
-        'por_sentimento': {
-            sent: {'quantidade': qtd, 'percentual': round(qtd / total * 100, 1)}
-            for sent, qtd in por_sentimento.items()
-        }
+        'total_comentarios': total_comentarios,
+        'pendentes': pendentes,
+        'por_categoria': _percentuais(por_categoria),
+        'por_sentimento': _percentuais(por_sentimento),
+        'sentimentos': sentimentos,
+        'por_post': por_post
     }
 
 
@@ -2435,7 +4235,6 @@ def atualizar_classificacao_comentario(comment_id: int, classificacao: Dict) ->
             comment_id
         )
     )
-    invalidar_cache()
     return True
 
 
@@ -2445,7 +4244,6 @@ def excluir_comentarios_post(post_url: str) -> bool:
         "DELETE FROM comentarios_posts WHERE post_url = ?",
         (post_url,)
     )
-    invalidar_cache()
     return True
 
 
@@ -2455,7 +4253,6 @@ def excluir_comentarios_campanha(campanha_id: int) -> bool:
         "DELETE FROM comentarios_posts WHERE campanha_id = ?",
         (campanha_id,)
     )
-    invalidar_cache()
     return True
 
 
@@ -2806,7 +4603,6 @@ def criar_coluna_dinamica(nome: str, descricao: str = '', opcoes: List[str] = No
            VALUES (?, ?, ?, ?)""",
         (nome, descricao, opcoes_json, now)
     )
-    invalidar_cache()
     return result
 
 
@@ -2839,14 +4635,12 @@ def atualizar_coluna_dinamica(coluna_id: int, dados: Dict) -> bool:
         f"UPDATE colunas_dinamicas SET {', '.join(campos)} WHERE id = ?",
         tuple(valores)
     )
-    invalidar_cache()
     return True
 
 
 def excluir_coluna_dinamica(coluna_id: int) -> bool:
     """Desativa uma coluna dinamica (soft delete)"""
     execute_update("UPDATE colunas_dinamicas SET ativo = 0 WHERE id = ?", (coluna_id,))
-    invalidar_cache()
     return True
 
 
@@ -2880,7 +4674,6 @@ def set_valor_coluna_influenciador(influenciador_id: int, coluna_id: int, valor:
                VALUES (?, ?, ?)""",
             (influenciador_id, coluna_id, valor)
         )
-    invalidar_cache()
     return True
 
 
@@ -2908,6 +4701,31 @@ def get_influenciadores_por_coluna(coluna_id: int, valor: str = None) -> List[Di
     return [dict(row) for row in rows]
 
 
+def get_ids_influenciadores_por_valores_colunas(filtros: Dict[int, str]) -> set:
+    """Retorna os ids dos influenciadores que tem TODOS os valores de colunas informados
+    
+    Args:
+        filtros: Dict mapeando coluna_id -> valor exigido
+    """
+    if not filtros:
+        return set()
+    
+    condicoes = " OR ".join(["(coluna_id = ? AND valor = ?)"] * len(filtros))
+    params = []
+    for coluna_id, valor in filtros.items():
+        params.extend([coluna_id, valor])
+    params.append(len(filtros))
+    
+    rows = execute_select(
+        f"""SELECT influenciador_id FROM influenciador_colunas
+            WHERE {condicoes}
+            GROUP BY influenciador_id
+            HAVING COUNT(*) = ?""",
+        tuple(params)
+    )
+    return {row['influenciador_id'] for row in rows}
+
+
 def get_valores_unicos_coluna(coluna_id: int) -> List[str]:
     """Retorna valores unicos usados em uma coluna dinamica"""
     rows = execute_query(
@@ -2937,6 +4755,6 @@ def set_colunas_campanha(campanha_id: int, coluna_ids: List[int]) -> bool:
         "UPDATE campanhas SET colunas_dinamicas_selecionadas = ? WHERE id = ?",
         (colunas_json, campanha_id)
     )
-    invalidar_cache()
+    invalidar_cache('campanha', campanha_id)
     return True
 
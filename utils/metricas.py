@@ -0,0 +1,418 @@
+"""
+Motor de metricas das campanhas
+
+Achata campanhas -> influenciadores -> posts uma unica vez em DataFrames
+(um post por linha, com os atributos do influenciador) e calcula totais,
+taxas e agrupamentos com operacoes vetorizadas do pandas. As telas de
+relatorio, o PDF e o relatorio publico usam estas mesmas regras:
+
+- Stories do mesmo influenciador, na mesma campanha e no mesmo dia contam
+  como 1 publicacao, com o maior alcance do dia; views, impressoes e
+  interacoes dos Stories sempre somam
+- Impressoes totais = views + impressoes
+- Engajamento efetivo = interacoes / impressoes totais
+- Taxa de alcance = alcance / seguidores dos influenciadores unicos
+"""
+
+from typing import Dict, List
+
+import pandas as pd
+
+from utils import data_manager
+
+
+# Campos numericos lidos de cada post
+CAMPOS_POST = [
+    'views', 'alcance', 'interacoes', 'impressoes', 'curtidas', 'comentarios',
+    'compartilhamentos', 'saves', 'cliques_link', 'cliques_arroba', 'conversoes'
+]
+
+# Atributos do influenciador juntados a cada post
+CAMPOS_INFLUENCIADOR = [
+    'nome', 'usuario', 'foto', 'seguidores', 'classificacao', 'network', 'categoria', 'vinculo_id'
+]
+
+
+def _numero(valor) -> float:
+    """Valor numerico de um campo do post (texto, None e listas contam 0)"""
+    if isinstance(valor, bool):
+        return 0
+    return valor if isinstance(valor, (int, float)) else 0
+
+
+def _qtd_comentarios(post: Dict) -> float:
+    """comentarios pode ser lista de objetos ou numero; comentarios_qtd e o campo numerico"""
+    comentarios = post.get('comentarios', 0)
+    qtd = len(comentarios) if isinstance(comentarios, list) else _numero(comentarios)
+    return qtd + _numero(post.get('comentarios_qtd', 0))
+
+
+def _valores_post(post: Dict) -> tuple:
+    """Valores de CAMPOS_POST, somando os nomes alternativos de cada campo"""
+    return (
+        _numero(post.get('views', 0)),
+        _numero(post.get('alcance', 0)),
+        _numero(post.get('interacoes', 0)),
+        _numero(post.get('impressoes', 0)),
+        _numero(post.get('curtidas', 0)),
+        _qtd_comentarios(post),
+        _numero(post.get('compartilhamentos', 0)),
+        _numero(post.get('saves', 0)),
+        _numero(post.get('cliques_link', 0)) + _numero(post.get('clique_link', 0)),
+        _numero(post.get('clique_arroba', 0)) or _numero(post.get('cliques_arroba', 0)),
+        _numero(post.get('conversoes', 0)) + _numero(post.get('cupom_conversoes', 0)),
+    )
+
+
+def metricas_post(post: Dict) -> Dict:
+    """Valores de CAMPOS_POST de um post pelas regras do motor, com impressoes_total"""
+    valores = dict(zip(CAMPOS_POST, _valores_post(post)))
+    valores['impressoes_total'] = valores['views'] + valores['impressoes']
+    return valores
+
+
+def _nativo(valor):
+    """Converte escalares numpy para int/float do Python (int quando nao ha fracao)"""
+    valor = float(valor)
+    return int(valor) if valor.is_integer() else valor
+
+
+def _taxa(numerador, denominador, fator: float = 100) -> float:
+    return round(float(numerador) / float(denominador) * fator, 2) if denominador else 0
+
+
+def taxas(interacoes, imp_combinado, alcance, seguidores, custo) -> Dict:
+    """Taxas dos totais (engajamento, alcance, CPM, CPE e CPA), com as chaves de totais()"""
+    return {
+        'engajamento_efetivo': _taxa(interacoes, imp_combinado),
+        'taxa_alcance': _taxa(alcance, seguidores),
+        'cpm_campanha': _taxa(custo, imp_combinado, 1000),
+        'cpe_campanha': _taxa(custo, interacoes, 1),
+        'cpa_campanha': _taxa(custo, alcance, 1000),
+    }
+
+
+def totais_participacoes(influenciadores_campanha: List[Dict], influenciadores_base: Dict[int, Dict]) -> Dict:
+    """total_influenciadores, total_seguidores e total_custo de participacoes
+    (itens de campanha['influenciadores']), sem montar os DataFrames"""
+    ids = list(dict.fromkeys(
+        inf.get('influenciador_id') for inf in influenciadores_campanha
+        if inf.get('influenciador_id') in influenciadores_base
+    ))
+    return {
+        'total_influenciadores': data_manager.contar_influenciadores_unicos(ids, influenciadores_base),
+        'total_seguidores': _nativo(sum(influenciadores_base[i].get('seguidores', 0) or 0 for i in ids)),
+        'total_custo': _nativo(sum(float(_numero(inf.get('custo', 0))) for inf in influenciadores_campanha)),
+    }
+
+
+class MotorMetricas:
+    """Posts e participacoes de varias campanhas em DataFrames, com os calculos de metricas.
+
+    Atributos:
+        posts: um post por linha (campanha_id, influenciador_id, indice do post,
+            formato, data_publicacao, data_iso, data, CAMPOS_POST, impressoes_total, os
+            CAMPOS_INFLUENCIADOR, tier e o proprio dict do post em 'post')
+        participacoes: um influenciador por campanha (custo, tier, cadastrado)
+        influenciadores_base: id -> influenciador, como em get_influenciadores_das_campanhas
+    """
+
+    def __init__(self, campanhas: List[Dict] = None, influenciadores_base: Dict[int, Dict] = None,
+                 posts: pd.DataFrame = None, participacoes: pd.DataFrame = None):
+        """
+        Args:
+            campanhas: Campanhas com influenciadores e posts (achatadas uma vez)
+            influenciadores_base: id -> influenciador ja carregado (evita nova consulta)
+            posts, participacoes: Tabelas ja montadas (usado por filtrar)
+        """
+        if posts is not None:
+            self.posts = posts
+            self.participacoes = participacoes
+            self.influenciadores_base = influenciadores_base
+        else:
+            campanhas = campanhas or []
+            if influenciadores_base is None:
+                influenciadores_base = data_manager.get_influenciadores_das_campanhas(campanhas)
+            self.influenciadores_base = influenciadores_base
+            self._montar(campanhas)
+        self._publicacoes = None
+
+    def _montar(self, campanhas: List[Dict]):
+        """Unica passada pelos dicts aninhados das campanhas"""
+        linhas = []
+        participacoes = []
+        for camp in campanhas:
+            camp_id = camp.get('id')
+            for inf_camp in camp.get('influenciadores', []):
+                inf_id = inf_camp.get('influenciador_id')
+                inf = self.influenciadores_base.get(inf_id)
+                snapshot = inf_camp.get('snapshot_dados') or {}
+                tier = snapshot.get('classificacao') or (inf or {}).get('classificacao') or 'Desconhecido'
+                participacoes.append((camp_id, inf_id, _numero(inf_camp.get('custo', 0)), tier, inf is not None))
+                for indice, post in enumerate(inf_camp.get('posts', [])):
+                    linhas.append(
+                        (camp_id, inf_id, indice, post.get('formato') or 'Outro',
+                         post.get('data_publicacao') or '', post.get('data_iso'), tier, post) + _valores_post(post)
+                    )
+
+        self.participacoes = pd.DataFrame(
+            participacoes, columns=['campanha_id', 'influenciador_id', 'custo', 'tier', 'cadastrado']
+        ).astype({'custo': float, 'cadastrado': bool})
+
+        posts = pd.DataFrame(
+            linhas,
+            columns=['campanha_id', 'influenciador_id', 'indice', 'formato', 'data_publicacao', 'data_iso', 'tier', 'post']
+            + CAMPOS_POST
+        )
+        posts['impressoes_total'] = posts['views'] + posts['impressoes']
+        # data_iso vem normalizada do banco; so posts sem ela (nao gravados) sao convertidos aqui
+        faltando = posts['data_iso'].isna() & posts['data_publicacao'].ne('')
+        if faltando.any():
+            posts.loc[faltando, 'data_iso'] = posts.loc[faltando, 'data_publicacao'].map(data_manager.normalizar_data_post)
+        posts['data'] = pd.to_datetime(posts['data_iso'], format='%Y-%m-%d', errors='coerce')
+
+        influenciadores = pd.DataFrame(
+            [{'influenciador_id': inf_id, **{c: inf.get(c) for c in CAMPOS_INFLUENCIADOR}}
+             for inf_id, inf in self.influenciadores_base.items()],
+            columns=['influenciador_id'] + CAMPOS_INFLUENCIADOR
+        )
+        influenciadores['seguidores'] = pd.to_numeric(influenciadores['seguidores'], errors='coerce').fillna(0)
+        influenciadores['classificacao'] = influenciadores['classificacao'].fillna('Desconhecido')
+        self.posts = posts.merge(influenciadores, on='influenciador_id', how='left')
+        self.posts['cadastrado'] = self.posts['influenciador_id'].isin(list(self.influenciadores_base))
+        self.posts['seguidores'] = self.posts['seguidores'].fillna(0)
+
+    def filtrar(self, mascara_posts=None, influenciadores=None, apenas_com_posts: bool = False) -> 'MotorMetricas':
+        """Retorna um motor sobre um subconjunto das linhas (sem recarregar nem copiar os posts).
+
+        Args:
+            mascara_posts: Serie booleana alinhada a self.posts
+            influenciadores: Ids de influenciadores a manter
+            apenas_com_posts: Mantem so as participacoes que ficaram com algum post
+        """
+        posts = self.posts
+        participacoes = self.participacoes
+        if mascara_posts is not None:
+            posts = posts[mascara_posts]
+        if influenciadores is not None:
+            ids = list(influenciadores)
+            posts = posts[posts['influenciador_id'].isin(ids)]
+            participacoes = participacoes[participacoes['influenciador_id'].isin(ids)]
+        if apenas_com_posts:
+            chaves = pd.MultiIndex.from_frame(posts[['campanha_id', 'influenciador_id']])
+            participacoes = participacoes[
+                pd.MultiIndex.from_frame(participacoes[['campanha_id', 'influenciador_id']]).isin(chaves)
+            ]
+        return MotorMetricas(influenciadores_base=self.influenciadores_base, posts=posts, participacoes=participacoes)
+
+    def publicacoes(self) -> pd.DataFrame:
+        """Posts com os Stories do mesmo influenciador/campanha/dia agregados em uma linha.
+
+        O dia e a data normalizada (data_iso): '02/12/2025' e '2025-12-02' sao o
+        mesmo dia; Stories sem data valida contam um a um.
+        """
+        if self._publicacoes is None:
+            posts = self.posts
+            stories = posts['formato'].eq('Stories') & posts['data_iso'].notna()
+            agregacao = {c: 'sum' for c in CAMPOS_POST + ['impressoes_total']}
+            agregacao['alcance'] = 'max'
+            for coluna in posts.columns:
+                if coluna not in agregacao and coluna not in ('campanha_id', 'influenciador_id', 'data_iso'):
+                    agregacao[coluna] = 'first'
+            agrupados = posts[stories].groupby(
+                ['campanha_id', 'influenciador_id', 'data_iso'], sort=False
+            ).agg(agregacao).reset_index()
+            self._publicacoes = pd.concat([posts[~stories], agrupados], ignore_index=True)
+        return self._publicacoes
+
+    def totais(self) -> Dict:
+        """Totais e taxas do conjunto (mesmas chaves de calcular_metricas_multiplas_campanhas)"""
+        posts = self.posts
+        pubs = self.publicacoes()
+        somas = {c: posts[c].sum() for c in CAMPOS_POST + ['impressoes_total']}
+        somas['alcance'] = pubs['alcance'].sum()
+
+        cadastrados = self.participacoes[self.participacoes['cadastrado']]
+        ids = cadastrados['influenciador_id'].unique().tolist()
+        return self._montar_totais(somas, len(pubs), ids, self.participacoes['custo'].sum())
+
+    def totais_por(self, grupos: Dict[int, object]) -> Dict[object, Dict]:
+        """Totais de cada grupo de campanhas em uma passada (groupby), mesmas chaves de totais().
+
+        Args:
+            grupos: campanha_id -> chave do grupo (ex.: cliente_id); campanhas fora
+                do mapa sao ignoradas e grupos sem linhas saem zerados
+        """
+        posts = self.posts
+        pubs = self.publicacoes()
+        somas = posts.groupby(posts['campanha_id'].map(grupos))[CAMPOS_POST + ['impressoes_total']].sum()
+        somas['alcance'] = pubs.groupby(pubs['campanha_id'].map(grupos))['alcance'].sum()
+        somas = somas.fillna(0)
+        qtd_publicacoes = pubs.groupby(pubs['campanha_id'].map(grupos)).size()
+
+        participacoes = self.participacoes
+        chave_participacao = participacoes['campanha_id'].map(grupos)
+        custos = participacoes.groupby(chave_participacao)['custo'].sum()
+        cadastrados = participacoes['cadastrado']
+        ids_por_grupo = participacoes[cadastrados].groupby(chave_participacao[cadastrados])['influenciador_id'].unique()
+
+        vazio = dict.fromkeys(CAMPOS_POST + ['impressoes_total'], 0)
+        resultado = {}
+        for chave in dict.fromkeys(grupos.values()):
+            linha = somas.loc[chave].to_dict() if chave in somas.index else vazio
+            ids = ids_por_grupo[chave].tolist() if chave in ids_por_grupo.index else []
+            resultado[chave] = self._montar_totais(
+                linha, int(qtd_publicacoes.get(chave, 0)), ids, custos.get(chave, 0)
+            )
+        return resultado
+
+    def _montar_totais(self, somas: Dict, total_posts: int, ids: List[int], total_custo) -> Dict:
+        """Dict de totais a partir das somas de CAMPOS_POST (alcance ja com Stories agregados)"""
+        somas = {c: _nativo(v) for c, v in somas.items()}
+        total_seguidores = _nativo(sum(self.influenciadores_base[i].get('seguidores', 0) or 0 for i in ids))
+        total_custo = _nativo(total_custo)
+
+        imp = somas['impressoes_total']
+        return {
+            'total_influenciadores': data_manager.contar_influenciadores_unicos(ids, self.influenciadores_base),
+            'total_seguidores': total_seguidores,
+            'total_posts': total_posts,
+            'total_views': somas['views'],
+            'total_alcance': somas['alcance'],
+            'total_interacoes': somas['interacoes'],
+            'total_impressoes': somas['impressoes'],
+            'total_imp_combinado': imp,
+            'total_curtidas': somas['curtidas'],
+            'total_comentarios': somas['comentarios'],
+            'total_compartilhamentos': somas['compartilhamentos'],
+            'total_saves': somas['saves'],
+            'total_cliques_link': somas['cliques_link'],
+            'total_conversoes': somas['conversoes'],
+            'total_custo': total_custo,
+            **taxas(somas['interacoes'], imp, somas['alcance'], total_seguidores, total_custo),
+        }
+
+    def por_influenciador(self, formatos: List[str] = None) -> List[Dict]:
+        """KPIs por influenciador (cadastrado), na ordem em que aparecem nas campanhas.
+
+        Args:
+            formatos: Se informado, considera so posts desses formatos e omite
+                quem nao tem nenhum (o custo vem das campanhas com esses posts)
+        """
+        motor = self
+        if formatos:
+            motor = self.filtrar(self.posts['formato'].isin(formatos), apenas_com_posts=True)
+
+        participacoes = motor.participacoes[motor.participacoes['cadastrado']]
+        if participacoes.empty:
+            return []
+        ordem = participacoes['influenciador_id'].drop_duplicates()
+
+        pubs = motor.publicacoes()
+        pubs = pubs[pubs['cadastrado']]
+        agregado = pubs.groupby('influenciador_id').agg(
+            impressoes=('impressoes_total', 'sum'),
+            alcance=('alcance', 'max'),
+            alcance_total=('alcance', 'sum'),
+            interacoes=('interacoes', 'sum'),
+            curtidas=('curtidas', 'sum'),
+            cliques_link=('cliques_link', 'sum'),
+            cliques_arroba=('cliques_arroba', 'sum'),
+            posts=('formato', 'size'),
+        )
+        df = pd.DataFrame(index=pd.Index(ordem, name='influenciador_id')).join(agregado).fillna(0)
+        df['custo'] = participacoes.groupby('influenciador_id')['custo'].sum()
+
+        infs = [self.influenciadores_base[i] for i in df.index]
+        atributos = {
+            'id': [inf.get('id', i) for i, inf in zip(df.index, infs)],
+            'nome': [inf.get('nome') for inf in infs],
+            'usuario': [inf.get('usuario') for inf in infs],
+            'foto': [inf.get('foto', '') for inf in infs],
+            'classificacao': [inf.get('classificacao', 'Desconhecido') for inf in infs],
+            'seguidores': [inf.get('seguidores', 0) or 0 for inf in infs],
+            'network': [inf.get('network', 'instagram') for inf in infs],
+            'categoria': [inf.get('categoria', '') for inf in infs],
+            'vinculo_id': [inf.get('vinculo_id') for inf in infs],
+        }
+        for coluna, valores in atributos.items():
+            df[coluna] = pd.Series(valores, index=df.index, dtype=object)
+
+        seguidores = df['seguidores'].astype(float)
+        df['taxa_eng'] = _serie_taxa(df['interacoes'], df['impressoes'])
+        df['taxa_alcance'] = _serie_taxa(df['alcance'], seguidores)
+        df['taxa_eng_geral'] = _serie_taxa(df['interacoes'], seguidores)
+        df['interacoes_qualif'] = (df['interacoes'] - df['curtidas']).clip(lower=0)
+        df['taxa_interacoes_qualif'] = _serie_taxa(df['interacoes_qualif'], df['interacoes'])
+
+        # Somas e contagens voltam como int quando nao tem fracao (como nos dicts originais)
+        somas = list(agregado.columns) + ['custo', 'interacoes_qualif']
+        registros = df.reset_index(drop=True).to_dict('records')
+        for registro in registros:
+            for coluna in somas:
+                registro[coluna] = _nativo(registro[coluna])
+        return registros
+
+    def totais_influenciador(self, inf_id: int) -> Dict:
+        """Totais de um influenciador (com seguidores do proprio); {} se nao participa"""
+        motor = self.filtrar(influenciadores=[inf_id])
+        if motor.participacoes.empty:
+            return {}
+        totais = motor.totais()
+        totais['seguidores'] = totais['total_seguidores']
+        return totais
+
+    def por_formato(self) -> List[Dict]:
+        """Uma linha por publicacao (Stories do dia agregados) com formato e metricas"""
+        pubs = self.publicacoes()
+        df = pubs[['formato', 'views', 'alcance', 'interacoes', 'impressoes_total', 'curtidas']]
+        return df.rename(columns={'impressoes_total': 'impressoes'}).to_dict('records')
+
+    def por_classificacao(self) -> List[Dict]:
+        """Uma linha por post de influenciador cadastrado, com a classificacao na campanha"""
+        posts = self.posts[self.posts['cadastrado']]
+        df = pd.DataFrame({
+            'classificacao': posts['tier'],
+            'influenciador': posts['nome'],
+            'post_id': [post.get('id', 0) for post in posts['post']],
+            'views': posts['views'],
+            'alcance': posts['alcance'],
+            'interacoes': posts['interacoes'],
+            'impressoes': posts['impressoes_total'],
+            'curtidas': posts['curtidas'],
+        })
+        return df.to_dict('records')
+
+    def por_tier(self, kpi: str, filtro_formato: str = "Todos") -> List[Dict]:
+        """Valores positivos de um KPI por post, com o tier do influenciador na campanha"""
+        posts = self.posts[self.posts['cadastrado']]
+        if filtro_formato != "Todos":
+            posts = posts[posts['formato'] == filtro_formato]
+        valores = posts['seguidores'] if kpi == 'seguidores' else posts.get(kpi)
+        if valores is None:
+            return []
+        df = pd.DataFrame({'tier': posts['tier'], 'valor': valores})
+        return df[df['valor'] > 0].to_dict('records')
+
+    def radar_formato(self) -> List[Dict]:
+        """Taxa de engajamento e de alcance por formato"""
+        pubs = self.publicacoes()
+        agregado = pubs.groupby('formato', sort=False).agg(
+            impressoes=('impressoes_total', 'sum'),
+            alcance=('alcance', 'sum'),
+            interacoes=('interacoes', 'sum'),
+            seguidores=('seguidores', 'sum'),
+        )
+        return [
+            {'formato': formato,
+             'taxa_eng': _taxa(linha['interacoes'], linha['impressoes']),
+             'taxa_alcance': _taxa(linha['alcance'], linha['seguidores'])}
+            for formato, linha in agregado.iterrows()
+        ]
+
+
+def _serie_taxa(numerador: pd.Series, denominador: pd.Series, fator: float = 100) -> pd.Series:
+    """Taxa vetorizada com 0 onde o denominador e 0"""
+    denominador = denominador.astype(float)
+    taxa = numerador.astype(float).div(denominador.where(denominador != 0)) * fator
+    return taxa.fillna(0).round(2)
@@ -23,6 +23,7 @@ import matplotlib.patches as mpatches
 from matplotlib.patches import Wedge
 
 from utils import data_manager, funcoes_auxiliares
+from utils.metricas import MotorMetricas
 
 
 # Cores padrao
@@ -52,132 +53,37 @@ def calcular_impressoes_post(post: Dict) -> int:
     return views + impressoes
 
 
+# Ultima lista de campanhas e seu motor: as secoes do PDF recebem a mesma lista
+_ultimo_motor = (None, None)
+
+
+def _motor(campanhas_list: List[Dict]) -> MotorMetricas:
+    """Motor de metricas da lista, montado uma vez por geracao de PDF."""
+    global _ultimo_motor
+    lista, motor = _ultimo_motor
+    if lista is not campanhas_list:
+        motor = MotorMetricas(campanhas_list)
+        _ultimo_motor = (campanhas_list, motor)
+    return motor
+
+
 def coletar_dados_influenciadores(campanhas_list: List[Dict]) -> List[Dict]:
     """Coleta dados por influenciador."""
-    dados_inf = {}
-    
-    for camp in campanhas_list:
-        for camp_inf in camp.get('influenciadores', []):
-            inf = data_manager.get_influenciador(camp_inf.get('influenciador_id'))
-            if not inf:
-                continue
-            inf_id = inf['id']
-            if inf_id not in dados_inf:
-                dados_inf[inf_id] = {
-                    'id': inf_id, 
-                    'nome': inf['nome'], 
-                    'usuario': inf['usuario'], 
-                    'foto': inf.get('foto', ''), 
-                    'classificacao': inf.get('classificacao', 'Desconhecido'), 
-                    'seguidores': inf.get('seguidores', 0), 
-                    'network': inf.get('network', 'instagram'),
-                    'categoria': inf.get('categoria', ''),
-                    'impressoes': 0, 
-                    'alcance': 0, 
-                    'alcance_total': 0,
-                    'interacoes': 0,
-                    'curtidas': 0,
-                    'custo': 0, 
-                    'posts': 0,
-                    '_stories_datas': set()
-                }
-            dados_inf[inf_id]['custo'] += camp_inf.get('custo', 0)
-            
-            for post in camp_inf.get('posts', []):
-                formato = post.get('formato', 'Outro')
-                data_post = post.get('data_publicacao', '')
-                imp = calcular_impressoes_post(post)
-                
-                dados_inf[inf_id]['impressoes'] += imp
-                post_alcance = post.get('alcance', 0) or 0
-                dados_inf[inf_id]['alcance'] = max(dados_inf[inf_id]['alcance'], post_alcance)
-                dados_inf[inf_id]['alcance_total'] += post_alcance
-                dados_inf[inf_id]['interacoes'] += post.get('interacoes', 0) or 0
-                dados_inf[inf_id]['curtidas'] += post.get('curtidas', 0) or 0
-                
-                if formato == 'Stories':
-                    if data_post and data_post not in dados_inf[inf_id]['_stories_datas']:
-                        dados_inf[inf_id]['_stories_datas'].add(data_post)
-                        dados_inf[inf_id]['posts'] += 1
-                    elif not data_post:
-                        dados_inf[inf_id]['posts'] += 1
-                else:
-                    dados_inf[inf_id]['posts'] += 1
-    
-    resultado = []
-    for inf_id, d in dados_inf.items():
-        d.pop('_stories_datas', None)
-        d['taxa_eng'] = round((d['interacoes'] / d['impressoes'] * 100), 2) if d['impressoes'] > 0 else 0
-        d['taxa_alcance'] = round((d['alcance'] / d['seguidores'] * 100), 2) if d['seguidores'] > 0 else 0
-        d['interacoes_qualif'] = max(0, d['interacoes'] - d['curtidas'])
-        resultado.append(d)
-    return resultado
+    return _motor(campanhas_list).por_influenciador()
 
 
 def calcular_metricas_gerais(campanhas_list: List[Dict]) -> Dict:
     """Calcula metricas gerais das campanhas."""
-    metricas = {
-        'total_influenciadores': 0,
-        'total_seguidores': 0,
-        'total_posts': 0,
-        'total_views': 0,
-        'total_impressoes': 0,
-        'total_alcance': 0,
-        'total_interacoes': 0,
-        'total_curtidas': 0,
-        'total_comentarios': 0,
-        'total_compartilhamentos': 0,
-        'total_saves': 0,
-        'taxa_alcance': 0,
-        'engajamento_efetivo': 0
-    }
-    
-    influenciadores_unicos = set()
-    
-    for camp in campanhas_list:
-        for inf_camp in camp.get('influenciadores', []):
-            inf_id = inf_camp.get('influenciador_id')
-            if inf_id not in influenciadores_unicos:
-                influenciadores_unicos.add(inf_id)
-                inf = data_manager.get_influenciador(inf_id)
-                if inf:
-                    metricas['total_seguidores'] += inf.get('seguidores', 0)
-            
-            for post in inf_camp.get('posts', []):
-                metricas['total_posts'] += 1
-                metricas['total_views'] += post.get('views', 0) or 0
-                metricas['total_impressoes'] += post.get('impressoes', 0) or 0
-                metricas['total_alcance'] += post.get('alcance', 0) or 0
-                metricas['total_interacoes'] += post.get('interacoes', 0) or 0
-                metricas['total_curtidas'] += post.get('curtidas', 0) or 0
-                
-                comentarios = post.get('comentarios', 0)
-                if isinstance(comentarios, list):
-                    metricas['total_comentarios'] += len(comentarios)
-                else:
-                    metricas['total_comentarios'] += comentarios or 0
-                
-                metricas['total_compartilhamentos'] += post.get('compartilhamentos', 0) or 0
-                metricas['total_saves'] += post.get('saves', 0) or 0
-    
-    metricas['total_influenciadores'] = len(influenciadores_unicos)
-    
-    if metricas['total_seguidores'] > 0:
-        metricas['taxa_alcance'] = (metricas['total_alcance'] / metricas['total_seguidores'] * 100)
-    
-    total_imp = metricas['total_impressoes'] + metricas['total_views']
-    if total_imp > 0:
-        metricas['engajamento_efetivo'] = (metricas['total_interacoes'] / total_imp * 100)
-    
-    return metricas
+    return _motor(campanhas_list).totais()
 
 
 def gerar_grafico_barras_formato(campanhas_list: List[Dict], kpi: str = "Impressoes") -> Optional[str]:
     """Gera grafico de barras empilhadas por formato/classificacao."""
     todos_influs_camp = []
+    infs_base = data_manager.get_influenciadores_das_campanhas(campanhas_list)
     for camp in campanhas_list:
         for inf_camp in camp.get('influenciadores', []):
-            inf = data_manager.get_influenciador(inf_camp.get('influenciador_id'))
+            inf = infs_base.get(inf_camp.get('influenciador_id'))
             if inf:
                 todos_influs_camp.append({'inf': inf, 'posts': inf_camp.get('posts', [])})
     
@@ -253,9 +159,10 @@ def gerar_grafico_radar_classificacao(campanhas_list: List[Dict]) -> Optional[st
     todos_influs_camp = []
     classificacoes = set()
     
+    infs_base = data_manager.get_influenciadores_das_campanhas(campanhas_list)
     for camp in campanhas_list:
         for inf_camp in camp.get('influenciadores', []):
-            inf = data_manager.get_influenciador(inf_camp.get('influenciador_id'))
+            inf = infs_base.get(inf_camp.get('influenciador_id'))
             if inf:
                 todos_influs_camp.append({'inf': inf, 'posts': inf_camp.get('posts', [])})
                 classificacoes.add(inf.get('classificacao', 'Desconhecido'))
@@ -525,9 +432,10 @@ def render_big_numbers_html(campanhas_list: List[Dict], metricas: Dict, config_k
     
     # AIR Score medio
     todos_influs = []
+    infs_base = data_manager.get_influenciadores_das_campanhas(campanhas_list)
     for camp in campanhas_list:
         for inf_camp in camp.get('influenciadores', []):
-            inf = data_manager.get_influenciador(inf_camp.get('influenciador_id'))
+            inf = infs_base.get(inf_camp.get('influenciador_id'))
             if inf:
                 todos_influs.append(inf)
     
@@ -707,9 +615,10 @@ def render_top_performance_html(campanhas_list: List[Dict], config_kpis: Dict) -
     
     # Lista de top posts
     todos_posts = []
+    infs_base = data_manager.get_influenciadores_das_campanhas(campanhas_list)
     for camp in campanhas_list:
         for inf_camp in camp.get('influenciadores', []):
-            inf = data_manager.get_influenciador(inf_camp.get('influenciador_id'))
+            inf = infs_base.get(inf_camp.get('influenciador_id'))
             for post in inf_camp.get('posts', []):
                 post_data = post.copy()
                 post_data['influenciador_nome'] = inf['nome'] if inf else 'Desconhecido'
@@ -830,9 +739,10 @@ def render_stories_detalhado_html(campanhas_list: List[Dict]) -> str:
     
     stories_data = []
     
+    infs_base = data_manager.get_influenciadores_das_campanhas(campanhas_list)
     for camp in campanhas_list:
         for inf_camp in camp.get('influenciadores', []):
-            inf = data_manager.get_influenciador(inf_camp.get('influenciador_id'))
+            inf = infs_base.get(inf_camp.get('influenciador_id'))
             nome_inf = inf['nome'] if inf else 'Desconhecido'
             
             for post in inf_camp.get('posts', []):
@@ -885,9 +795,10 @@ def render_comentarios_html(campanhas_list: List[Dict]) -> str:
     """Renderiza secao de comentarios como HTML."""
     
     todos_comentarios = []
+    infs_base = data_manager.get_influenciadores_das_campanhas(campanhas_list)
     for camp in campanhas_list:
         for inf_camp in camp.get('influenciadores', []):
-            inf = data_manager.get_influenciador(inf_camp.get('influenciador_id'))
+            inf = infs_base.get(inf_camp.get('influenciador_id'))
             nome_inf = inf['nome'] if inf else 'Desconhecido'
             
             for post in inf_camp.get('posts', []):
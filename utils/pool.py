@@ -0,0 +1,211 @@
+"""
+Pool de conexoes compartilhado entre sessoes do Streamlit
+
+Assim como o cache, uma instancia criada no nivel do modulo e vista por todas
+as sessoes do processo. As conexoes sao emprestadas por consulta e devolvidas
+logo depois, entao poucas conexoes atendem muitas sessoes ao mesmo tempo.
+A verificacao de saude (SELECT 1) so e feita no emprestimo, e apenas em
+conexoes que ficaram paradas mais tempo que verificar_apos.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+
+class PoolEsgotado(Exception):
+    """Nenhuma conexao ficou livre dentro do tempo de espera"""
+
+
+def _verificar_conexao(conn) -> bool:
+    """Verificacao padrao: executa SELECT 1 e desfaz a transacao aberta"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+        conn.rollback()
+        return True
+    except Exception:
+        return False
+
+
+class PoolConexoes:
+    """Pool de conexoes com limite minimo/maximo, reciclagem de ociosas e verificacao no emprestimo"""
+
+    def __init__(self, conectar: Callable[[], Any], min_conexoes: int = 1, max_conexoes: int = 10,
+                 max_ocioso: float = 300, max_vida: float = 3600, verificar_apos: float = 30,
+                 timeout: float = 30, verificar: Callable[[Any], bool] = _verificar_conexao):
+        """
+        Args:
+            conectar: Funcao que abre uma conexao nova
+            min_conexoes: Conexoes ociosas mantidas mesmo sem uso
+            max_conexoes: Limite de conexoes abertas (em uso + livres)
+            max_ocioso: Segundos parada antes de ser fechada (acima do minimo)
+            max_vida: Segundos desde a abertura antes de ser reciclada
+            verificar_apos: Segundos parada a partir dos quais a conexao e testada no emprestimo
+            timeout: Segundos de espera por uma conexao livre antes de PoolEsgotado
+            verificar: Funcao que recebe a conexao e retorna se ela esta utilizavel
+        """
+        self.max_conexoes = max(1, max_conexoes)
+        self.min_conexoes = max(0, min(min_conexoes, self.max_conexoes))
+        self.max_ocioso = max_ocioso
+        self.max_vida = max_vida
+        self.verificar_apos = verificar_apos
+        self.timeout = timeout
+        self._conectar = conectar
+        self._verificar = verificar
+
+        # Livres: (conexao, aberta_em, devolvida_em); a ultima devolvida sai primeiro
+        self._livres: List[Tuple[Any, float, float]] = []
+        self._em_uso: Dict[int, float] = {}
+        self._abertas = 0
+        self._cond = threading.Condition(threading.Lock())
+
+        self._emprestimos = 0
+        self._esperas = 0
+        self._tempo_espera = 0.0
+        self._criadas = 0
+        self._recicladas = 0
+        self._falhas_verificacao = 0
+
+    def _fechar(self, conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _reciclar_ociosas(self, agora: float) -> List[Any]:
+        """Remove (com o lock) as conexoes livres expiradas; retorna as que devem ser fechadas"""
+        fechar = []
+        manter = []
+        # Percorre da mais antiga para a mais recente para manter as recentes no minimo
+        for item in self._livres:
+            conn, aberta_em, devolvida_em = item
+            expirada = agora - aberta_em > self.max_vida
+            ociosa = agora - devolvida_em > self.max_ocioso
+            restantes = self._abertas - len(fechar)
+            if expirada or (ociosa and restantes > self.min_conexoes):
+                fechar.append(conn)
+            else:
+                manter.append(item)
+        self._livres = manter
+        self._abertas -= len(fechar)
+        self._recicladas += len(fechar)
+        return fechar
+
+    def obter(self):
+        """Empresta uma conexao do pool (devolver com devolver())"""
+        inicio = time.time()
+        esperou = False
+
+        while True:
+            with self._cond:
+                for conn in self._reciclar_ociosas(time.time()):
+                    self._fechar(conn)
+
+                item = None
+                criar = False
+                if self._livres:
+                    item = self._livres.pop()
+                elif self._abertas < self.max_conexoes:
+                    self._abertas += 1
+                    criar = True
+                else:
+                    restante = self.timeout - (time.time() - inicio)
+                    if restante <= 0:
+                        raise PoolEsgotado(
+                            f"Nenhuma conexao livre em {self.timeout}s ({self.max_conexoes} em uso)"
+                        )
+                    esperou = True
+                    self._cond.wait(restante)
+                    continue
+
+            if criar:
+                try:
+                    conn = self._conectar()
+                except Exception:
+                    with self._cond:
+                        self._abertas -= 1
+                        self._cond.notify()
+                    raise
+                aberta_em = time.time()
+                with self._cond:
+                    self._criadas += 1
+            else:
+                conn, aberta_em, devolvida_em = item
+                # Conexao parada ha muito tempo pode ter sido derrubada pelo servidor
+                if time.time() - devolvida_em > self.verificar_apos and not self._verificar(conn):
+                    self._fechar(conn)
+                    with self._cond:
+                        self._abertas -= 1
+                        self._falhas_verificacao += 1
+                    continue
+
+            with self._cond:
+                self._em_uso[id(conn)] = aberta_em
+                self._emprestimos += 1
+                if esperou:
+                    self._esperas += 1
+                    self._tempo_espera += time.time() - inicio
+            return conn
+
+    def devolver(self, conn, descartar: bool = False) -> None:
+        """
+        Devolve uma conexao emprestada. Transacoes abertas sao desfeitas; se
+        isso falhar (conexao quebrada) ou descartar=True, a conexao e fechada.
+        """
+        if not descartar:
+            try:
+                conn.rollback()
+            except Exception:
+                descartar = True
+        if not descartar and getattr(conn, 'closed', 0):
+            descartar = True
+
+        with self._cond:
+            aberta_em = self._em_uso.pop(id(conn), None)
+            if aberta_em is None:
+                # Conexao que nao e deste pool
+                descartar = True
+            elif descartar:
+                self._abertas -= 1
+            elif time.time() - aberta_em > self.max_vida:
+                self._abertas -= 1
+                self._recicladas += 1
+                descartar = True
+            else:
+                self._livres.append((conn, aberta_em, time.time()))
+            self._cond.notify()
+
+        if descartar:
+            self._fechar(conn)
+
+    def fechar_todas(self) -> None:
+        """Fecha as conexoes livres (as emprestadas sao fechadas ao serem devolvidas)"""
+        with self._cond:
+            livres = [item[0] for item in self._livres]
+            self._abertas -= len(livres)
+            self._livres = []
+            # Conexoes em uso deixam de pertencer ao pool
+            self._abertas -= len(self._em_uso)
+            self._em_uso = {}
+            self._cond.notify_all()
+        for conn in livres:
+            self._fechar(conn)
+
+    def estatisticas(self) -> Dict:
+        """Retorna ocupacao e contadores do pool"""
+        with self._cond:
+            return {
+                'abertas': self._abertas,
+                'em_uso': len(self._em_uso),
+                'livres': len(self._livres),
+                'min_conexoes': self.min_conexoes,
+                'max_conexoes': self.max_conexoes,
+                'emprestimos': self._emprestimos,
+                'esperas': self._esperas,
+                'espera_media_ms': round(self._tempo_espera / self._esperas * 1000, 1) if self._esperas else 0,
+                'criadas': self._criadas,
+                'recicladas': self._recicladas,
+                'falhas_verificacao': self._falhas_verificacao,
+            }
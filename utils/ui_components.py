@@ -441,3 +441,34 @@ def render_empty_state(icon: str, title: str, description: str):
 def render_badge(text: str, color: str = "gray"):
     """Renderiza badge colorido - retorna HTML"""
     return f'<span class="badge badge-{color}">{text}</span>'
+
+
+def cursor_paginacao(chave: str, filtros) -> Optional[tuple]:
+    """Retorna o cursor da pagina atual de uma listagem paginada por chave.
+    
+    Volta para a primeira pagina quando os filtros (incluindo o tamanho da pagina) mudam.
+    """
+    estado = st.session_state.get(f'paginacao_{chave}')
+    if not estado or estado['filtros'] != filtros:
+        estado = {'filtros': filtros, 'cursores': [None]}
+        st.session_state[f'paginacao_{chave}'] = estado
+    return estado['cursores'][-1]
+
+
+def render_paginacao(chave: str, proximo_cursor, total: int, por_pagina: int):
+    """Renderiza os botoes Anterior/Proxima de uma listagem paginada por chave"""
+    estado = st.session_state[f'paginacao_{chave}']
+    pagina = len(estado['cursores'])
+    total_paginas = max(1, (total + por_pagina - 1) // por_pagina)
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("Anterior", key=f"pag_anterior_{chave}", disabled=pagina == 1, use_container_width=True):
+            estado['cursores'].pop()
+            st.rerun()
+    with col2:
+        st.markdown(f"<p style='text-align:center;margin:0.5rem 0;'>Pagina {pagina} de {total_paginas}</p>", unsafe_allow_html=True)
+    with col3:
+        if st.button("Proxima", key=f"pag_proxima_{chave}", disabled=proximo_cursor is None, use_container_width=True):
+            estado['cursores'].append(proximo_cursor)
+            st.rerun()